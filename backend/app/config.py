@@ -24,12 +24,77 @@ class Settings(BaseModel):
     # Scraping settings
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     REQUEST_TIMEOUT: int = 30  # seconds
+    SCRAPING_MAX_CONCURRENCY_PER_HOST: int = 2  # parallel requests to the same marketplace
+    HTTP_POOL_SIZE: int = 4  # keep-alive connections per marketplace (default for sources)
+    HTTP_KEEPALIVE_TIMEOUT: int = 60  # seconds an idle connection is kept open
+    HTTP_DNS_CACHE_TTL: int = 300  # seconds
     
-    # Rate limiting
+    # Paginated crawls
+    SCRAPING_MAX_PAGES: int = 10  # upper bound for the page budget of one crawl
+    SCRAPING_PREFETCH_PAGES: int = 2  # pages fetched ahead of the one being parsed
+    
+    # Rate limiting (defaults for sources without their own limits)
     SCRAPING_RATE_LIMIT: int = 5  # seconds between requests
+    SCRAPING_RATE_BURST: int = 1  # requests allowed back-to-back
+    
+    # Circuit breaker and retries per marketplace
+    CIRCUIT_FAILURE_THRESHOLD: int = 3  # consecutive failures that open the circuit
+    CIRCUIT_RECOVERY_TIMEOUT: int = 60  # seconds before a probe request is let through
+    SCRAPING_MAX_RETRIES: int = 2  # retries of a failed request
+    RETRY_BACKOFF_BASE: float = 0.5  # seconds, doubled for every retry (with full jitter)
+    RETRY_BACKOFF_MAX: float = 8.0  # seconds
+    RETRY_BUDGET_RATIO: float = 0.2  # retries earned per request
+    RETRY_BUDGET_MIN: int = 3  # retries available to a new host
+    RETRY_BUDGET_MAX: int = 10  # retries that can be saved up
+    
+    # On-disk cache of scraped pages (freshness can be overridden per source)
+    HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+    HTTP_CACHE_DIR: str = os.getenv("HTTP_CACHE_DIR", "/tmp/inshop_http_cache")
+    HTTP_CACHE_TTL: int = 600  # seconds a page is served without revalidation
+    HTTP_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    
+    # Worker processes parsing listing pages (0 parses in the calling thread)
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+    
+    # Selector hit counters are halved once a field has seen this many lookups
+    SELECTOR_STATS_WINDOW: int = 5000
+    
+    # Directory where downloaded listing pages are saved for the parser benchmarks (disabled if empty)
+    SCRAPE_CAPTURE_DIR: str = os.getenv("SCRAPE_CAPTURE_DIR", "")
+    
+    # Scraped products written per upsert transaction
+    INGEST_BATCH_SIZE: int = 500
+    
+    # Write-behind queue between the scrapers and the database
+    WRITE_QUEUE_MAX_RECORDS: int = 5000  # scrapers wait when this many records are queued
+    WRITE_FLUSH_INTERVAL: float = 1.0  # seconds a record may wait for a fuller batch
+    
+    # Price history: raw change points are kept this long, daily buckets for good
+    PRICE_HISTORY_RAW_DAYS: int = 30
+    PRICE_HISTORY_RAW_MAX_RANGE_DAYS: int = 7  # longer ranges are served from the daily buckets
+    PRICE_HISTORY_PRUNE_INTERVAL: int = 3600  # seconds between deletions of expired raw points
     
     # Product caching
     CACHE_EXPIRY: int = 86400  # 24 hours in seconds
+    RESULT_CACHE_MAX_ENTRIES: int = 10000  # cached API responses, least recently used evicted first
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_SWEEP_INTERVAL: float = 30.0  # seconds between removals of expired responses
+    # "memory" keeps responses per process; "redis" shares them between API workers
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_CACHE_PREFIX: str = os.getenv("REDIS_CACHE_PREFIX", "inshop:cache:")
+    RESULT_CACHE_NEAR_TTL: float = 5.0  # seconds a worker reuses a Redis entry without asking Redis
+    RESULT_CACHE_NEAR_MAX_ENTRIES: int = 1000
+    # Aggregated search results: fresh for the soft TTL, then served stale while one
+    # background refresh rebuilds them, until the hard TTL
+    SEARCH_CACHE_SOFT_TTL: int = 300
+    SEARCH_CACHE_HARD_TTL: int = 3600
+    CACHE_REFRESH_WORKERS: int = 2  # threads rebuilding stale entries
+    CACHE_REFRESH_TIMEOUT: int = 60  # seconds a refresh claim is held before another worker may retry
+    
+    # In-memory quick search index, kept in step with changes made by any API worker
+    SEARCH_INDEX_REFRESH_INTERVAL: int = 30  # seconds between re-indexing of changed products
+    SEARCH_INDEX_REBUILD_INTERVAL: int = 3600  # seconds between full rebuilds (drops deleted products)
     
     # E-commerce source URLs
     AMAZON_URL: str = "https://www.amazon.in"
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, Boolean, ForeignKey, DateTime, Date, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+# A listing's price and stock, recorded only when one of them changed
+class PricePoint(Base):
+    __tablename__ = "price_history"
+    __table_args__ = (
+        Index("ix_price_history_product_recorded", "product_id", "recorded_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), nullable=False)
+    price = Column(Float, nullable=True)
+    original_price = Column(Float, nullable=True)
+    in_stock = Column(Boolean, nullable=False, default=True)
+    recorded_at = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self):
+        return f"<PricePoint(product_id={self.product_id}, source_id={self.source_id}, price={self.price})>"
+
+# Daily min/max/last price of a listing, kept after the raw points are pruned
+class PriceDaily(Base):
+    __tablename__ = "price_history_daily"
+
+    # (product, day) first: the history endpoint reads a product's days across sources
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), primary_key=True)
+    min_price = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    last_price = Column(Float, nullable=True)
+    last_in_stock = Column(Boolean, nullable=False, default=True)
+    changes = Column(Integer, nullable=False, default=1)  # raw points rolled into the bucket
+    updated_at = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self):
+        return f"<PriceDaily(product_id={self.product_id}, day={self.day}, source_id={self.source_id})>"
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Table, Text, Enum, ARRAY, JSON, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Table, Text, Enum, ARRAY, JSON, DateTime, UniqueConstraint, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.database import Base
@@ -16,7 +17,9 @@ product_source = Table(
     Column('price', Float, nullable=True),                    # Current price on this source
     Column('original_price', Float, nullable=True),           # Original price (if on discount)
     Column('in_stock', Boolean, default=True),                # Whether product is in stock at this source
-    Column('last_checked', DateTime, default=func.now())      # Last time the price/availability was checked
+    Column('last_checked', DateTime, default=func.now()),     # Last time the price/availability was checked
+    # Refresh by marketplace id and listings of one source (the primary key leads with product_id)
+    Index('ix_product_source_source_product', 'source_id', 'source_product_id')
 )
 
 class GenderEnum(enum.Enum):
@@ -24,8 +27,28 @@ class GenderEnum(enum.Enum):
     women = "women"
     unisex = "unisex"
 
+# Text search configuration and document of products.search_vector
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(brand, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(type, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Identity of a scraped product, used by the bulk upserts
+        UniqueConstraint("name", "brand", "gender", name="uq_products_name_brand_gender"),
+        # Catalog filters (filter_products)
+        Index("ix_products_gender_brand", "gender", "brand"),
+        Index("ix_products_gender_type", "gender", "type"),
+        Index("ix_products_brand", "brand"),
+        # Full-text search; the pg_trgm indexes on name and brand live in
+        # database/migrations/007_product_search.sql as they need the extension
+        Index("ix_products_search", "search_vector", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -54,6 +77,10 @@ class Product(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
+    # Weighted search document, computed by the database (name and brand rank above type and
+    # description); deferred so loading a product doesn't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
+    
     # Relationships
     sources = relationship("Source", secondary=product_source, back_populates="products")
     reviews = relationship("Review", back_populates="product")
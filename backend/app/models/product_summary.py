@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.product import GenderEnum
+
+# Listing data of a product, one row per product. Maintained by database triggers on
+# products, product_source, reviews and sources (database/migrations/005_product_summary.sql),
+# so catalog filters and sorts read one table instead of aggregating joins.
+class ProductSummary(Base):
+    __tablename__ = "product_summary"
+    __table_args__ = (
+        # Sort orders end in product_id, the tie-break of keyset pagination
+        Index("ix_product_summary_gender_price", "gender", "lowest_price", "product_id"),
+        Index("ix_product_summary_gender_brand", "gender", "brand"),
+        Index("ix_product_summary_gender_type", "gender", "type"),
+        Index("ix_product_summary_price", "lowest_price", "product_id"),
+        Index("ix_product_summary_created", "created_at", "product_id"),
+        Index("ix_product_summary_sources", "source_names", postgresql_using="gin"),
+        # Summaries changed since the last search index refresh
+        Index("ix_product_summary_updated", "updated_at"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+
+    # Copied from products for filtering
+    gender = Column(Enum(GenderEnum), nullable=False)
+    brand = Column(String(100), nullable=False)
+    type = Column(String(100), nullable=False)
+    created_at = Column(DateTime, nullable=True)
+
+    # Aggregated from product_source and reviews
+    lowest_price = Column(Float, nullable=True)
+    highest_price = Column(Float, nullable=True)
+    source_names = Column(ARRAY(String(50)), nullable=False, default=list)
+    rating_average = Column(Float, nullable=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<ProductSummary(product_id={self.product_id}, lowest_price={self.lowest_price})>"
+
+# Matches the rating_desc sort, which puts unrated products last
+Index("ix_product_summary_rating", func.coalesce(ProductSummary.rating_average, 0), ProductSummary.product_id)
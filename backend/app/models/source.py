@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.utils import circuit_breaker
 
 class Source(Base):
     __tablename__ = "sources"
@@ -16,6 +17,12 @@ class Source(Base):
     search_endpoint = Column(String(255), nullable=True)
     product_endpoint = Column(String(255), nullable=True)
     
+    # Per-host rate limiting (falls back to the global settings when empty)
+    rate_limit_burst = Column(Integer, nullable=True)         # Requests allowed back-to-back
+    rate_limit_per_second = Column(Float, nullable=True)      # Token refill rate
+    http_pool_size = Column(Integer, nullable=True)           # Keep-alive connections to base_url
+    cache_ttl = Column(Integer, nullable=True)                # Seconds a cached page stays fresh
+    
     # Timestamps
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -23,5 +30,10 @@ class Source(Base):
     # Relationships
     products = relationship("Product", secondary="product_source", back_populates="sources")
     
+    @property
+    def circuit_breaker(self):
+        """State of the scraper circuit breaker for this source (None until first scraped)"""
+        return circuit_breaker.get_source_state(self.base_url)
+    
     def __repr__(self):
         return f"<Source(id={self.id}, name='{self.name}')>"
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime, timedelta
 from app.database import get_db
 from app.schemas.product import (
     ProductCreate, ProductResponse, ProductUpdate, 
-    ProductListResponse, GenderEnum, ProductFilter
+    ProductListResponse, GenderEnum, ProductFilter,
+    PriceGranularity, PriceHistoryResponse
 )
 from app.services.product_service import (
     create_product, get_product_by_id, get_products, 
-    update_product, delete_product, filter_products
+    update_product, delete_product, filter_products, filter_products_page, search_products,
+    quick_search_products
 )
+from app.services.price_history_service import get_price_history
+from app.utils import search_index
 
 router = APIRouter(
     prefix="/api/v1/products",
@@ -36,8 +41,10 @@ async def get_product_endpoint(product_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[ProductListResponse])
 async def get_products_endpoint(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = None,
     gender: Optional[GenderEnum] = None,
     brand: Optional[List[str]] = Query(None),
     type: Optional[List[str]] = Query(None),
@@ -51,6 +58,10 @@ async def get_products_endpoint(
     """
     Get all products with filtering and pagination.
     Sort options: price_asc, price_desc, rating_desc, newest
+    
+    Pages are linked by cursor: the X-Next-Cursor response header holds the value
+    to pass as `cursor` for the next page (absent on the last page). `skip` still
+    works for offset paging but gets slower the deeper the page.
     """
     filters = ProductFilter(
         gender=gender,
@@ -62,7 +73,88 @@ async def get_products_endpoint(
         min_rating=min_rating
     )
     
-    return filter_products(db=db, filters=filters, skip=skip, limit=limit, sort_by=sort_by)
+    if skip and not cursor:
+        return filter_products(db=db, filters=filters, skip=skip, limit=limit, sort_by=sort_by)
+    
+    try:
+        products, next_cursor = filter_products_page(
+            db=db, filters=filters, limit=limit, sort_by=sort_by, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
+
+@router.get("/search/{query}", response_model=List[ProductListResponse])
+async def search_products_endpoint(
+    query: str,
+    skip: int = 0,
+    limit: int = 100,
+    gender: Optional[GenderEnum] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Search products by name, brand, or description.
+    """
+    return search_products(db=db, query=query, gender=gender, skip=skip, limit=limit)
+
+@router.get("/quick-search/{query}", response_model=List[ProductListResponse])
+async def quick_search_products_endpoint(
+    query: str,
+    skip: int = 0,
+    limit: int = 20,
+    gender: Optional[GenderEnum] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Search-as-you-type by name, brand, type, material and features, served from the
+    in-memory search index; the last term matches as a prefix ("calvin box").
+    Answered from the database only while the index is still loading after startup.
+    """
+    if not search_index.is_ready():
+        results = search_products(db=db, query=query, gender=gender)
+        if min_price is not None:
+            results = [result for result in results if result["lowest_price"] >= min_price]
+        if max_price is not None:
+            results = [result for result in results if result["lowest_price"] <= max_price]
+        return results[skip:skip + limit]
+    return quick_search_products(query, gender=gender, min_price=min_price, max_price=max_price,
+                                 skip=skip, limit=limit)
+
+@router.get("/{product_id}/price-history", response_model=PriceHistoryResponse)
+async def get_price_history_endpoint(
+    product_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    granularity: Optional[PriceGranularity] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the price history of a product, by default for the last 30 days.
+    Short recent ranges return every price change; longer ones return daily
+    min/max/last buckets unless a granularity is given.
+    """
+    if get_product_by_id(db=db, product_id=product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    end = end or datetime.now()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    return get_price_history(
+        db=db,
+        product_id=product_id,
+        start=start,
+        end=end,
+        source=source,
+        granularity=granularity.value if granularity else None
+    )
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product_endpoint(product_id: int, product: ProductUpdate, db: Session = Depends(get_db)):
@@ -84,17 +176,3 @@ async def delete_product_endpoint(product_id: int, db: Session = Depends(get_db)
         raise HTTPException(status_code=404, detail="Product not found")
     delete_product(db=db, product_id=product_id)
     return None
-
-@router.get("/search/{query}", response_model=List[ProductListResponse])
-async def search_products_endpoint(
-    query: str,
-    skip: int = 0,
-    limit: int = 100,
-    gender: Optional[GenderEnum] = None,
-    db: Session = Depends(get_db)
-):
-    """
-    Search products by name, brand, or description.
-    """
-    # This will be implemented in the product_service
-    return []
@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from app.database import get_db
-from app.schemas.product import ProductListResponse, GenderEnum
+import asyncio
+import json
+import time
+import uuid
+from app.database import get_db, SessionLocal
+from app.models.product import Product
+from app.models.source import Source
+from app.schemas.product import ProductListResponse, SearchResultResponse, GenderEnum
 from app.services.scraping_service import (
-    scrape_amazon, scrape_flipkart, scrape_myntra, scrape_ajio,
-    scrape_product_details
+    scrape_amazon, scrape_flipkart,
+    scrape_product_details, scrape_pages_async, LISTING_SCRAPERS,
+    start_live_search, finish_live_search
 )
+from app.services import write_queue
+from app.services.product_service import search_products
+from app.utils import cache_manager, circuit_breaker, fetch_engine, http_cache, http_sessions, parse_pool, rate_limiter, search_index, selector_registry, single_flight
+from app.utils.task_manager import register_task
+
+# Stored products returned with an aggregated search
+SEARCH_RESULT_LIMIT = 100
 
 router = APIRouter(
     prefix="/api/v1/scraping",
@@ -14,128 +29,166 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/search/{query}", response_model=List[ProductListResponse])
+def format_scraped_product(product: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Shape a scraped product record for API responses"""
+    return {
+        "id": product.get("id", ""),
+        "name": product.get("name", ""),
+        "brand": product.get("brand", ""),
+        "price": product.get("price", 0),
+        "original_price": product.get("original_price", 0),
+        "image": product.get("image", ""),
+        "source": source,
+        "url": product.get("source_url", ""),
+        "type": product.get("type", ""),
+        "rating": product.get("rating", 0),
+        "rating_count": product.get("rating_count", 0)
+    }
+
+def merge_live_results(results: List[Dict[str, Any]], scraped: Dict[str, List[Dict[str, Any]]],
+                       gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """
+    Merge freshly scraped products into search results from the database.
+    Products already known (same name and brand) get the live prices and sources;
+    the others are appended without an id, as they are not stored yet.
+    The database results are copied, as they may be shared with other requests.
+    """
+    results = [dict(item, sources=list(item["sources"] or [])) for item in results]
+    by_key = {(item["name"].lower(), (item["brand"] or "").lower()): item for item in results}
+    
+    for source_name, products in scraped.items():
+        display_name = LISTING_SCRAPERS[source_name]["name"]
+        for product in products:
+            price = product.get("price")
+            if not price:
+                continue
+            
+            key = (product["name"].lower(), (product["brand"] or "").lower())
+            item = by_key.get(key)
+            if item is None:
+                item = {
+                    "id": None,
+                    "name": product["name"],
+                    "brand": product["brand"],
+                    "gender": gender.value if gender else "unisex",
+                    "type": product["type"],
+                    "images": [product["image"]] if product.get("image") else [],
+                    "available_sizes": None,
+                    "available_colors": None,
+                    "lowest_price": price,
+                    "highest_price": None,
+                    "sources": [],
+                    "rating_average": product.get("rating"),
+                    "rating_count": product.get("rating_count")
+                }
+                by_key[key] = item
+                results.append(item)
+            
+            if display_name not in item["sources"]:
+                item["sources"].append(display_name)
+            highest = max(price, item["highest_price"] or item["lowest_price"])
+            item["lowest_price"] = min(price, item["lowest_price"])
+            item["highest_price"] = highest if highest != item["lowest_price"] else None
+    
+    return results
+
+async def wait_for_live_search(futures: Dict[str, Any], timeout: float) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Wait up to `timeout` seconds for the sources of a live search
+    
+    Returns:
+        Products of the sources that finished in time (failed sources map to an empty list)
+    """
+    if futures and timeout > 0:
+        await asyncio.wait([asyncio.wrap_future(future) for future in futures.values()], timeout=timeout)
+    
+    finished = {}
+    for name, future in futures.items():
+        if future.done():
+            finished[name] = future.result() if not future.cancelled() and future.exception() is None else []
+    return finished
+
+def assemble_search_results(query: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Stored products of an aggregated search, in a session of its own (cache refreshes run off-request)"""
+    db = SessionLocal()
+    try:
+        return search_products(db, query, gender, limit=SEARCH_RESULT_LIMIT)
+    finally:
+        db.close()
+
+@router.get("/search/{query}", response_model=List[SearchResultResponse])
 async def search_all_sources(
     query: str,
+    response: Response,
     gender: Optional[GenderEnum] = None,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
+    deadline_ms: Optional[int] = Query(None, ge=50, le=30000),
     db: Session = Depends(get_db)
 ):
     """
     Search across all e-commerce sources and return aggregated results.
     This will trigger background scraping tasks and return already cached results.
-    """
-    # Get cached results if available
-    from app.utils.cache_manager import get_cached_results, cache_results
     
-    cache_key = f"search_{query}_{gender.value if gender else 'all'}"
-    cached_data = get_cached_results(cache_key)
+    Cached results stay fresh for SEARCH_CACHE_SOFT_TTL seconds. Older ones are still
+    served, up to SEARCH_CACHE_HARD_TTL, while one background refresh rebuilds them
+    and scrapes the sources again. The X-Cache header reports fresh, stale,
+    refreshing or miss.
     
-    if cached_data:
-        return cached_data
+    - deadline_ms: Scrape the sources live and wait up to this many milliseconds.
+      Products that arrive in time are merged with the database results; sources
+      still running are listed in the X-Pending-Sources header and are stored in
+      the background (X-Task-Id).
+    """
+    started = time.monotonic()
+    
+    # Cached results are served until their hard TTL; stale ones are rebuilt in the background
+    cache_key = f"search_{single_flight.normalize_query(query)}_{gender.value if gender else 'all'}"
+    cached_data, cache_status = None, cache_manager.MISS
+    if not deadline_ms:
+        cached_data, cache_status = cache_manager.get_revalidating(
+            cache_key, "search", lambda: assemble_search_results(query, gender)
+        )
+        response.headers["X-Cache"] = cache_status
+        if cached_data and cache_status != cache_manager.REFRESHING:
+            return cached_data
     
     # Get all active sources
     sources = db.query(Source).filter(Source.is_active == True).all()
     source_names = [source.name.lower() for source in sources]
+    fetch_engine.configure_sources(sources)
     
-    # Queue background tasks for scraping from each source
-    task_ids = []
-    for source_name in source_names:
-        # Create a task ID for tracking
-        import uuid
-        task_id = f"scrape_{source_name}_{uuid.uuid4().hex[:8]}"
-        
-        # Add scraping tasks to background tasks
-        if source_name == 'amazon':
-            background_tasks.add_task(
-                scrape_amazon, query, gender, db, task_id=task_id
-            )
-        elif source_name == 'flipkart':
-            background_tasks.add_task(
-                scrape_flipkart, query, gender, db, task_id=task_id
-            )
-        elif source_name == 'myntra':
-            background_tasks.add_task(
-                scrape_myntra, query, gender, db, task_id=task_id
-            )
-        elif source_name == 'ajio':
-            background_tasks.add_task(
-                scrape_ajio, query, gender, db, task_id=task_id
-            )
-        
-        task_ids.append(task_id)
-    
-    # Get any existing results from database
-    from sqlalchemy import or_, and_
-    from app.models.product import Product, GenderEnum as ModelGenderEnum
-    
-    # Search in product names and descriptions
-    filters = []
-    for term in query.split():
-        if len(term) > 2:  # Only search for terms with more than 2 characters
-            filters.append(or_(
-                Product.name.ilike(f'%{term}%'),
-                Product.description.ilike(f'%{term}%'),
-                Product.brand.ilike(f'%{term}%'),
-                Product.type.ilike(f'%{term}%')
-            ))
-    
-    # Apply gender filter if provided
-    gender_filter = True
-    if gender:
-        gender_filter = Product.gender == ModelGenderEnum(gender.value)
+    # Scraping starts now, in parallel per source, and is stored once every source is done.
+    # Sources already being scraped for the same query are joined, not fetched twice.
+    task_id = f"scrape_{uuid.uuid4().hex[:8]}"
+    register_task(
+        task_id=task_id,
+        task_type="scrape",
+        params={"query": query, "gender": gender.value if gender else None, "sources": source_names}
+    )
+    live_search = start_live_search(query, gender, source_names)
+    finish_live_search(live_search, query, gender, task_id)
     
-    # Combine all filters
-    if filters:
-        combined_filter = and_(*filters, gender_filter)
-    else:
-        combined_filter = gender_filter
+    # A stale entry is being rebuilt: serve it, with the marketplaces scraped once per refresh
+    if cached_data:
+        response.headers["X-Task-Id"] = task_id
+        return cached_data
     
-    # Query products
-    products = db.query(Product).filter(combined_filter).all()
+    # Get any existing results from database, most relevant first (one indexed statement),
+    # shared by concurrent identical searches
+    results = await single_flight.do_async(("search", cache_key), assemble_search_results, query, gender)
     
-    # Format results
-    results = []
-    for product in products:
-        # Get sources and prices for this product
-        product_sources = []
-        lowest_price = float('inf')
-        highest_price = 0
-        
-        for assoc in product.sources:
-            source_name = db.query(Source.name).filter(Source.id == assoc.source_id).scalar()
-            product_sources.append(source_name)
-            
-            if assoc.price:
-                lowest_price = min(lowest_price, assoc.price)
-                highest_price = max(highest_price, assoc.price)
-        
-        # Get average rating
-        from sqlalchemy import func
-        avg_rating = db.query(func.avg(Review.rating)).filter(Review.product_id == product.id).scalar()
-        rating_count = db.query(func.count(Review.id)).filter(Review.product_id == product.id).scalar()
+    if deadline_ms:
+        remaining = deadline_ms / 1000 - (time.monotonic() - started)
+        finished = await wait_for_live_search(live_search, remaining)
         
-        # Format the product data
-        product_data = {
-            "id": product.id,
-            "name": product.name,
-            "brand": product.brand,
-            "gender": product.gender.value,
-            "type": product.type,
-            "images": product.images,
-            "available_sizes": product.available_sizes,
-            "available_colors": product.available_colors,
-            "lowest_price": lowest_price if lowest_price != float('inf') else None,
-            "highest_price": highest_price if highest_price > 0 and highest_price != lowest_price else None,
-            "sources": product_sources,
-            "rating_average": float(avg_rating) if avg_rating else None,
-            "rating_count": rating_count
-        }
+        response.headers["X-Task-Id"] = task_id
+        response.headers["X-Completed-Sources"] = ",".join(finished)
+        response.headers["X-Pending-Sources"] = ",".join(name for name in live_search if name not in finished)
         
-        results.append(product_data)
+        # Partial results are not cached
+        return merge_live_results(results, finished, gender)
     
     # Cache the results
-    cache_results(cache_key, results, expiry=300)  # Cache for 5 minutes
+    cache_manager.cache_revalidating(cache_key, results, "search")
     
     return results
 
@@ -213,7 +266,7 @@ async def refresh_product_data(
     return {"status": "success", "message": f"Refresh initiated for product {product_id}", "task_id": task_id}
 
 @router.get("/amazon/{query}", response_model=List[Dict[str, Any]])
-async def search_amazon(
+def search_amazon(
     query: str,
     gender: Optional[GenderEnum] = None,
     page: int = 1,
@@ -227,6 +280,9 @@ async def search_amazon(
     - gender: Optional gender filter (men, women, unisex)
     - page: Page number for pagination (default: 1)
     - url: Optional direct Amazon URL to scrape
+    
+    Scraping blocks on fetching, parsing and the write queue, so this endpoint is a
+    plain function that FastAPI runs in its threadpool, off the event loop.
     """
     # Call the scrape_amazon function to get products
     # We're updating the response model to Dict to avoid DB dependency
@@ -234,24 +290,7 @@ async def search_amazon(
         products = scrape_amazon(query=query, gender=gender, db=db, page=page, url=url)
         
         # Format the products for the response
-        results = []
-        for product in products:
-            # Transform product object to dict
-            results.append({
-                "id": product.get("id", ""),
-                "name": product.get("name", ""),
-                "brand": product.get("brand", ""),
-                "price": product.get("price", 0),
-                "original_price": product.get("original_price", 0),
-                "image": product.get("image", ""),
-                "source": "Amazon",
-                "url": product.get("source_url", ""),
-                "type": product.get("type", ""),
-                "rating": product.get("rating", 0),
-                "rating_count": product.get("rating_count", 0)
-            })
-        
-        return results
+        return [format_scraped_product(product, "Amazon") for product in products]
     except Exception as e:
         # Log the error
         print(f"Error scraping Amazon: {e}")
@@ -259,13 +298,14 @@ async def search_amazon(
         return []
 
 @router.get("/flipkart/{query}", response_model=List[Dict[str, Any]])
-async def search_flipkart(
+def search_flipkart(
     query: str,
     gender: Optional[GenderEnum] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Search Flipkart for products matching the query.
+    Search Flipkart for products matching the query (runs in the threadpool, like
+    search_amazon).
     
     - query: The search query string
     - gender: Optional gender filter (men, women, unisex)
@@ -275,24 +315,7 @@ async def search_flipkart(
         products = scrape_flipkart(query=query, gender=gender, db=db)
         
         # Format the products for the response
-        results = []
-        for product in products:
-            # Transform product object to dict
-            results.append({
-                "id": product.get("id", ""),
-                "name": product.get("name", ""),
-                "brand": product.get("brand", ""),
-                "price": product.get("price", 0),
-                "original_price": product.get("original_price", 0),
-                "image": product.get("image", ""),
-                "source": "Flipkart",
-                "url": product.get("source_url", ""),
-                "type": product.get("type", ""),
-                "rating": product.get("rating", 0),
-                "rating_count": product.get("rating_count", 0)
-            })
-        
-        return results
+        return [format_scraped_product(product, "Flipkart") for product in products]
     except Exception as e:
         # Log the error
         print(f"Error scraping Flipkart: {e}")
@@ -323,6 +346,74 @@ async def search_ajio(
     # In a real implementation, this would call the scrape_ajio function
     return []
 
+@router.get("/crawl/{source_name}/{query}")
+async def crawl_source_pages(
+    source_name: str,
+    query: str,
+    gender: Optional[GenderEnum] = None,
+    max_pages: int = Query(3, ge=1),
+    url: Optional[str] = None
+):
+    """
+    Crawl several result pages of one source and stream the products as
+    newline-delimited JSON while the pages complete.
+    
+    - source_name: amazon, flipkart, myntra or ajio
+    - max_pages: Page budget (capped by SCRAPING_MAX_PAGES); the crawl stops early
+      at the first page without new products
+    - url: Optional direct Amazon URL to paginate
+    """
+    scraper = LISTING_SCRAPERS.get(source_name.lower())
+    if not scraper:
+        raise HTTPException(status_code=404, detail=f"Unknown source: {source_name}")
+    if url and source_name.lower() != "amazon":
+        raise HTTPException(status_code=400, detail="A direct URL is only supported for Amazon")
+    
+    pages = scrape_pages_async(source_name.lower(), query, gender, max_pages, url=url)
+    
+    async def stream_products():
+        async for page_number, products in fetch_engine.iterate_async(pages):
+            for product in products:
+                yield json.dumps({**format_scraped_product(product, scraper["name"]), "page": page_number}) + "\n"
+    
+    return StreamingResponse(stream_products(), media_type="application/x-ndjson")
+
+@router.get("/engine/stats", response_model=Dict[str, Any])
+async def get_fetch_engine_stats():
+    """
+    Get per-marketplace rate limiter and circuit breaker state, connection pool
+    reuse counters, page cache hit/miss counters, parse worker pool counters,
+    write-behind queue depth and flush latency, search result cache counters,
+    coalesced search and scrape counters and search index size.
+    """
+    return {
+        "rate_limits": rate_limiter.get_limiter_stats(),
+        "circuits": circuit_breaker.get_breaker_stats(),
+        "sessions": http_sessions.get_session_stats(),
+        "page_cache": http_cache.get_cache_stats(),
+        "parse_pool": parse_pool.get_pool_stats(),
+        "write_queue": write_queue.get_queue_stats(),
+        "result_cache": cache_manager.get_cache_stats(),
+        "single_flight": single_flight.get_flight_stats(),
+        "search_index": search_index.get_index_stats()
+    }
+
+@router.get("/selectors/stats", response_model=Dict[str, Any])
+async def get_selector_stats():
+    """
+    Get the hit counters of the listing page selectors per source and field,
+    in the order they are currently tried.
+    """
+    return selector_registry.get_selector_stats()
+
+@router.delete("/selectors/stats", response_model=Dict[str, Any])
+async def reset_selector_stats():
+    """
+    Forget the selector hit counters and go back to the declared selector order.
+    """
+    selector_registry.reset()
+    return {"status": "success", "message": "Selector statistics reset"}
+
 @router.get("/status/{task_id}")
 async def get_scraping_status(task_id: str):
     """
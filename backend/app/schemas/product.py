@@ -105,6 +105,29 @@ class ProductListResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class SearchResultResponse(ProductListResponse):
+    id: Optional[int] = None  # None for live results that are not stored yet
+
+class PriceGranularity(str, Enum):
+    raw = "raw"
+    daily = "daily"
+
+class PriceHistoryPoint(BaseModel):
+    source: str
+    time: datetime  # change time, or the start of the day for daily buckets
+    price: Optional[float] = None  # new price, or the day's last price
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    original_price: Optional[float] = None
+    in_stock: bool = True
+
+class PriceHistoryResponse(BaseModel):
+    product_id: int
+    granularity: PriceGranularity
+    start: datetime
+    end: datetime
+    points: List[PriceHistoryPoint]
+
 class ProductFilter(BaseModel):
     gender: Optional[GenderEnum] = None
     brand: Optional[List[str]] = None
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class SourceBase(BaseModel):
@@ -9,6 +9,10 @@ class SourceBase(BaseModel):
     search_endpoint: Optional[str] = None
     product_endpoint: Optional[str] = None
     is_active: bool = True
+    rate_limit_burst: Optional[int] = Field(None, ge=1)
+    rate_limit_per_second: Optional[float] = Field(None, gt=0)
+    http_pool_size: Optional[int] = Field(None, ge=1)
+    cache_ttl: Optional[int] = Field(None, ge=0)
 
 class SourceCreate(SourceBase):
     pass
@@ -20,11 +24,21 @@ class SourceUpdate(BaseModel):
     search_endpoint: Optional[str] = None
     product_endpoint: Optional[str] = None
     is_active: Optional[bool] = None
+    rate_limit_burst: Optional[int] = Field(None, ge=1)
+    rate_limit_per_second: Optional[float] = Field(None, gt=0)
+    http_pool_size: Optional[int] = Field(None, ge=1)
+    cache_ttl: Optional[int] = Field(None, ge=0)
+
+class CircuitBreakerState(BaseModel):
+    state: str  # closed, open or half_open
+    consecutive_failures: int
+    retry_at: Optional[datetime] = None  # when an open circuit lets the next probe through
 
 class SourceResponse(SourceBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    circuit_breaker: Optional[CircuitBreakerState] = None
 
     class Config:
         orm_mode = True
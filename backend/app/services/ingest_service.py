@@ -0,0 +1,172 @@
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import List, Dict, Any, Optional, Tuple
+from app.config import settings
+from app.models.product import Product, GenderEnum, product_source
+from app.models.source import Source
+from app.services.price_history_service import record_price_changes
+from app.services.product_service import index_products
+
+def _clip(value: Optional[str], length: int) -> Optional[str]:
+    """Trim a scraped string to its column size, so one long title can't fail a batch"""
+    return value[:length] if value else value
+
+def _upsert_batch(db: Session, source_id: int, records: List[Dict[str, Any]],
+                  gender: GenderEnum) -> Tuple[Dict[str, int], List[int]]:
+    """Write one batch of de-duplicated records in a single transaction; returns the counts and changed product ids"""
+    # 1. Insert unknown products; known ones are left as they are
+    db.execute(
+        insert(Product)
+        .values([
+            {
+                "name": record["name"],
+                "brand": record["brand"],
+                "gender": gender,
+                "type": record["type"],
+                "description": record["name"],  # Use title as description for now
+                "images": [record["image"]] if record["image"] else []
+            }
+            for record in records
+        ])
+        .on_conflict_do_nothing(constraint="uq_products_name_brand_gender")
+    )
+
+    # 2. Resolve the ids of every product in the batch, new or old
+    keys = [(record["name"], record["brand"]) for record in records]
+    product_ids = {
+        (name, brand): product_id
+        for product_id, name, brand in db.execute(
+            select(Product.id, Product.name, Product.brand)
+            .where(Product.gender == gender, tuple_(Product.name, Product.brand).in_(keys))
+        )
+    }
+
+    # 3. Current listing of each product on this source, to classify the changes
+    previous = {
+        row.product_id: (row.price, row.original_price, row.source_url, row.in_stock)
+        for row in db.execute(
+            select(product_source.c.product_id, product_source.c.price,
+                   product_source.c.original_price, product_source.c.source_url, product_source.c.in_stock)
+            .where(and_(product_source.c.source_id == source_id,
+                        product_source.c.product_id.in_(list(product_ids.values()))))
+        )
+    }
+
+    # 4. Upsert the source listings, keeping a history point wherever price or stock moved
+    listings = []
+    price_changes = []
+    changed_ids = []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for record in records:
+        product_id = product_ids.get((record["name"], record["brand"]))
+        if product_id is None:
+            continue
+        listing = {
+            "product_id": product_id,
+            "source_id": source_id,
+            "source_product_id": record["id"],
+            "source_url": record["source_url"],
+            "price": record["price"],
+            "original_price": record["original_price"],
+            "in_stock": True
+        }
+        listings.append(listing)
+
+        before = previous.get(product_id)
+        if before is None:
+            counts["inserted"] += 1
+            changed_ids.append(product_id)
+        elif before[:3] == (listing["price"], listing["original_price"], listing["source_url"]):
+            counts["unchanged"] += 1
+        else:
+            counts["updated"] += 1
+            changed_ids.append(product_id)
+
+        if before is None or (before[0], before[1], before[3]) != \
+                (listing["price"], listing["original_price"], listing["in_stock"]):
+            price_changes.append({
+                "product_id": product_id,
+                "price": listing["price"],
+                "original_price": listing["original_price"],
+                "in_stock": listing["in_stock"],
+                "previous_price": before[0] if before else None
+            })
+
+    if listings:
+        statement = insert(product_source).values(listings)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[product_source.c.product_id, product_source.c.source_id],
+            set_={
+                "source_product_id": statement.excluded.source_product_id,
+                "source_url": statement.excluded.source_url,
+                "price": statement.excluded.price,
+                "original_price": statement.excluded.original_price,
+                "in_stock": statement.excluded.in_stock,
+                "last_checked": func.now()
+            }
+        ))
+        record_price_changes(db, source_id, price_changes)
+
+    db.commit()
+    return counts, changed_ids
+
+def upsert_scraped_products(db: Session, source_name: str, products: List[Dict[str, Any]],
+                            gender: Optional[GenderEnum] = None) -> Dict[str, int]:
+    """
+    Store scraped product records with set-based upserts, one transaction per batch
+
+    Args:
+        db: Database session
+        source_name: Source display name (e.g. "Flipkart")
+        products: Scraped product records
+        gender: Optional gender of the search; unisex when missing
+
+    Returns:
+        Number of source listings inserted, updated (price or URL changed) and unchanged
+
+    Raises:
+        Exception: The error of a failed batch, after rolling it back; batches written
+            before it stay committed
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    source = db.query(Source).filter(Source.name == source_name).first()
+    if not source or not products:
+        return counts
+
+    gender = GenderEnum(gender.value) if gender else GenderEnum.unisex
+
+    # One row per product: a statement may not upsert the same row twice
+    records = {}
+    for product in products:
+        if not product.get("name") or not product.get("brand"):
+            continue
+        record = {
+            **product,
+            "name": _clip(product["name"], 255),
+            "brand": _clip(product["brand"], 100),
+            "type": _clip(product.get("type") or "Other", 100),
+            "image": _clip(product.get("image"), 500),
+            "source_url": _clip(product.get("source_url"), 500),
+            "id": _clip(product.get("id"), 255)
+        }
+        records[(record["name"], record["brand"])] = record
+    records = list(records.values())
+
+    for offset in range(0, len(records), settings.INGEST_BATCH_SIZE):
+        try:
+            batch_counts, changed_ids = _upsert_batch(
+                db, source.id, records[offset:offset + settings.INGEST_BATCH_SIZE], gender
+            )
+        except Exception:
+            db.rollback()
+            raise
+        for key, value in batch_counts.items():
+            counts[key] += value
+
+        # New and repriced listings change what the search index returns
+        index_products(db, changed_ids)
+
+    return counts
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import List, Dict, Any, Optional
+from app.config import settings
+from app.models.price_history import PricePoint, PriceDaily
+from app.models.source import Source
+
+RAW = "raw"
+DAILY = "daily"
+
+def _bound(pick, *prices: Optional[float]) -> Optional[float]:
+    """min or max of the known prices"""
+    known = [price for price in prices if price is not None]
+    return pick(known) if known else None
+
+def record_price_changes(db: Session, source_id: int, changes: List[Dict[str, Any]]) -> None:
+    """
+    Append price points and fold them into the daily buckets, in the caller's transaction
+
+    Args:
+        db: Database session
+        source_id: Source the listings belong to
+        changes: product_id, price, original_price, in_stock and previous_price (None for a
+            new listing) of each listing whose price or stock changed
+    """
+    if not changes:
+        return
+
+    db.execute(insert(PricePoint).values([
+        {
+            "product_id": change["product_id"],
+            "source_id": source_id,
+            "price": change["price"],
+            "original_price": change["original_price"],
+            "in_stock": change["in_stock"],
+            "recorded_at": func.now()
+        }
+        for change in changes
+    ]))
+
+    # Buckets are kept current as points arrive, so old points can be dropped without a rollup pass.
+    # A day's first change also counts the price that held until then.
+    statement = insert(PriceDaily).values([
+        {
+            "product_id": change["product_id"],
+            "day": func.current_date(),
+            "source_id": source_id,
+            "min_price": _bound(min, change["previous_price"], change["price"]),
+            "max_price": _bound(max, change["previous_price"], change["price"]),
+            "last_price": change["price"],
+            "last_in_stock": change["in_stock"],
+            "changes": 1,
+            "updated_at": func.now()
+        }
+        for change in changes
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[PriceDaily.product_id, PriceDaily.day, PriceDaily.source_id],
+        set_={
+            "min_price": func.least(PriceDaily.min_price, statement.excluded.min_price),
+            "max_price": func.greatest(PriceDaily.max_price, statement.excluded.max_price),
+            "last_price": statement.excluded.last_price,
+            "last_in_stock": statement.excluded.last_in_stock,
+            "changes": PriceDaily.changes + 1,
+            "updated_at": statement.excluded.updated_at
+        }
+    ))
+
+def prune_price_history(db: Session, retention_days: Optional[int] = None) -> int:
+    """
+    Delete raw price points older than the retention window; their days stay in the daily buckets
+
+    Args:
+        db: Database session
+        retention_days: Days of raw points to keep (defaults to PRICE_HISTORY_RAW_DAYS)
+
+    Returns:
+        Number of points deleted
+    """
+    days = settings.PRICE_HISTORY_RAW_DAYS if retention_days is None else retention_days
+    cutoff = datetime.now() - timedelta(days=days)
+    deleted = db.execute(delete(PricePoint).where(PricePoint.recorded_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+def choose_granularity(start: datetime, end: datetime) -> str:
+    """Raw points for short, recent ranges; daily buckets otherwise"""
+    raw_since = datetime.now() - timedelta(days=settings.PRICE_HISTORY_RAW_DAYS)
+    if start >= raw_since and end - start <= timedelta(days=settings.PRICE_HISTORY_RAW_MAX_RANGE_DAYS):
+        return RAW
+    return DAILY
+
+def get_price_history(db: Session, product_id: int, start: datetime, end: datetime,
+                      source: Optional[str] = None, granularity: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get a product's price history between two times
+
+    Args:
+        db: Database session
+        product_id: Product ID
+        start: Start of the range
+        end: End of the range
+        source: Optional source name to limit the history to
+        granularity: "raw" or "daily"; chosen from the range when missing
+
+    Returns:
+        Granularity used and the points, oldest first. Points are only stored when the
+        price or stock changed, so a gap means the previous price still held.
+    """
+    granularity = granularity or choose_granularity(start, end)
+
+    if granularity == RAW:
+        query = select(Source.name, PricePoint).join(Source, Source.id == PricePoint.source_id).where(
+            PricePoint.product_id == product_id,
+            PricePoint.recorded_at >= start,
+            PricePoint.recorded_at <= end
+        ).order_by(PricePoint.recorded_at)
+    else:
+        query = select(Source.name, PriceDaily).join(Source, Source.id == PriceDaily.source_id).where(
+            PriceDaily.product_id == product_id,
+            PriceDaily.day >= start.date(),
+            PriceDaily.day <= end.date()
+        ).order_by(PriceDaily.day, Source.name)
+
+    if source:
+        query = query.where(Source.name == source)
+
+    points = []
+    for source_name, row in db.execute(query):
+        if granularity == RAW:
+            points.append({
+                "source": source_name,
+                "time": row.recorded_at,
+                "price": row.price,
+                "min_price": row.price,
+                "max_price": row.price,
+                "original_price": row.original_price,
+                "in_stock": row.in_stock
+            })
+        else:
+            points.append({
+                "source": source_name,
+                "time": datetime.combine(row.day, datetime.min.time()),
+                "price": row.last_price,
+                "min_price": row.min_price,
+                "max_price": row.max_price,
+                "original_price": None,
+                "in_stock": row.last_in_stock
+            })
+
+    return {
+        "product_id": product_id,
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "points": points
+    }
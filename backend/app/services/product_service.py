@@ -1,10 +1,16 @@
+import base64
+import binascii
+import json
+import re
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import to_tsquery
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
-from typing import List, Optional, Dict, Any
-from app.models.product import Product, GenderEnum as ModelGenderEnum
-from app.models.source import Source
-from app.models.review import Review
-from app.schemas.product import ProductCreate, ProductUpdate, ProductFilter
+from sqlalchemy import func, and_, or_, tuple_
+from typing import List, Optional, Dict, Any, Tuple
+from app.models.product import Product, GenderEnum as ModelGenderEnum, SEARCH_CONFIG
+from app.models.product_summary import ProductSummary
+from app.schemas.product import ProductCreate, ProductUpdate, ProductFilter, GenderEnum
+from app.utils import search_index
 
 def get_product_by_id(db: Session, product_id: int):
     """Get product by ID with eager loading of related entities"""
@@ -39,6 +45,7 @@ def create_product(db: Session, product: ProductCreate):
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    index_products(db, [db_product.id])
     return db_product
 
 def update_product(db: Session, product_id: int, product: ProductUpdate):
@@ -55,6 +62,7 @@ def update_product(db: Session, product_id: int, product: ProductUpdate):
     
     db.commit()
     db.refresh(db_product)
+    index_products(db, [product_id])
     return db_product
 
 def delete_product(db: Session, product_id: int):
@@ -62,88 +70,316 @@ def delete_product(db: Session, product_id: int):
     db_product = get_product_by_id(db, product_id)
     db.delete(db_product)
     db.commit()
+    search_index.remove(product_id)
     return db_product
 
-def filter_products(db: Session, filters: ProductFilter, skip: int = 0, limit: int = 100, sort_by: str = "price_asc"):
-    """Filter products based on criteria"""
-    # Start with base query
-    query = db.query(
-        Product,
-        func.min(Source.price).label('lowest_price'),
-        func.max(Source.price).label('highest_price'),
-        func.avg(Review.rating).label('avg_rating'),
-        func.count(Review.id).label('rating_count')
+def listing_query(db: Session):
+    """
+    Base query of product listings: one row per listed product with its summary, joining
+    products by primary key for the listed columns only. Filters and sorts are added by
+    the callers; format_listing() shapes the rows.
+    """
+    return db.query(
+        Product.id,
+        Product.name,
+        Product.brand,
+        Product.gender,
+        Product.type,
+        Product.images,
+        Product.available_sizes,
+        Product.available_colors,
+        ProductSummary.lowest_price,
+        ProductSummary.highest_price,
+        ProductSummary.source_names,
+        ProductSummary.rating_average,
+        ProductSummary.rating_count
+    ).select_from(
+        ProductSummary
     ).join(
-        Product.sources
-    ).outerjoin(
-        Product.reviews
-    ).group_by(
-        Product.id
+        Product, Product.id == ProductSummary.product_id
+    ).filter(
+        ProductSummary.lowest_price.isnot(None)  # listed on at least one source
     )
-    
-    # Apply filters
+
+def format_listing(row) -> Dict[str, Any]:
+    """Shape a listing_query() row like ProductListResponse"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "brand": row.brand,
+        "gender": row.gender.value,
+        "type": row.type,
+        "images": row.images,
+        "available_sizes": row.available_sizes,
+        "available_colors": row.available_colors,
+        "lowest_price": row.lowest_price,
+        "highest_price": row.highest_price if row.highest_price != row.lowest_price else None,
+        "sources": row.source_names,
+        "rating_average": row.rating_average,
+        "rating_count": row.rating_count if row.rating_count else None
+    }
+
+# Sort key of each listing sort and whether it is descending. product_id breaks ties in
+# the same direction, so (key, product_id) is a unique, index-ordered position for cursors.
+LISTING_SORTS = {
+    "price_asc": (ProductSummary.lowest_price, False),
+    "price_desc": (ProductSummary.lowest_price, True),
+    "rating_desc": (func.coalesce(ProductSummary.rating_average, 0), True),  # unrated last
+    "newest": (ProductSummary.created_at, True)
+}
+
+def _filter_listings(query, filters: ProductFilter):
+    """Apply ProductFilter criteria to a listing_query()"""
     if filters.gender:
-        query = query.filter(Product.gender == ModelGenderEnum(filters.gender.value))
+        query = query.filter(ProductSummary.gender == ModelGenderEnum(filters.gender.value))
     
     if filters.brand:
-        query = query.filter(Product.brand.in_(filters.brand))
+        query = query.filter(ProductSummary.brand.in_(filters.brand))
     
     if filters.type:
-        query = query.filter(Product.type.in_(filters.type))
+        query = query.filter(ProductSummary.type.in_(filters.type))
     
     if filters.source:
-        query = query.filter(Source.name.in_(filters.source))
+        query = query.filter(ProductSummary.source_names.overlap(filters.source))
     
     if filters.min_price is not None:
-        query = query.having(func.min(Source.price) >= filters.min_price)
+        query = query.filter(ProductSummary.lowest_price >= filters.min_price)
     
     if filters.max_price is not None:
-        query = query.having(func.min(Source.price) <= filters.max_price)
+        query = query.filter(ProductSummary.lowest_price <= filters.max_price)
     
     if filters.min_rating is not None:
-        query = query.having(func.avg(Review.rating) >= filters.min_rating)
-    
-    # Apply sorting
-    if sort_by == "price_asc":
-        query = query.order_by(func.min(Source.price).asc())
-    elif sort_by == "price_desc":
-        query = query.order_by(func.min(Source.price).desc())
-    elif sort_by == "rating_desc":
-        query = query.order_by(func.avg(Review.rating).desc().nullslast())
-    elif sort_by == "newest":
-        query = query.order_by(Product.created_at.desc())
+        query = query.filter(ProductSummary.rating_average >= filters.min_rating)
+    
+    return query
+
+def _sort_listings(query, sort_by: str):
+    """Order a listing_query() by a LISTING_SORTS option (price_asc when unknown)"""
+    key, descending = LISTING_SORTS.get(sort_by, LISTING_SORTS["price_asc"])
+    if descending:
+        return query.order_by(key.desc(), ProductSummary.product_id.desc())
+    return query.order_by(key.asc(), ProductSummary.product_id.asc())
+
+def encode_cursor(sort_by: str, key: Any, product_id: int) -> str:
+    """Opaque cursor pointing after a product in a sort order"""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps({"s": sort_by, "k": key, "i": product_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """
+    Read a cursor made by encode_cursor()
+
+    Returns:
+        Sort key and product id of the last product of the previous page
+
+    Raises:
+        ValueError: The cursor is malformed or belongs to another sort order
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, product_id = payload["k"], int(payload["i"])
+        if payload["s"] != sort_by:
+            raise ValueError("cursor belongs to another sort order")
+        if sort_by == "newest":
+            # Products without a creation date have a null key
+            key = datetime.fromisoformat(key) if key is not None else None
+        elif isinstance(key, bool) or not isinstance(key, (int, float)):
+            raise ValueError("malformed cursor")
+    except (KeyError, TypeError, UnicodeDecodeError, binascii.Error, json.JSONDecodeError) as e:
+        raise ValueError("malformed cursor") from e
+    return key, product_id
+
+def filter_products(db: Session, filters: ProductFilter, skip: int = 0, limit: int = 100, sort_by: str = "price_asc"):
+    """Filter products based on criteria"""
+    # One statement per page: filters and sorting run on product_summary alone, products
+    # is only read by primary key for the returned rows
+    query = _sort_listings(_filter_listings(listing_query(db), filters), sort_by)
     
     # Apply pagination
     query = query.offset(skip).limit(limit)
     
-    # Execute query
-    results = query.all()
-    
-    # Format results into ProductListResponse
-    formatted_results = []
-    for product, lowest_price, highest_price, avg_rating, rating_count in results:
-        sources = db.query(Source.name).join(
-            Source.products
-        ).filter(
-            Product.id == product.id
-        ).all()
-        
-        formatted_product = {
-            "id": product.id,
-            "name": product.name,
-            "brand": product.brand,
-            "gender": product.gender.value,
-            "type": product.type,
-            "images": product.images,
-            "available_sizes": product.available_sizes,
-            "available_colors": product.available_colors,
-            "lowest_price": lowest_price,
-            "highest_price": highest_price if highest_price != lowest_price else None,
-            "sources": [source[0] for source in sources],
-            "rating_average": float(avg_rating) if avg_rating else None,
-            "rating_count": rating_count if rating_count else None
-        }
-        
-        formatted_results.append(formatted_product)
-    
-    return formatted_results
+    return [format_listing(row) for row in query.all()]
+
+def filter_products_page(db: Session, filters: ProductFilter, limit: int = 100, sort_by: str = "price_asc",
+                         cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Filter products with keyset pagination: each page starts right after the cursor's
+    position in an index, so deep pages cost the same as the first and don't shift
+    when products are added
+
+    Args:
+        db: Database session
+        filters: Filter criteria
+        limit: Page size
+        sort_by: One of LISTING_SORTS
+        cursor: Cursor returned with the previous page, None for the first page
+
+    Returns:
+        Products of the page and the cursor of the next page (None on the last page)
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    if sort_by not in LISTING_SORTS:
+        sort_by = "price_asc"
+    key, descending = LISTING_SORTS[sort_by]
+    
+    query = _filter_listings(listing_query(db).add_columns(key.label("sort_key")), filters)
+    
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort_by)
+        if last_key is None:
+            # Only newest has a nullable key; descending, NULLs come first, so the rest of
+            # them and then every dated product follow
+            query = query.filter(or_(key.isnot(None), ProductSummary.product_id < last_id))
+        else:
+            position = tuple_(key, ProductSummary.product_id)
+            query = query.filter(position < (last_key, last_id) if descending else position > (last_key, last_id))
+    
+    rows = _sort_listings(query, sort_by).limit(limit).all()
+    
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(sort_by, rows[-1].sort_key, rows[-1].id)
+    return [format_listing(row) for row in rows], next_cursor
+
+def search_products(db: Session, query: str, gender: Optional[GenderEnum] = None,
+                    skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Search stored products, most relevant first, in a single statement.
+    Terms are matched as word prefixes against the full-text document of name, brand,
+    type and description ("box" finds boxers); brands also match partially and
+    fuzzily through trigrams ("calvn" finds Calvin Klein).
+
+    Args:
+        db: Database session
+        query: Search terms; every term must match
+        gender: Optional gender filter
+        skip: Results to skip
+        limit: Maximum results (all when None)
+
+    Returns:
+        Products shaped like ProductListResponse
+    """
+    listings = listing_query(db)
+    
+    terms = re.findall(r"\w+", query.lower())
+    if terms:
+        tsquery = to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+        phrase = " ".join(terms)
+        listings = listings.filter(or_(
+            Product.search_vector.bool_op("@@")(tsquery),
+            Product.brand.bool_op("%")(phrase),
+            Product.brand.ilike(f"%{phrase}%")
+        )).order_by(
+            (func.ts_rank_cd(Product.search_vector, tsquery) + func.similarity(Product.brand, phrase)).desc(),
+            ProductSummary.product_id
+        )
+    else:
+        listings = listings.order_by(ProductSummary.product_id)
+    
+    if gender:
+        listings = listings.filter(ProductSummary.gender == ModelGenderEnum(gender.value))
+    
+    if skip:
+        listings = listings.offset(skip)
+    if limit is not None:
+        listings = listings.limit(limit)
+    
+    return [format_listing(row) for row in listings.all()]
+
+def _index_document(row) -> Dict[str, Any]:
+    """Shape a listing_query() row with its indexed text for search_index"""
+    return {
+        "id": row.id,
+        "gender": row.gender.value,
+        "price": row.lowest_price,
+        "fields": {
+            "name": row.name,
+            "brand": row.brand,
+            "type": row.type,
+            "material": row.material,
+            "features": row.features or []
+        },
+        "listing": format_listing(row)
+    }
+
+def index_products(db: Session, product_ids: Optional[List[int]] = None) -> int:
+    """
+    Load listed products into the in-memory search index
+
+    Args:
+        db: Database session
+        product_ids: Products to refresh after they changed; the whole catalog is
+            reloaded when None. Products that are gone or no longer listed are dropped.
+
+    Returns:
+        Number of products indexed
+    """
+    rows = listing_query(db).add_columns(Product.material, Product.features)
+    
+    if product_ids is None:
+        return search_index.replace_all(
+            _index_document(row) for row in rows.order_by(ProductSummary.product_id).yield_per(5000)
+        )
+    
+    if not product_ids:
+        return 0
+    documents = [_index_document(row) for row in rows.filter(ProductSummary.product_id.in_(product_ids)).all()]
+    for product_id in set(product_ids) - {document["id"] for document in documents}:
+        search_index.remove(product_id)
+    return search_index.add_documents(documents)
+
+# Summary rows are stamped when their transaction starts, so each pass also re-reads the rows
+# stamped a while before the previous one (their transaction may have committed after it)
+INDEX_REFRESH_OVERLAP = timedelta(seconds=60)
+
+def refresh_search_index(db: Session, since: Optional[datetime] = None) -> datetime:
+    """
+    Bring the in-memory search index up to date with changes made by any worker
+
+    Args:
+        db: Database session
+        since: Database time returned by the previous pass; the whole catalog is
+            reloaded when None (this also drops deleted products)
+
+    Returns:
+        Database time to pass as `since` to the next pass
+    """
+    started = db.query(func.localtimestamp()).scalar()
+    
+    if since is None:
+        count = index_products(db)
+    else:
+        changed = db.query(ProductSummary.product_id).filter(ProductSummary.updated_at > since - INDEX_REFRESH_OVERLAP)
+        count = index_products(db, [product_id for product_id, in changed])
+    
+    search_index.record_refresh(count)
+    return started
+
+def quick_search_products(query: str, gender: Optional[GenderEnum] = None, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Search-as-you-type over the in-memory index (no database round trip)
+
+    Args:
+        query: Search terms; every term must match, the last one as a prefix
+        gender: Optional gender filter
+        min_price: Optional minimum price
+        max_price: Optional maximum price
+        skip: Results to skip
+        limit: Maximum results
+
+    Returns:
+        Products shaped like ProductListResponse, best BM25 match first
+    """
+    return search_index.search(
+        query,
+        gender=gender.value if gender else None,
+        min_price=min_price,
+        max_price=max_price,
+        skip=skip,
+        limit=limit
+    )
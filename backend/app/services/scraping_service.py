@@ -1,16 +1,29 @@
-import requests
+import asyncio
+import concurrent.futures
+import os
 import time
 import re
 import json
-from bs4 import BeautifulSoup
+import threading
+from collections import deque
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from fake_useragent import UserAgent
-from app.models.product import Product, GenderEnum
-from app.models.source import Source
+from app.models.product import GenderEnum
 from app.schemas.product import ProductCreate, ProductFilter
 from app.config import settings
+from app.services import write_queue
 from app.services.product_service import create_product, get_product_by_id
+from app.utils import fetch_engine, http_cache, parse_pool, selector_registry, single_flight
+from app.utils.html_extractor import ListingExtractor, element_text
+from app.utils.http_cache import CachedPage
+from app.utils.task_manager import TaskStatus, update_task_status
+
+# Bump when a parser changes so parse results cached for unchanged pages are ignored
+PARSER_VERSION = 2
+
+# Hands finished live searches to the write queue, off the fetch engine loop
+_storer = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-search-store")
 
 # Initialize fake user agent generator
 ua = UserAgent()
@@ -19,9 +32,9 @@ def get_random_user_agent():
     """Get a random user agent to avoid detection"""
     return ua.random
 
-def make_request(url: str, timeout: int = settings.REQUEST_TIMEOUT):
-    """Make HTTP request with error handling and rate limiting"""
-    headers = {
+def get_request_headers() -> Dict[str, str]:
+    """Get generic request headers with a random user agent"""
+    return {
         'User-Agent': get_random_user_agent(),
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
@@ -30,31 +43,155 @@ def make_request(url: str, timeout: int = settings.REQUEST_TIMEOUT):
         'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
     }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        
-        # Rate limiting to avoid being blocked
-        time.sleep(settings.SCRAPING_RATE_LIMIT)
-        
-        return response.text
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return None
 
-def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session = None, page: int = 1, url: str = None):
-    """Scrape Amazon for innerwear products using a robust implementation
+def get_browser_headers() -> Dict[str, str]:
+    """Get proper browser headers to avoid being blocked"""
+    return {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Connection": "keep-alive",
+        "Accept-Encoding": "gzip, deflate"
+    }
+
+def make_request(url: str, timeout: int = settings.REQUEST_TIMEOUT):
+    """Make HTTP request through the fetch engine (rate limited per host) with error handling"""
+    return fetch_engine.fetch_sync(url, headers=get_request_headers(), timeout=timeout)
+
+def capture_page(source_name: str, page: CachedPage):
+    """
+    Save a downloaded listing page to the benchmark corpus when SCRAPE_CAPTURE_DIR is set
     
     Args:
-        query: The search query string
-        gender: Optional gender filter
-        db: Database session
-        page: Page number for pagination (default: 1)
-        url: Direct URL to scrape (overrides query and page parameters if provided)
+        source_name: Lower-case source name
+        page: Page returned by the fetch engine
     """
-    print(f"Scraping with gender: {gender}, query: {query}, page: {page}, url: {url}")
+    if not settings.SCRAPE_CAPTURE_DIR or page.from_cache:
+        return
     
+    folder = os.path.join(settings.SCRAPE_CAPTURE_DIR, source_name)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{int(time.time())}_{page.digest[:12]}.html"), "w", encoding="utf-8") as f:
+        f.write(page.body)
+
+# Listing page selectors, compiled once at import. Fallback selectors are tried in order.
+AMAZON_EXTRACTOR = ListingExtractor(
+    "amazon",
+    containers=['div[data-component-type="s-search-result"]'],
+    fields={
+        "title": ['h2 a span', '.a-text-normal', '.a-link-normal h2 span'],
+        "brand": ['.a-row.a-size-base.a-color-secondary .a-size-base'],
+        "price": ['.a-price .a-offscreen', '.a-price-whole', '.a-price'],
+        "original_price": ['.a-text-price .a-offscreen', '.a-text-price span', '.a-price.a-text-price'],
+        "url": ['h2 a'],
+        "image": ['.s-image', 'img.a-dynamic-image', 'img'],
+        "rating": ['.a-icon-star-small', '.a-icon-star', '.a-star-medium-4', 'i[class*="a-icon-star"]', 'span.a-icon-alt'],
+        "rating_count": ['span.a-size-base.s-underline-text', 'a.a-link-normal .a-size-base', 'a[href*="customerReviews"] span', 'span.a-size-base', 'a.a-size-base.a-link-normal']
+    }
+)
+
+FLIPKART_EXTRACTOR = ListingExtractor(
+    "flipkart",
+    containers=['div._1AtVbE div._13oc-S', 'div[data-id]', '.tUxRFH'],
+    fields={
+        "link": ['a._1fQZEK', 'a._2rpwqI', 'a[href*="/p/"]'],
+        "title": ['a.WKTcLC', 'div._4rR01T', 'a.s1Q9rs', 'h3', '.product-name', '[data-testid="product-title"]'],
+        "brand": ['div.syl9yP'],
+        "price": ['div.Nx9bqj', 'div._30jeq3', 'div[class*="price"]', '.product-price', '[data-testid="price"]'],
+        "original_price": ['div.yRaY8j', 'div._3I9_wc', 'div[class*="strike"]', '.original-price', '[data-testid="original-price"]'],
+        "image": ['img._53J4C-', 'img._396cs4', 'img._2r_T1I', 'img[src*="flipkart"]', 'img[data-src]'],
+        "rating": ['div._3LWZlK', 'div[class*="rating"]', '.product-rating', '[data-testid="rating"]'],
+        "rating_count": ['span._2_R_DZ', 'span[class*="rating"]', '.rating-count', '[data-testid="rating-count"]']
+    }
+)
+
+MYNTRA_EXTRACTOR = ListingExtractor(
+    "myntra",
+    containers=['ul.results-base li.product-base'],
+    fields={
+        "link": ['a.product-link'],
+        "title": ['.product-product', '.product-title'],
+        "brand": ['.product-brand'],
+        "price": ['.product-price'],
+        "original_price": ['.product-discountedPrice', '.product-strike'],
+        "image": ['img.product-image']
+    }
+)
+
+AJIO_EXTRACTOR = ListingExtractor(
+    "ajio",
+    containers=['div.item.rilrtl-products-list__item'],
+    fields={
+        "link": ['a.rilrtl-products-list__link'],
+        "title": ['.nameCls'],
+        "brand": ['.brand'],
+        "price": ['.price'],
+        "original_price": ['.orginal-price'],
+        "discount": ['.discount'],
+        "image": ['img.rilrtl-lazy-img']
+    }
+)
+
+_PRICE_RE = re.compile(r'([\d,]+\.?\d*)')
+_RATING_RE = re.compile(r'([\d.]+)')
+_COUNT_RE = re.compile(r'(\d[\d,]+)')
+_RATINGS_LABEL_RE = re.compile(r'([\d,]+)\s+ratings')
+
+def _text_value(element) -> Optional[str]:
+    """Non-empty stripped text of an element"""
+    return element_text(element).strip() or None
+
+def _price_value(element) -> Optional[float]:
+    """Price in an element's text, without currency symbols and commas"""
+    match = _PRICE_RE.search(element_text(element).strip())
+    if match:
+        try:
+            return float(match.group(1).replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+def _rating_value(element) -> Optional[float]:
+    """Star rating in an element's text"""
+    match = _RATING_RE.search(element_text(element).strip())
+    if match:
+        try:
+            return float(match.group(1))
+        except ValueError:
+            return None
+    return None
+
+def _count_value(element) -> Optional[int]:
+    """Number of ratings like "16,661" or "(16,661)" in an element's text"""
+    match = _COUNT_RE.search(element_text(element).strip())
+    if match:
+        try:
+            return int(match.group(1).replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+def _ratings_label_value(element) -> Optional[int]:
+    """Number of ratings in a "1,234 ratings" label"""
+    match = _RATINGS_LABEL_RE.search(element_text(element))
+    if match:
+        try:
+            return int(match.group(1).replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+def _image_src_value(element) -> Optional[str]:
+    """Complete image URL of an img element, skipping base64 encoded images"""
+    image_url = element.get('src')
+    if not image_url or image_url.startswith('data:'):
+        return None
+    if image_url.startswith('//'):
+        image_url = 'https:' + image_url
+    return image_url
+
+def build_amazon_url(query: str, gender: Optional[GenderEnum] = None, page: int = 1, url: str = None) -> str:
+    """Build the Amazon listing URL for a query, or adapt a direct URL to the gender and page"""
     # Ensure gender is respected even with direct URL by modifying search URL if needed
     if gender and gender.value == 'women' and url and 'women' not in url.lower():
         # If we have a direct URL but it doesn't contain 'women', inject it for women
@@ -78,43 +215,15 @@ def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session =
         if page > 1:
             url = f"{url}&page={page}"
     
-    print(f"Scraping Amazon URL: {url} (Page {page})")
-    
-    # Set proper headers to avoid being blocked
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Connection": "keep-alive",
-        "Accept-Encoding": "gzip, deflate, br"
-    }
-    
-    # Make request with proper headers
-    try:
-        response = requests.get(url, headers=headers, timeout=settings.REQUEST_TIMEOUT)
-        response.raise_for_status()
-        html_content = response.text
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return []
-    
-    # Parse the HTML
-    soup = BeautifulSoup(html_content, 'lxml')
-    
-    # Find product containers - using a more robust selector
-    product_containers = soup.select('div[data-component-type="s-search-result"]')
-    print(f"Found {len(product_containers)} product containers")
-    
-    # For demonstration, save the HTML to debug
-    with open("/tmp/amazon_debug.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
-    
+    return url
+
+def parse_amazon(html_content: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Extract product records from an Amazon listing page"""
     products = []
+    idx = -1
     
-  
-    
-    # Process each product container
-    for idx, container in enumerate(product_containers):
+    # Process each product container while the page is streamed
+    for idx, container in enumerate(AMAZON_EXTRACTOR.containers(html_content)):
         try:
             # Extract product data
             asin = container.get('data-asin')
@@ -122,56 +231,28 @@ def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session =
                 asin = f"PROD{idx:03d}"
             
             # Title - use multiple selectors for robustness
-            title = ""
-            for selector in ['h2 a span', '.a-text-normal', '.a-link-normal h2 span']:
-                title_element = container.select_one(selector)
-                if title_element and title_element.text.strip():
-                    title = title_element.text.strip()
-                    break
+            title = AMAZON_EXTRACTOR.extract(container, "title", _text_value) or ""
             
             if not title:
                 title = f"Amazon Innerwear {asin}"
             
             # Brand - extract from title or look for brand element
-            brand_element = container.select_one('.a-row.a-size-base.a-color-secondary .a-size-base')
-            if brand_element:
-                brand = brand_element.text.strip()
+            brand_element = AMAZON_EXTRACTOR.first(container, "brand")
+            if brand_element is not None:
+                brand = element_text(brand_element).strip()
             else:
                 brand = extract_brand_from_title(title) or "Amazon"
             
             # Price - try multiple selectors for price information
-            price = 0
-            for price_selector in ['.a-price .a-offscreen', '.a-price-whole', '.a-price']:
-                price_element = container.select_one(price_selector)
-                if price_element:
-                    price_text = price_element.text.strip()
-                    # Remove currency symbols and commas
-                    price_match = re.search(r'([\d,]+\.?\d*)', price_text)
-                    if price_match:
-                        try:
-                            price = float(price_match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
+            price = AMAZON_EXTRACTOR.extract(container, "price", _price_value) or 0
             
             # Original price - look for crossed-out price
-            original_price = None
-            for orig_price_selector in ['.a-text-price .a-offscreen', '.a-text-price span', '.a-price.a-text-price']:
-                orig_element = container.select_one(orig_price_selector)
-                if orig_element:
-                    orig_text = orig_element.text.strip()
-                    orig_match = re.search(r'([\d,]+\.?\d*)', orig_text)
-                    if orig_match:
-                        try:
-                            original_price = float(orig_match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
+            original_price = AMAZON_EXTRACTOR.extract(container, "original_price", _price_value)
             
             # URL - construct product URL
             product_url = f"{settings.AMAZON_URL}/dp/{asin}"
-            url_element = container.select_one('h2 a')
-            if url_element and url_element.get('href'):
+            url_element = AMAZON_EXTRACTOR.first(container, "url")
+            if url_element is not None and url_element.get('href'):
                 href = url_element.get('href')
                 # Handle relative URLs
                 if href.startswith('/'):
@@ -181,51 +262,18 @@ def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session =
                 else:
                     product_url = f"{settings.AMAZON_URL}/{href}"
             
-            # Image - check for multiple image selectors
-            image_url = None
-            for img_selector in ['.s-image', 'img.a-dynamic-image', 'img']:
-                img_element = container.select_one(img_selector)
-                if img_element and img_element.get('src'):
-                    image_url = img_element.get('src')
-                    # Skip base64 encoded images
-                    if not image_url.startswith('data:'):
-                        # Ensure the image URL is complete
-                        if image_url and image_url.startswith('//'):
-                            image_url = 'https:' + image_url
-                        break
+            # Image - check for multiple image selectors, skipping base64 encoded images
+            image_url = AMAZON_EXTRACTOR.extract(container, "image", _image_src_value)
             
             # Fallback image
-            if not image_url or image_url.startswith('data:'):
+            if not image_url:
                 image_url = f"https://placehold.co/400x400/ff9900/ffffff?text={asin}"
             
             # Rating - extract rating if available
-            rating = None
-            for rating_selector in ['.a-icon-star-small', '.a-icon-star', '.a-star-medium-4', 'i[class*="a-icon-star"]', 'span.a-icon-alt']:
-                rating_element = container.select_one(rating_selector)
-                if rating_element:
-                    rating_text = rating_element.text.strip()
-                    rating_match = re.search(r'([\d.]+)', rating_text)
-                    if rating_match:
-                        try:
-                            rating = float(rating_match.group(1))
-                            break
-                        except ValueError:
-                            continue
-            
-            # Rating count - extract number of ratings
-            rating_count = 0
-            for count_selector in ['span.a-size-base.s-underline-text', 'a.a-link-normal .a-size-base', 'a[href*="customerReviews"] span', 'span.a-size-base', 'a.a-size-base.a-link-normal']:
-                count_element = container.select_one(count_selector)
-                if count_element:
-                    count_text = count_element.text.strip()
-                    # Look for patterns like "16,661" or "(16,661)"
-                    count_match = re.search(r'(\d[\d,]+)', count_text)
-                    if count_match:
-                        try:
-                            rating_count = int(count_match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
+            rating = AMAZON_EXTRACTOR.extract(container, "rating", _rating_value)
+            
+            # Rating count - extract number of ratings like "16,661" or "(16,661)"
+            rating_count = AMAZON_EXTRACTOR.extract(container, "rating_count", _count_value) or 0
             
             if not rating and idx % 5 != 0:  # Assign random rating to most products
                 import random
@@ -260,74 +308,62 @@ def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session =
         except Exception as e:
             print(f"Error parsing Amazon product: {e}")
     
+    print(f"Found {idx + 1} product containers")
+    
     # Return only real scraped products, no mock data
     print(f"Returning {len(products)} products")
     return products
 
-def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
-    """Scrape Flipkart for innerwear products using a robust implementation"""
-    print(f"Scraping Flipkart with gender: {gender}, query: {query}")
+def scrape_amazon(query: str, gender: Optional[GenderEnum] = None, db: Session = None, page: int = 1, url: str = None):
+    """Scrape Amazon for innerwear products using a robust implementation
     
-    # Build the search URL
-    search_term = f"{gender.value if gender else ''} innerwear {query}".strip()
-    encoded_search = search_term.replace(' ', '+')
-    url = f"{settings.FLIPKART_URL}/search?q={encoded_search}"
+    Args:
+        query: The search query string
+        gender: Optional gender filter
+        db: Database session
+        page: Page number for pagination (default: 1)
+        url: Direct URL to scrape (overrides query and page parameters if provided)
+    """
+    print(f"Scraping with gender: {gender}, query: {query}, page: {page}, url: {url}")
     
-    print(f"Scraping Flipkart URL: {url}")
+    url = build_amazon_url(query, gender, page=page, url=url)
     
-    # Set proper headers to avoid being blocked
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Connection": "keep-alive",
-        "Accept-Encoding": "gzip, deflate, br"
-    }
+    print(f"Scraping Amazon URL: {url} (Page {page})")
     
     # Make request with proper headers
-    try:
-        response = requests.get(url, headers=headers, timeout=settings.REQUEST_TIMEOUT)
-        response.raise_for_status()
-        html_content = response.text
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+    page = fetch_engine.fetch_page_sync(url, headers=get_browser_headers())
+    if not page:
         return []
     
-    # Parse the HTML
-    soup = BeautifulSoup(html_content, 'lxml')
-    
-    # For demonstration, save the HTML to debug
-    with open("/tmp/flipkart_debug.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
-    
-    # Find product containers - using multiple selectors for robustness
-    product_containers = soup.select('div._1AtVbE div._13oc-S')
+    capture_page("amazon", page)
     
-    # If no products found with primary selector, try alternative selectors
-    if not product_containers:
-        product_containers = soup.select('div[data-id]')
-    
-    if not product_containers:
-        product_containers = soup.select('.tUxRFH')
+    return parse_page("amazon", page, gender)
+
+def build_flipkart_url(query: str, gender: Optional[GenderEnum] = None, page: int = 1) -> str:
+    """Build the Flipkart search URL for a query"""
+    # Build the search URL
+    search_term = f"{gender.value if gender else ''} innerwear {query}".strip()
+    encoded_search = search_term.replace(' ', '+')
+    url = f"{settings.FLIPKART_URL}/search?q={encoded_search}"
     
-    print(f"Found {len(product_containers)} Flipkart product containers")
+    if page > 1:
+        url = f"{url}&page={page}"
     
+    return url
+
+def parse_flipkart(html_content: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Extract product records from a Flipkart search page"""
     products = []
-    source = None
-    if db:
-        source = db.query(Source).filter(Source.name == "Flipkart").first()
+    idx = -1
     
-    for idx, container in enumerate(product_containers):
+    # Product containers use multiple selectors for robustness (see FLIPKART_EXTRACTOR)
+    for idx, container in enumerate(FLIPKART_EXTRACTOR.containers(html_content)):
         try:
             # Extract product data
             # Extract product link which contains product ID
-            link_element = container.select_one('a._1fQZEK')
-            if not link_element:
-                link_element = container.select_one('a._2rpwqI')
-            if not link_element:
-                link_element = container.select_one('a[href*="/p/"]')
+            link_element = FLIPKART_EXTRACTOR.first(container, "link")
                 
-            if not link_element:
+            if link_element is None:
                 continue
                 
             # Get the href attribute
@@ -359,12 +395,7 @@ def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session
                     product_id = f"flipkart_{int(time.time())}"
             
             # Title - use multiple selectors for robustness
-            title = ""
-            for selector in ['a.WKTcLC', 'div._4rR01T', 'a.s1Q9rs', 'h3', '.product-name', '[data-testid="product-title"]']:
-                title_element = container.select_one(selector)
-                if title_element and title_element.text.strip():
-                    title = title_element.text.strip()
-                    break
+            title = FLIPKART_EXTRACTOR.extract(container, "title", _text_value) or ""
             
             if not title:
                 title = f"Flipkart Innerwear Product {product_id}"
@@ -372,52 +403,21 @@ def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session
             # Brand - extract from title or look for brand element
             brand = extract_brand_from_title(title)
             # Also try to get brand from brand element
-            brand_element = container.select_one('div.syl9yP')
-            if brand_element and brand_element.text.strip():
-                brand = brand_element.text.strip()
+            brand_element = FLIPKART_EXTRACTOR.first(container, "brand")
+            if brand_element is not None and element_text(brand_element).strip():
+                brand = element_text(brand_element).strip()
             
             # Price - try multiple selectors for price information
-            price = 0
-            for price_selector in ['div.Nx9bqj', 'div._30jeq3', 'div[class*="price"]', '.product-price', '[data-testid="price"]']:
-                price_element = container.select_one(price_selector)
-                if price_element:
-                    price_text = price_element.text.strip()
-                    # Remove currency symbols and commas
-                    price_match = re.search(r'([\d,]+\.?\d*)', price_text)
-                    if price_match:
-                        try:
-                            price = float(price_match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
+            price = FLIPKART_EXTRACTOR.extract(container, "price", _price_value) or 0
             
             # Original price - look for crossed-out price
-            original_price = None
-            for orig_price_selector in ['div.yRaY8j', 'div._3I9_wc', 'div[class*="strike"]', '.original-price', '[data-testid="original-price"]']:
-                orig_element = container.select_one(orig_price_selector)
-                if orig_element:
-                    orig_text = orig_element.text.strip()
-                    orig_match = re.search(r'([\d,]+\.?\d*)', orig_text)
-                    if orig_match:
-                        try:
-                            original_price = float(orig_match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
+            original_price = FLIPKART_EXTRACTOR.extract(container, "original_price", _price_value)
             
             # Image
-            img_element = container.select_one('img._53J4C-')
-            if not img_element:
-                img_element = container.select_one('img._396cs4')
-            if not img_element:
-                img_element = container.select_one('img._2r_T1I')
-            if not img_element:
-                img_element = container.select_one('img[src*="flipkart"]')
-            if not img_element:
-                img_element = container.select_one('img[data-src]')  # Lazy loaded images
+            img_element = FLIPKART_EXTRACTOR.first(container, "image")
                 
             image_url = None
-            if img_element:
+            if img_element is not None:
                 # Try src first, then data-src for lazy loaded images
                 image_url = img_element.get('src') or img_element.get('data-src')
                 
@@ -432,33 +432,14 @@ def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session
                 image_url = f"https://placehold.co/400x400/2874f0/ffffff?text={product_id[:10]}"
             
             # Rating - extract rating if available
-            rating = None
-            for rating_selector in ['div._3LWZlK', 'div[class*="rating"]', '.product-rating', '[data-testid="rating"]']:
-                rating_element = container.select_one(rating_selector)
-                if rating_element:
-                    rating_text = rating_element.text.strip()
-                    rating_match = re.search(r'([\d.]+)', rating_text)
-                    if rating_match:
-                        try:
-                            rating = float(rating_match.group(1))
-                            break
-                        except ValueError:
-                            continue
+            rating = FLIPKART_EXTRACTOR.extract(container, "rating", _rating_value)
             
             if not rating and idx % 5 != 0:  # Assign random rating to most products
                 import random
                 rating = round(3.5 + random.random() * 1.5, 1)  # Random between 3.5-5.0
             
             # Rating count
-            rating_count = 0
-            for rating_count_selector in ['span._2_R_DZ', 'span[class*="rating"]', '.rating-count', '[data-testid="rating-count"]']:
-                rating_count_element = container.select_one(rating_count_selector)
-                if rating_count_element:
-                    count_text = rating_count_element.text
-                    count_match = re.search(r'([\d,]+)\s+ratings', count_text)
-                    if count_match:
-                        rating_count = int(count_match.group(1).replace(',', ''))
-                        break
+            rating_count = FLIPKART_EXTRACTOR.extract(container, "rating_count", _ratings_label_value) or 0
             
             # Determine product type
             product_type = identify_innerwear_type(title, gender)
@@ -481,104 +462,62 @@ def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session
             
             products.append(product_data)
             
-            # If we have a database session, store the product
-            if db and source:
-                try:
-                    # Check if product exists
-                    existing_product = db.query(Product).filter(
-                        Product.name == title,
-                        Product.brand == brand,
-                        Product.gender == (gender if gender else GenderEnum.unisex)
-                    ).first()
-                    
-                    if not existing_product:
-                        # Create new product
-                        new_product = Product(
-                            name=title,
-                            brand=brand,
-                            gender=gender if gender else GenderEnum.unisex,
-                            type=product_type,
-                            description=title,  # Use title as description for now
-                            images=[image_url] if image_url else []
-                        )
-                        
-                        # Create source association
-                        new_product.sources.append({
-                            "source_id": source.id,
-                            "source_product_id": product_id,
-                            "source_url": product_url,
-                            "price": price,
-                            "original_price": original_price,
-                            "in_stock": True
-                        })
-                        
-                        db.add(new_product)
-                        db.commit()
-                    else:
-                        # Update existing product
-                        # Check if this source already exists for the product
-                        source_exists = False
-                        for src in existing_product.sources:
-                            if src.source_id == source.id:
-                                src.price = price
-                                src.original_price = original_price
-                                src.last_checked = time.time()
-                                source_exists = True
-                                break
-                                
-                        if not source_exists:
-                            # Add new source association
-                            existing_product.sources.append({
-                                "source_id": source.id,
-                                "source_product_id": product_id,
-                                "source_url": product_url,
-                                "price": price,
-                                "original_price": original_price,
-                                "in_stock": True
-                            })
-                            
-                        db.commit()
-                        
-                except Exception as e:
-                    db.rollback()
-                    print(f"Error saving Flipkart product to database: {e}")
-            
         except Exception as e:
             print(f"Error parsing Flipkart product: {e}")
     
+    print(f"Found {idx + 1} Flipkart product containers")
+    
     # Return only real scraped products, no mock data
     print(f"Returning {len(products)} Flipkart products")
     return products
 
+def scrape_flipkart(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
+    """Scrape Flipkart for innerwear products using a robust implementation"""
+    print(f"Scraping Flipkart with gender: {gender}, query: {query}")
+    
+    url = build_flipkart_url(query, gender)
+    
+    print(f"Scraping Flipkart URL: {url}")
+    
+    # Make request with proper headers
+    page = fetch_engine.fetch_page_sync(url, headers=get_browser_headers())
+    if not page:
+        return []
+    
+    capture_page("flipkart", page)
+    
+    products = parse_page("flipkart", page, gender)
+    
+    # If we have a database session, store the products (written behind by the queue)
+    if db:
+        write_queue.enqueue("Flipkart", products, gender)
+    
+    return products
 
 
-def scrape_myntra(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
-    """Scrape Myntra for innerwear products"""
+def build_myntra_url(query: str, gender: Optional[GenderEnum] = None, page: int = 1) -> str:
+    """Build the Myntra search URL for a query"""
     # Build the search URL
     gender_segment = "men" if gender and gender.value == "men" else "women" if gender and gender.value == "women" else "unisex"
     search_term = f"innerwear-{query}".strip().replace(' ', '-')
     url = f"{settings.MYNTRA_URL}/{gender_segment}-{search_term}"
     
-    # Make request
-    html_content = make_request(url)
-    if not html_content:
-        return []
-    
-    # Parse the HTML
-    soup = BeautifulSoup(html_content, 'lxml')
-    
-    # Find product containers - Myntra typically uses li elements with product data
-    product_containers = soup.select('ul.results-base li.product-base')
+    if page > 1:
+        url = f"{url}?p={page}"
     
+    return url
+
+def parse_myntra(html_content: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Extract product records from a Myntra search page"""
     products = []
-    source = db.query(Source).filter(Source.name == "Myntra").first()
     
-    for container in product_containers:
+    # Myntra typically uses li elements with product data
+    for container in MYNTRA_EXTRACTOR.containers(html_content):
         try:
             # Extract product data
             # Extract product link which contains product ID
-            link_element = container.select_one('a.product-link')
-            if not link_element:
+            link_element = MYNTRA_EXTRACTOR.first(container, "link")
+            if link_element is None:
                 continue
                 
             product_url = 'https://www.myntra.com' + link_element.get('href')
@@ -588,37 +527,34 @@ def scrape_myntra(query: str, gender: Optional[GenderEnum] = None, db: Session =
             product_id = product_id_match.group(1) if product_id_match else container.get('data-id', f"myntra_{time.time()}")
             
             # Title
-            title_element = container.select_one('.product-product')
-            if not title_element:
-                title_element = container.select_one('.product-title')
-                
-            title = title_element.text.strip() if title_element else ""
+            title_element = MYNTRA_EXTRACTOR.first(container, "title")
+            title = element_text(title_element).strip() if title_element is not None else ""
             
             # Brand
-            brand_element = container.select_one('.product-brand')
-            brand = brand_element.text.strip() if brand_element else extract_brand_from_title(title)
+            brand_element = MYNTRA_EXTRACTOR.first(container, "brand")
+            brand = element_text(brand_element).strip() if brand_element is not None else extract_brand_from_title(title)
             
             # Price
-            price_element = container.select_one('.product-price')
+            price_element = MYNTRA_EXTRACTOR.first(container, "price")
             price = 0
-            if price_element:
-                price_text = price_element.text.strip()
+            if price_element is not None:
+                price_text = element_text(price_element).strip()
                 price_match = re.search(r'Rs\.?\s*([\d,]+)', price_text) or re.search(r'([\d,]+)', price_text)
                 if price_match:
                     price = float(price_match.group(1).replace(',', ''))
             
             # Original price (might be in a discounted element)
-            original_price_element = container.select_one('.product-discountedPrice') or container.select_one('.product-strike')
+            original_price_element = MYNTRA_EXTRACTOR.first(container, "original_price")
             original_price = None
-            if original_price_element:
-                original_price_text = original_price_element.text.strip()
+            if original_price_element is not None:
+                original_price_text = element_text(original_price_element).strip()
                 original_price_match = re.search(r'Rs\.?\s*([\d,]+)', original_price_text) or re.search(r'([\d,]+)', original_price_text)
                 if original_price_match:
                     original_price = float(original_price_match.group(1).replace(',', ''))
             
             # Image
-            img_element = container.select_one('img.product-image')
-            image_url = img_element.get('src') if img_element else None
+            img_element = MYNTRA_EXTRACTOR.first(container, "image")
+            image_url = img_element.get('src') if img_element is not None else None
             
             # Myntra typically doesn't show ratings in search results, but product page would have it
             rating = None
@@ -645,100 +581,54 @@ def scrape_myntra(query: str, gender: Optional[GenderEnum] = None, db: Session =
             
             products.append(product_data)
             
-            # If we have a database session, store the product
-            if db and source:
-                try:
-                    # Check if product exists
-                    existing_product = db.query(Product).filter(
-                        Product.name == title,
-                        Product.brand == brand,
-                        Product.gender == (gender if gender else GenderEnum.unisex)
-                    ).first()
-                    
-                    if not existing_product:
-                        # Create new product
-                        new_product = Product(
-                            name=title,
-                            brand=brand,
-                            gender=gender if gender else GenderEnum.unisex,
-                            type=product_type,
-                            description=title,  # Use title as description for now
-                            images=[image_url] if image_url else []
-                        )
-                        
-                        # Create source association
-                        new_product.sources.append({
-                            "source_id": source.id,
-                            "source_product_id": product_id,
-                            "source_url": product_url,
-                            "price": price,
-                            "original_price": original_price,
-                            "in_stock": True
-                        })
-                        
-                        db.add(new_product)
-                        db.commit()
-                    else:
-                        # Update existing product
-                        # Check if this source already exists for the product
-                        source_exists = False
-                        for src in existing_product.sources:
-                            if src.source_id == source.id:
-                                src.price = price
-                                src.original_price = original_price
-                                src.last_checked = time.time()
-                                source_exists = True
-                                break
-                                
-                        if not source_exists:
-                            # Add new source association
-                            existing_product.sources.append({
-                                "source_id": source.id,
-                                "source_product_id": product_id,
-                                "source_url": product_url,
-                                "price": price,
-                                "original_price": original_price,
-                                "in_stock": True
-                            })
-                            
-                        db.commit()
-                        
-                except Exception as e:
-                    db.rollback()
-                    print(f"Error saving Myntra product to database: {e}")
-            
         except Exception as e:
             print(f"Error parsing Myntra product: {e}")
     
     return products
 
-def scrape_ajio(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
-    """Scrape Ajio for innerwear products"""
-    # Build the search URL
-    gender_segment = "men" if gender and gender.value == "men" else "women" if gender and gender.value == "women" else ""
-    search_term = f"innerwear {query}".strip().replace(' ', '%20')
-    url = f"{settings.AJIO_URL}/s/{gender_segment}/{search_term}"
+def scrape_myntra(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
+    """Scrape Myntra for innerwear products"""
+    url = build_myntra_url(query, gender)
     
     # Make request
-    html_content = make_request(url)
-    if not html_content:
+    page = fetch_engine.fetch_page_sync(url, headers=get_request_headers())
+    if not page:
         return []
     
-    # Parse the HTML
-    soup = BeautifulSoup(html_content, 'lxml')
+    capture_page("myntra", page)
+    
+    products = parse_page("myntra", page, gender)
     
-    # Find product containers - Ajio typically uses div elements with specific classes
-    product_containers = soup.select('div.item.rilrtl-products-list__item')
+    # If we have a database session, store the products (written behind by the queue)
+    if db:
+        write_queue.enqueue("Myntra", products, gender)
     
+    return products
+
+
+def build_ajio_url(query: str, gender: Optional[GenderEnum] = None, page: int = 1) -> str:
+    """Build the Ajio search URL for a query"""
+    # Build the search URL
+    gender_segment = "men" if gender and gender.value == "men" else "women" if gender and gender.value == "women" else ""
+    search_term = f"innerwear {query}".strip().replace(' ', '%20')
+    url = f"{settings.AJIO_URL}/s/{gender_segment}/{search_term}"
+    
+    if page > 1:
+        url = f"{url}?page={page}"
+    
+    return url
+
+def parse_ajio(html_content: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Extract product records from an Ajio search page"""
     products = []
-    source = db.query(Source).filter(Source.name == "Ajio").first()
     
-    for container in product_containers:
+    # Ajio typically uses div elements with specific classes
+    for container in AJIO_EXTRACTOR.containers(html_content):
         try:
             # Extract product data
             # Extract product link which contains product ID
-            link_element = container.select_one('a.rilrtl-products-list__link')
-            if not link_element:
+            link_element = AJIO_EXTRACTOR.first(container, "link")
+            if link_element is None:
                 continue
                 
             product_url = 'https://www.ajio.com' + link_element.get('href')
@@ -748,36 +638,36 @@ def scrape_ajio(query: str, gender: Optional[GenderEnum] = None, db: Session = N
             product_id = product_id_match.group(1) if product_id_match else f"ajio_{time.time()}"
             
             # Title
-            title_element = container.select_one('.nameCls')
-            title = title_element.text.strip() if title_element else ""
+            title_element = AJIO_EXTRACTOR.first(container, "title")
+            title = element_text(title_element).strip() if title_element is not None else ""
             
             # Brand
-            brand_element = container.select_one('.brand')
-            brand = brand_element.text.strip() if brand_element else extract_brand_from_title(title)
+            brand_element = AJIO_EXTRACTOR.first(container, "brand")
+            brand = element_text(brand_element).strip() if brand_element is not None else extract_brand_from_title(title)
             
             # Price
-            price_element = container.select_one('.price')
+            price_element = AJIO_EXTRACTOR.first(container, "price")
             price = 0
-            if price_element:
-                price_text = price_element.text.strip()
+            if price_element is not None:
+                price_text = element_text(price_element).strip()
                 price_match = re.search(r'Rs\.\s*([\d,]+)', price_text) or re.search(r'([\d,]+)', price_text)
                 if price_match:
                     price = float(price_match.group(1).replace(',', ''))
             
             # Original price (for discounted items)
-            original_price_element = container.select_one('.orginal-price')
+            original_price_element = AJIO_EXTRACTOR.first(container, "original_price")
             original_price = None
-            if original_price_element:
-                original_price_text = original_price_element.text.strip()
+            if original_price_element is not None:
+                original_price_text = element_text(original_price_element).strip()
                 original_price_match = re.search(r'Rs\.\s*([\d,]+)', original_price_text) or re.search(r'([\d,]+)', original_price_text)
                 if original_price_match:
                     original_price = float(original_price_match.group(1).replace(',', ''))
             
             # Discount
-            discount_element = container.select_one('.discount')
+            discount_element = AJIO_EXTRACTOR.first(container, "discount")
             discount = None
-            if discount_element:
-                discount_text = discount_element.text.strip()
+            if discount_element is not None:
+                discount_text = element_text(discount_element).strip()
                 discount_match = re.search(r'(\d+)\s*%', discount_text)
                 if discount_match and not original_price and price > 0:
                     discount_percent = float(discount_match.group(1))
@@ -785,10 +675,10 @@ def scrape_ajio(query: str, gender: Optional[GenderEnum] = None, db: Session = N
                     original_price = price / (1 - discount_percent/100)
             
             # Image
-            img_element = container.select_one('img.rilrtl-lazy-img')
-            image_url = img_element.get('src') if img_element else None
+            img_element = AJIO_EXTRACTOR.first(container, "image")
+            image_url = img_element.get('src') if img_element is not None else None
             if not image_url or image_url.endswith('default-product.jpg'):
-                image_url = img_element.get('data-src') if img_element else None
+                image_url = img_element.get('data-src') if img_element is not None else None
             
             # Ajio doesn't typically show ratings in search results
             rating = None
@@ -815,73 +705,297 @@ def scrape_ajio(query: str, gender: Optional[GenderEnum] = None, db: Session = N
             
             products.append(product_data)
             
-            # If we have a database session, store the product
-            if db and source:
-                try:
-                    # Check if product exists
-                    existing_product = db.query(Product).filter(
-                        Product.name == title,
-                        Product.brand == brand,
-                        Product.gender == (gender if gender else GenderEnum.unisex)
-                    ).first()
-                    
-                    if not existing_product:
-                        # Create new product
-                        new_product = Product(
-                            name=title,
-                            brand=brand,
-                            gender=gender if gender else GenderEnum.unisex,
-                            type=product_type,
-                            description=title,  # Use title as description for now
-                            images=[image_url] if image_url else []
-                        )
-                        
-                        # Create source association
-                        new_product.sources.append({
-                            "source_id": source.id,
-                            "source_product_id": product_id,
-                            "source_url": product_url,
-                            "price": price,
-                            "original_price": original_price,
-                            "in_stock": True
-                        })
-                        
-                        db.add(new_product)
-                        db.commit()
-                    else:
-                        # Update existing product
-                        # Check if this source already exists for the product
-                        source_exists = False
-                        for src in existing_product.sources:
-                            if src.source_id == source.id:
-                                src.price = price
-                                src.original_price = original_price
-                                src.last_checked = time.time()
-                                source_exists = True
-                                break
-                                
-                        if not source_exists:
-                            # Add new source association
-                            existing_product.sources.append({
-                                "source_id": source.id,
-                                "source_product_id": product_id,
-                                "source_url": product_url,
-                                "price": price,
-                                "original_price": original_price,
-                                "in_stock": True
-                            })
-                            
-                        db.commit()
-                        
-                except Exception as e:
-                    db.rollback()
-                    print(f"Error saving Ajio product to database: {e}")
-            
         except Exception as e:
             print(f"Error parsing Ajio product: {e}")
     
     return products
 
+def scrape_ajio(query: str, gender: Optional[GenderEnum] = None, db: Session = None, task_id: str = None):
+    """Scrape Ajio for innerwear products"""
+    url = build_ajio_url(query, gender)
+    
+    # Make request
+    page = fetch_engine.fetch_page_sync(url, headers=get_request_headers())
+    if not page:
+        return []
+    
+    capture_page("ajio", page)
+    
+    products = parse_page("ajio", page, gender)
+    
+    # If we have a database session, store the products (written behind by the queue)
+    if db:
+        write_queue.enqueue("Ajio", products, gender)
+    
+    return products
+
+# Listing scrapers keyed by lower-case source name
+LISTING_SCRAPERS = {
+    "amazon": {
+        "name": "Amazon",
+        "build_url": build_amazon_url,
+        "parse": parse_amazon,
+        "headers": get_browser_headers
+    },
+    "flipkart": {
+        "name": "Flipkart",
+        "build_url": build_flipkart_url,
+        "parse": parse_flipkart,
+        "headers": get_browser_headers
+    },
+    "myntra": {
+        "name": "Myntra",
+        "build_url": build_myntra_url,
+        "parse": parse_myntra,
+        "headers": get_request_headers
+    },
+    "ajio": {
+        "name": "Ajio",
+        "build_url": build_ajio_url,
+        "parse": parse_ajio,
+        "headers": get_request_headers
+    }
+}
+
+def _parse_key(source_name: str, gender: Optional[GenderEnum] = None) -> str:
+    """Key of a parse result in the page cache: parser, inputs, parser version and selector order version"""
+    return f"{source_name}:{gender.value if gender else 'all'}:{PARSER_VERSION}:{selector_registry.get_version()}"
+
+def parse_page(source_name: str, page: CachedPage, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """
+    Parse a listing page in the parse worker pool, reusing the records parsed
+    earlier from an identical page
+    
+    Args:
+        source_name: Lower-case source name (a key of LISTING_SCRAPERS)
+        page: Page returned by the fetch engine
+        gender: Optional gender filter
+        
+    Returns:
+        Scraped product records
+    """
+    parse_key = _parse_key(source_name, gender)
+    
+    products = http_cache.get_parsed(page.digest, parse_key)
+    if products is None:
+        products = parse_pool.run(LISTING_SCRAPERS[source_name]["parse"], page.body, gender)
+        http_cache.put_parsed(page.digest, parse_key, products)
+    
+    return products
+
+async def parse_page_async(source_name: str, page: CachedPage, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """Async version of parse_page(): the event loop keeps running while a worker parses"""
+    loop = asyncio.get_running_loop()
+    parse_key = _parse_key(source_name, gender)
+    
+    products = await loop.run_in_executor(None, http_cache.get_parsed, page.digest, parse_key)
+    if products is None:
+        products = await parse_pool.run_async(LISTING_SCRAPERS[source_name]["parse"], page.body, gender)
+        await loop.run_in_executor(None, http_cache.put_parsed, page.digest, parse_key, products)
+    
+    return products
+
+async def scrape_source_async(source_name: str, query: str, gender: Optional[GenderEnum] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch and parse one source's listing page. Must run on the fetch engine loop.
+    
+    Args:
+        source_name: Lower-case source name (a key of LISTING_SCRAPERS)
+        query: The search query string
+        gender: Optional gender filter
+        
+    Returns:
+        Scraped product records
+    """
+    scraper = LISTING_SCRAPERS[source_name]
+    url = scraper["build_url"](query, gender)
+    
+    page = await fetch_engine.fetch_page(url, headers=scraper["headers"]())
+    if not page:
+        return []
+    
+    capture_page(source_name, page)
+    
+    # Parse in a worker process so the other sources keep downloading
+    return await parse_page_async(source_name, page, gender)
+
+async def scrape_pages_async(source_name: str, query: str, gender: Optional[GenderEnum] = None,
+                             max_pages: int = 1, url: str = None) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Crawl the result pages of a search, fetching the next pages while the
+    current one is parsed. Must run on the fetch engine loop (see fetch_engine.iterate).
+    
+    Args:
+        source_name: Lower-case source name (a key of LISTING_SCRAPERS)
+        query: The search query string
+        gender: Optional gender filter
+        max_pages: Page budget
+        url: Direct listing URL to paginate instead of the search URL (Amazon only)
+        
+    Yields:
+        (page number, products not seen on earlier pages). Stops early at the
+        first page that fails or adds no new product IDs.
+    """
+    scraper = LISTING_SCRAPERS[source_name]
+    max_pages = max(1, min(max_pages, settings.SCRAPING_MAX_PAGES))
+    
+    url_options = {"url": url} if url else {}
+    
+    def fetch(page_number: int) -> asyncio.Future:
+        page_url = scraper["build_url"](query, gender, page=page_number, **url_options)
+        return asyncio.ensure_future(fetch_engine.fetch_page(page_url, headers=scraper["headers"]()))
+    
+    pending = deque()
+    next_page = 1
+    seen_ids = set()
+    
+    try:
+        for page_number in range(1, max_pages + 1):
+            # Keep the next pages downloading while this one is parsed
+            # (requests still wait for the host's rate limiter)
+            while next_page <= min(max_pages, page_number + settings.SCRAPING_PREFETCH_PAGES):
+                pending.append(fetch(next_page))
+                next_page += 1
+            
+            page = await pending.popleft()
+            if not page:
+                break
+            
+            capture_page(source_name, page)
+            products = await parse_page_async(source_name, page, gender)
+            
+            new_products = [product for product in products if product["id"] not in seen_ids]
+            if not new_products:
+                break  # past the last page, or the site keeps serving the same results
+            
+            seen_ids.update(product["id"] for product in new_products)
+            yield page_number, new_products
+    finally:
+        # Early stop or the consumer went away: drop the prefetched pages
+        for task in pending:
+            task.cancel()
+
+def _queue_scraped(scraped: Dict[str, List[Dict[str, Any]]], gender: Optional[GenderEnum] = None,
+                   task_id: str = None):
+    """
+    Hand the products of several sources to the write-behind queue. The task is
+    completed once every page is committed, without holding the calling thread;
+    its result holds the scraped and written counts of each source.
+    """
+    futures = {
+        name: write_queue.enqueue(LISTING_SCRAPERS[name]["name"], products, gender)
+        for name, products in scraped.items()
+    }
+    if not task_id:
+        return
+    
+    result = {name: {"scraped": len(products)} for name, products in scraped.items()}
+    if not futures:
+        update_task_status(task_id, TaskStatus.COMPLETED, progress=100, result=result)
+        return
+    
+    update_task_status(task_id, TaskStatus.RUNNING, progress=90)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    
+    def on_written(name: str, future: concurrent.futures.Future):
+        with lock:
+            remaining[0] -= 1
+            done = remaining[0] == 0
+            if future.exception() is None:
+                result[name].update(future.result())
+        if future.exception() is not None:
+            update_task_status(task_id, TaskStatus.FAILED, error=str(future.exception()))
+        elif done:
+            update_task_status(task_id, TaskStatus.COMPLETED, progress=100, result=result)
+    
+    for name, future in futures.items():
+        future.add_done_callback(lambda future, name=name: on_written(name, future))
+
+class LiveSearch(dict):
+    """
+    Futures of a live search's product records, keyed by source name. A source that
+    is already being scraped for the same query and gender is joined rather than
+    fetched again; `owned` lists the sources this search fetches (and stores) itself.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.owned = set()
+
+def start_live_search(query: str, gender: Optional[GenderEnum] = None,
+                      source_names: Optional[List[str]] = None) -> LiveSearch:
+    """
+    Start scraping every source on the fetch engine without waiting for the results
+    
+    Args:
+        query: The search query string
+        gender: Optional gender filter
+        source_names: Lower-case source names to scrape (default: all known sources)
+        
+    Returns:
+        Future of each source's product records, keyed by source name
+    """
+    names = [name for name in (source_names or LISTING_SCRAPERS) if name in LISTING_SCRAPERS]
+    normalized = single_flight.normalize_query(query)
+    
+    search = LiveSearch()
+    for name in names:
+        key = ("scrape", name, normalized, gender.value if gender else None)
+        flight, leader = single_flight.claim(key)
+        if leader:
+            try:
+                single_flight.chain(key, flight, fetch_engine.submit(scrape_source_async(name, query, gender)))
+            except Exception as e:
+                single_flight.finish(key, flight, error=e)
+            search.owned.add(name)
+        search[name] = flight
+    return search
+
+def finish_live_search(futures: LiveSearch, query: str, gender: Optional[GenderEnum] = None,
+                       task_id: str = None) -> None:
+    """
+    Store the products of the sources a live search owns once every source is done
+    (joined sources are stored by the search that fetches them). Returns at once: the
+    sources are collected by callbacks, so no thread waits on a slow, rate-limited
+    or circuit-broken source.
+    
+    Args:
+        futures: Result of start_live_search()
+        query: The search query string
+        gender: Optional gender filter
+        task_id: Optional task ID for progress tracking
+    """
+    if task_id:
+        update_task_status(task_id, TaskStatus.RUNNING, progress=10)
+    
+    scraped = {}
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    
+    def store():
+        _queue_scraped({name: products for name, products in scraped.items() if name in futures.owned}, gender, task_id)
+    
+    def on_scraped(name: str, future: concurrent.futures.Future):
+        try:
+            products = future.result()
+        except Exception as e:
+            print(f"Error scraping {name} for {query}: {e}")
+            products = []
+        with lock:
+            scraped[name] = products
+            remaining[0] -= 1
+            done = remaining[0] == 0
+        if done:
+            # Not on the thread that settled the future (the fetch engine loop):
+            # the write queue blocks producers while it is full
+            _storer.submit(store)
+    
+    if not futures:
+        store()
+    for name, future in futures.items():
+        future.add_done_callback(lambda future, name=name: on_scraped(name, future))
+
 def scrape_product_details(product_id: str, source: str, db: Session = None):
     """Scrape detailed information about a specific product"""
     # Implementation would depend on the source
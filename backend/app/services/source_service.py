@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.source import Source
 from app.schemas.source import SourceCreate, SourceUpdate
+from app.utils import circuit_breaker, fetch_engine
 
 def get_source_by_id(db: Session, source_id: int):
     """Get source by ID"""
@@ -23,11 +24,16 @@ def create_source(db: Session, source: SourceCreate):
         logo_url=source.logo_url,
         search_endpoint=source.search_endpoint,
         product_endpoint=source.product_endpoint,
-        is_active=source.is_active
+        is_active=source.is_active,
+        rate_limit_burst=source.rate_limit_burst,
+        rate_limit_per_second=source.rate_limit_per_second,
+        http_pool_size=source.http_pool_size,
+        cache_ttl=source.cache_ttl
     )
     db.add(db_source)
     db.commit()
     db.refresh(db_source)
+    fetch_engine.configure_sources([db_source])
     return db_source
 
 def update_source(db: Session, source_id: int, source: SourceUpdate):
@@ -42,6 +48,11 @@ def update_source(db: Session, source_id: int, source: SourceUpdate):
     
     db.commit()
     db.refresh(db_source)
+    fetch_engine.configure_sources([db_source])
+    
+    # Re-enabling a source gives it a fresh start instead of waiting for the open circuit
+    if update_data.get("is_active"):
+        circuit_breaker.reset(fetch_engine.get_host(db_source.base_url))
     return db_source
 
 def delete_source(db: Session, source_id: int):
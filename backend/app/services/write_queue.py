@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.models.product import GenderEnum
+from app.services.ingest_service import upsert_scraped_products
+from app.services.price_history_service import prune_price_history
+
+# Pages of scraped records waiting to be written: (source name, gender, records, future)
+_lock = threading.Lock()
+_not_empty = threading.Condition(_lock)
+_not_full = threading.Condition(_lock)
+_pending: "deque[Tuple[str, Optional[GenderEnum], List[Dict[str, Any]], Future]]" = deque()
+_depth = 0  # records in _pending
+_writer: Optional[threading.Thread] = None
+_stopping = False
+_last_prune = 0.0  # monotonic time of the last price history pruning (writer thread only)
+
+_stats = {
+    "enqueued": 0, "written": 0, "flushes": 0, "errors": 0, "producer_waits": 0,
+    "inserted": 0, "updated": 0, "unchanged": 0, "price_points_pruned": 0, "last_error": None,
+    "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0
+}
+
+def _ensure_writer() -> None:
+    """Start the writer thread on first use (called with the lock held)"""
+    global _writer
+    if _writer is None or not _writer.is_alive():
+        _writer = threading.Thread(target=_run_writer, name="write-behind", daemon=True)
+        _writer.start()
+
+def enqueue(source_name: str, products: List[Dict[str, Any]], gender: Optional[GenderEnum] = None) -> Future:
+    """
+    Queue a page of scraped products for the writer thread.
+    Blocks while the queue is full, so producers slow down to the database's pace.
+
+    Args:
+        source_name: Source display name (e.g. "Flipkart")
+        products: Scraped product records
+        gender: Optional gender of the search
+
+    Returns:
+        Future resolved once the records are committed, with the inserted, updated and
+        unchanged counts of the write they were part of (pages of the same source and
+        gender queued together are written at once)
+    """
+    global _depth
+
+    future: Future = Future()
+    if not products:
+        future.set_result({"inserted": 0, "updated": 0, "unchanged": 0})
+        return future
+
+    with _lock:
+        _ensure_writer()
+        if _depth and _depth + len(products) > settings.WRITE_QUEUE_MAX_RECORDS:
+            _stats["producer_waits"] += 1
+            # An oversized page is let in once the queue has drained completely
+            while _depth and _depth + len(products) > settings.WRITE_QUEUE_MAX_RECORDS:
+                _not_full.wait()
+
+        _pending.append((source_name, gender, products, future))
+        _depth += len(products)
+        _stats["enqueued"] += len(products)
+        _not_empty.notify()
+
+    return future
+
+def _take_batch() -> List[Tuple[str, Optional[GenderEnum], List[Dict[str, Any]], Future]]:
+    """Wait until a batch is due: enough records queued or the oldest page waited long enough"""
+    global _depth
+
+    with _lock:
+        while not _pending and not _stopping:
+            _not_empty.wait()
+
+        deadline = time.monotonic() + settings.WRITE_FLUSH_INTERVAL
+        while _depth < settings.INGEST_BATCH_SIZE and not _stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _not_empty.wait(remaining)
+
+        batch = []
+        size = 0
+        while _pending and (not batch or size + len(_pending[0][2]) <= settings.INGEST_BATCH_SIZE):
+            item = _pending.popleft()
+            batch.append(item)
+            size += len(item[2])
+        _depth -= size
+        _not_full.notify_all()
+        return batch
+
+def _write_batch(batch: List[Tuple[str, Optional[GenderEnum], List[Dict[str, Any]], Future]]) -> None:
+    """Write a batch, one upsert per source and gender"""
+    groups: Dict[Tuple[str, Optional[GenderEnum]], List[Dict[str, Any]]] = {}
+    for source_name, gender, products, _ in batch:
+        groups.setdefault((source_name, gender), []).extend(products)
+
+    started = time.perf_counter()
+    # Each group succeeds or fails on its own, so one bad page doesn't hold back other sources
+    written: Dict[Tuple[str, Optional[GenderEnum]], Dict[str, int]] = {}
+    errors: Dict[Tuple[str, Optional[GenderEnum]], Exception] = {}
+    db = SessionLocal()
+    try:
+        for group, products in groups.items():
+            try:
+                written[group] = upsert_scraped_products(db, group[0], products, group[1])
+            except Exception as e:
+                db.rollback()
+                errors[group] = e
+    finally:
+        db.close()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        _stats["flushes"] += 1
+        _stats["last_flush_ms"] = round(elapsed_ms, 1)
+        _stats["max_flush_ms"] = round(max(_stats["max_flush_ms"], elapsed_ms), 1)
+        _stats["total_flush_ms"] += elapsed_ms
+        for counts in written.values():
+            for key, value in counts.items():
+                _stats[key] += value
+        for error in errors.values():
+            _stats["errors"] += 1
+            _stats["last_error"] = str(error)
+        _stats["written"] += sum(len(products) for group, products in groups.items() if group in written)
+
+    for source_name, gender, _, future in batch:
+        group = (source_name, gender)
+        if group in errors:
+            future.set_exception(errors[group])
+        else:
+            future.set_result(written[group])
+
+def _prune_price_history() -> None:
+    """Drop expired raw price points now and then, between batches"""
+    global _last_prune
+
+    if time.monotonic() - _last_prune < settings.PRICE_HISTORY_PRUNE_INTERVAL:
+        return
+    _last_prune = time.monotonic()
+
+    db = SessionLocal()
+    try:
+        deleted = prune_price_history(db)
+        with _lock:
+            _stats["price_points_pruned"] += deleted
+    except Exception as e:
+        db.rollback()
+        print(f"Error pruning price history: {e}")
+    finally:
+        db.close()
+
+def _run_writer() -> None:
+    while True:
+        batch = _take_batch()
+        if batch:
+            _write_batch(batch)
+            _prune_price_history()
+        elif _stopping:
+            return
+
+def stop(timeout: float = 30) -> None:
+    """Write what is still queued and stop the writer thread"""
+    global _stopping
+
+    with _lock:
+        writer = _writer
+        _stopping = True
+        _not_empty.notify_all()
+    if writer is not None:
+        writer.join(timeout)
+
+def get_queue_stats() -> Dict[str, Any]:
+    """
+    Get queue depth, write counters, flush latency and last write error of the write-behind queue
+
+    Returns:
+        Dictionary of metrics
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["depth"] = _depth
+        stats["pages"] = len(_pending)
+        stats["capacity"] = settings.WRITE_QUEUE_MAX_RECORDS
+    stats["avg_flush_ms"] = round(stats.pop("total_flush_ms") / stats["flushes"], 1) if stats["flushes"] else 0.0
+    return stats
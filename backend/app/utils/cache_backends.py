@@ -0,0 +1,421 @@
+"""
+Cache Backends Utility
+Storage engines behind cache_manager: a bounded in-process LRU cache, and a Redis
+cache that every API worker shares, with a short-lived in-process near-cache in front.
+Redis values are JSON, zlib-compressed once they are large enough to benefit; never
+pickle, which would let anyone able to write to Redis run code in the API workers.
+"""
+import heapq
+import json
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Values at least this large are compressed before they are sent to Redis
+COMPRESS_MIN_BYTES = 1024
+
+# First byte of a serialised value
+_RAW = b"j"
+_COMPRESSED = b"c"
+
+class CacheBackend:
+    """Interface of the cache engines used by cache_manager"""
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached data of a key, or None when missing or expired"""
+        raise NotImplementedError
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """get() plus the seconds the entry has left (None when it doesn't expire)"""
+        raise NotImplementedError
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        """Store data under a key for ttl seconds (no expiry when None); False when not stored"""
+        raise NotImplementedError
+
+    def add(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        """Store data only if the key is missing; False when it already exists"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Drop a key"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the engine"""
+        raise NotImplementedError
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialise a value for a shared backend
+
+    Raises:
+        TypeError: The value is not JSON (dicts, lists, strings, numbers, booleans, None);
+            tuples are read back as lists
+    """
+    payload = json.dumps(data, separators=(",", ":"), allow_nan=False).encode()
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        return _COMPRESSED + zlib.compress(payload, 6)
+    return _RAW + payload
+
+def loads(value: bytes) -> Any:
+    """
+    Inverse of dumps()
+
+    Raises:
+        ValueError: The value was not written by dumps() (zlib.error when corrupt)
+    """
+    if value[:1] == _COMPRESSED:
+        return json.loads(zlib.decompress(value[1:]))
+    if value[:1] == _RAW:
+        return json.loads(value[1:])
+    raise ValueError("Unknown cache value format")
+
+def _size_of(data: Any) -> int:
+    """Approximate size of a value in bytes, measured once when it is stored"""
+    try:
+        return len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return len(repr(data))
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process cache bounded by entry count and total size. The least recently used
+    entries are evicted first; expired entries are dropped on read and by a sweeper
+    thread, so keys that are never read again don't hold memory.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, sweep_interval: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()  # key -> (data, expires at, size)
+        self._expiries: List[Tuple[float, str]] = []  # heap of (expires at, key); stale items are skipped
+        self._bytes = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0, "rejected": 0}
+
+    def _ensure_sweeper(self) -> None:
+        """Start the sweeper thread on first store (called with the lock held)"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = threading.Thread(target=self._run_sweeper, name="cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _run_sweeper(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry (called with the lock held)"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached data of a key, or None when missing or expired"""
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, None
+            if entry[1] is not None and entry[1] <= now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0], entry[1] - now if entry[1] is not None else None
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Store data under a key, evicting least recently used entries to make room
+
+        Returns:
+            False when the value alone is larger than the byte budget (nothing is stored)
+        """
+        size = _size_of(data)
+        expires_at = time.time() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self._stats["rejected"] += 1
+                return False
+
+            while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+            self._entries[key] = (data, expires_at, size)
+            self._bytes += size
+            self._stats["stores"] += 1
+
+            if expires_at is not None:
+                heapq.heappush(self._expiries, (expires_at, key))
+                # Overwritten keys leave stale heap items behind; compact once they dominate
+                if len(self._expiries) > 2 * len(self._entries) + 64:
+                    self._expiries = [(entry[1], key) for key, entry in self._entries.items() if entry[1] is not None]
+                    heapq.heapify(self._expiries)
+                self._ensure_sweeper()
+            return True
+
+    def add(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                return False
+            return self.set(key, data, ttl)
+
+    def delete(self, key: str) -> None:
+        """Drop a key"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._expiries = []
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """
+        Drop every expired entry
+
+        Returns:
+            Number of entries dropped
+        """
+        now = time.time()
+        dropped = 0
+        with self._lock:
+            while self._expiries and self._expiries[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiries)
+                entry = self._entries.get(key)
+                # Skip heap items of keys that were deleted or stored again since
+                if entry is not None and entry[1] == expires_at:
+                    self._remove(key)
+                    dropped += 1
+            self._stats["expirations"] += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["backend"] = "memory"
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+class RedisBackend(CacheBackend):
+    """
+    Cache kept in Redis, shared by every API worker. Keys are namespaced with a prefix,
+    so the database may hold other data. Connection errors count as misses: the API
+    keeps answering (uncached) while Redis is unreachable.
+    """
+
+    def __init__(self, url: str, prefix: str = "inshop:cache:", client: Any = None,
+                 socket_timeout: float = 0.5):
+        """
+        Args:
+            url: Redis URL (redis://host:6379/0)
+            prefix: Namespace of the cache keys
+            client: Optional client with the redis-py get/set/delete/scan_iter/pipeline
+                methods (an in-process stand-in such as tests/fake_redis.py); created
+                from url when missing
+            socket_timeout: Seconds before a slow Redis call is abandoned
+        """
+        try:
+            import redis
+            self._errors: Tuple[type, ...] = (redis.RedisError, OSError)
+        except ImportError:
+            # Only an injected client works without the redis package
+            if client is None:
+                raise
+            self._errors = (OSError,)
+
+        self.prefix = prefix
+        self.client = client if client is not None else redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0, "bytes_read": 0, "bytes_written": 0}
+
+    def _count(self, **counters: int) -> None:
+        with self._lock:
+            for name, value in counters.items():
+                self._stats[name] += value
+
+    def _loads(self, value: Optional[bytes]) -> Optional[Any]:
+        """loads() a value read from Redis, counting the hit or miss"""
+        if value is None:
+            self._count(misses=1)
+            return None
+        try:
+            data = loads(value)
+        except (ValueError, zlib.error):
+            # Written by an incompatible version of the code; treat as missing
+            self._count(errors=1, misses=1)
+            return None
+        self._count(hits=1, bytes_read=len(value))
+        return data
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self.client.get(self.prefix + key)
+        except self._errors:
+            self._count(errors=1, misses=1)
+            return None
+        return self._loads(value)
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """get() and PTTL in one round trip"""
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.get(self.prefix + key)
+            pipeline.pttl(self.prefix + key)
+            value, pttl = pipeline.execute()
+        except self._errors:
+            self._count(errors=1, misses=1)
+            return None, None
+        data = self._loads(value)
+        if data is None:
+            return None, None
+        # -1: no expiry; -2: expired between the two commands
+        return data, None if pttl == -1 else max(pttl, 0) / 1000
+
+    def _dumps(self, data: Any) -> Optional[bytes]:
+        """dumps(), or None (counted as an error) for a value that isn't JSON"""
+        try:
+            return dumps(data)
+        except (TypeError, ValueError):
+            self._count(errors=1)
+            return None
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        value = self._dumps(data)
+        if value is None:
+            return False
+        try:
+            if ttl:
+                self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+            else:
+                self.client.set(self.prefix + key, value)
+        except self._errors:
+            self._count(errors=1)
+            return False
+        self._count(stores=1, bytes_written=len(value))
+        return True
+
+    def add(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        value = self._dumps(data)
+        if value is None:
+            return False
+        try:
+            if ttl:
+                stored = self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)), nx=True)
+            else:
+                stored = self.client.set(self.prefix + key, value, nx=True)
+        except self._errors:
+            self._count(errors=1)
+            return False
+        if stored:
+            self._count(stores=1, bytes_written=len(value))
+        return bool(stored)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except self._errors:
+            self._count(errors=1)
+
+    def clear(self) -> None:
+        """Drop the keys under the prefix (never the whole database)"""
+        try:
+            batch = []
+            for name in self.client.scan_iter(match=self.prefix + "*", count=500):
+                batch.append(name)
+                if len(batch) >= 500:
+                    self.client.delete(*batch)
+                    batch = []
+            if batch:
+                self.client.delete(*batch)
+        except self._errors:
+            self._count(errors=1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = "redis"
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+class NearCache(CacheBackend):
+    """
+    Small in-process cache in front of a shared backend. Repeated reads of a hot key
+    skip the network round trip and deserialisation; entries live for at most
+    near_ttl seconds, which bounds how stale another worker's write can look here,
+    and never past the expiry of the shared entry they copy.
+    """
+
+    def __init__(self, shared: CacheBackend, near: MemoryBackend, near_ttl: float):
+        self.shared = shared
+        self.near = near
+        self.near_ttl = near_ttl
+
+    def _near_ttl(self, ttl: Optional[float]) -> float:
+        """A near copy never outlives the shared entry"""
+        return min(ttl, self.near_ttl) if ttl else self.near_ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        data, remaining = self.near.get_with_ttl(key)
+        if data is not None:
+            return data, remaining
+        data, remaining = self.shared.get_with_ttl(key)
+        if data is not None and (remaining is None or remaining > 0):
+            self.near.set(key, data, ttl=self._near_ttl(remaining))
+        return data, remaining
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        self.near.set(key, data, ttl=self._near_ttl(ttl))
+        return self.shared.set(key, data, ttl=ttl)
+
+    def add(self, key: str, data: Any, ttl: Optional[float] = None) -> bool:
+        # Decided by the shared backend, so one worker wins
+        return self.shared.add(key, data, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self.near.delete(key)
+        self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.near.clear()
+        self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.shared.stats()
+        stats["near"] = self.near.stats()
+        return stats
@@ -1,84 +1,169 @@
 """
 Cache Manager Utility
-Provides caching functionality for API responses
+Provides caching functionality for API responses, stored in the engine chosen by
+the CACHE_BACKEND setting: a bounded in-process cache ("memory"), or Redis shared by
+all API workers behind an in-process near-cache ("redis"). See cache_backends.
+
+Families of keys can be cached with stale-while-revalidate: past their soft TTL,
+entries are still served while one background refresh rebuilds them, until their
+hard TTL.
 """
+import threading
 import time
-from typing import Any, Dict, Optional
-import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.cache_backends import CacheBackend, MemoryBackend, NearCache, RedisBackend
+
+def _create_backend() -> CacheBackend:
+    """Cache engine selected by CACHE_BACKEND"""
+    memory = MemoryBackend(
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        sweep_interval=settings.RESULT_CACHE_SWEEP_INTERVAL
+    )
+    if settings.CACHE_BACKEND == "memory":
+        return memory
+    if settings.CACHE_BACKEND == "redis":
+        # The in-process cache becomes the near-cache, sized for the hottest keys only
+        memory.max_entries = settings.RESULT_CACHE_NEAR_MAX_ENTRIES
+        return NearCache(
+            RedisBackend(settings.REDIS_URL, prefix=settings.REDIS_CACHE_PREFIX),
+            memory,
+            near_ttl=settings.RESULT_CACHE_NEAR_TTL
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
+
+_cache = _create_backend()
+
+# Soft and hard TTL in seconds of each key family cached with get_revalidating()
+CACHE_FAMILIES: Dict[str, Tuple[int, int]] = {
+    "search": (settings.SEARCH_CACHE_SOFT_TTL, settings.SEARCH_CACHE_HARD_TTL)
+}
+
+# Outcomes of get_revalidating()
+FRESH = "fresh"            # within the soft TTL
+STALE = "stale"            # past the soft TTL; another refresh is already running
+REFRESHING = "refreshing"  # past the soft TTL; this call started the refresh
+MISS = "miss"
+
+_refresher = ThreadPoolExecutor(max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_refresh_lock = threading.Lock()
+_refreshing = set()  # keys with a refresh running in this process
+_revalidation_stats = {"fresh": 0, "stale": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+def _count(name: str) -> None:
+    with _refresh_lock:
+        _revalidation_stats[name] += 1
+
+def cache_revalidating(cache_key: str, data: Any, family: str) -> None:
+    """
+    Store results of a key family: fresh for its soft TTL, served stale until its hard TTL.
+
+    Args:
+        cache_key: The key to store the data under
+        data: The data to cache
+        family: Key family in CACHE_FAMILIES
+    """
+    soft_ttl, hard_ttl = CACHE_FAMILIES[family]
+    _cache.set(cache_key, {"data": data, "fresh_until": time.time() + soft_ttl}, ttl=hard_ttl)
+
+def _run_refresh(cache_key: str, family: str, refresh: Callable[[], Any]) -> None:
+    try:
+        cache_revalidating(cache_key, refresh(), family)
+        _count("refreshes")
+    except Exception as e:
+        # The stale entry stays until its hard TTL; the next stale read tries again
+        print(f"Error refreshing cache entry {cache_key}: {e}")
+        _count("refresh_errors")
+    finally:
+        _cache.delete(f"{cache_key}:refreshing")
+        with _refresh_lock:
+            _refreshing.discard(cache_key)
 
-# In-memory cache store
-# In a production app, this would use Redis or another distributed cache
-_cache: Dict[str, Dict[str, Any]] = {}
+def _start_refresh(cache_key: str, family: str, refresh: Callable[[], Any]) -> bool:
+    """Queue a refresh unless one is already running in this process or, for a shared backend, any worker"""
+    with _refresh_lock:
+        if cache_key in _refreshing:
+            return False
+        _refreshing.add(cache_key)
+    if not _cache.add(f"{cache_key}:refreshing", True, ttl=settings.CACHE_REFRESH_TIMEOUT):
+        with _refresh_lock:
+            _refreshing.discard(cache_key)
+        return False
+    _refresher.submit(_run_refresh, cache_key, family, refresh)
+    return True
+
+def get_revalidating(cache_key: str, family: str, refresh: Callable[[], Any]) -> Tuple[Optional[Any], str]:
+    """
+    Retrieve results of a key family with stale-while-revalidate.
+
+    Args:
+        cache_key: The key to lookup in cache
+        family: Key family in CACHE_FAMILIES
+        refresh: Rebuilds the data when the entry is stale; runs on a background
+            thread, so it must open its own database session
+
+    Returns:
+        The cached data (None on a miss) and FRESH, STALE, REFRESHING or MISS
+    """
+    entry = _cache.get(cache_key)
+    if entry is None:
+        _count("misses")
+        return None, MISS
+    if entry["fresh_until"] > time.time():
+        _count("fresh")
+        return entry["data"], FRESH
+    _count("stale")
+    if _start_refresh(cache_key, family, refresh):
+        return entry["data"], REFRESHING
+    return entry["data"], STALE
 
 def get_cached_results(cache_key: str) -> Optional[Any]:
     """
     Retrieve cached results by key if they exist and haven't expired.
-    
+
     Args:
         cache_key: The key to lookup in cache
-        
+
     Returns:
         The cached data or None if not found/expired
     """
-    if cache_key not in _cache:
-        return None
-        
-    cache_entry = _cache[cache_key]
-    
-    # Check if expired
-    if "expiry" in cache_entry and cache_entry["expiry"] < time.time():
-        del _cache[cache_key]
-        return None
-        
-    return cache_entry.get("data")
-    
+    return _cache.get(cache_key)
+
 def cache_results(cache_key: str, data: Any, expiry: int = 300) -> None:
     """
     Store results in cache with optional expiry time.
-    
+
     Args:
         cache_key: The key to store the data under
         data: The data to cache
         expiry: Time in seconds until the cache entry expires (default: 300s)
     """
-    _cache[cache_key] = {
-        "data": data,
-        "expiry": time.time() + expiry if expiry else None
-    }
-    
+    _cache.set(cache_key, data, ttl=expiry)
+
 def clear_cache(cache_key: Optional[str] = None) -> None:
     """
     Clear the cache entirely or for a specific key.
-    
+
     Args:
         cache_key: Optional specific key to clear
     """
-    global _cache
-    
     if cache_key:
-        if cache_key in _cache:
-            del _cache[cache_key]
+        _cache.delete(cache_key)
     else:
-        _cache = {}
-        
+        _cache.clear()
+
 def get_cache_stats() -> Dict[str, Any]:
     """
     Get statistics about the cache.
-    
+
     Returns:
-        Dictionary with cache stats (count, keys, memory usage estimate)
+        Dictionary with cache stats (entries, bytes, limits, hit/miss/eviction counters)
+        and the fresh/stale/refresh counters of revalidated families
     """
-    total_size = 0
-    for key, entry in _cache.items():
-        # Rough estimate of memory usage
-        try:
-            total_size += len(json.dumps(entry.get("data", "")))
-        except (TypeError, ValueError):
-            # If the data can't be JSON serialized, estimate based on str representation
-            total_size += len(str(entry.get("data", "")))
-            
-    return {
-        "entries": len(_cache),
-        "keys": list(_cache.keys()),
-        "estimated_size_bytes": total_size
-    }
+    stats = _cache.stats()
+    with _refresh_lock:
+        stats["revalidation"] = dict(_revalidation_stats, refreshing=len(_refreshing))
+    return stats
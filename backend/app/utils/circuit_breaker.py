@@ -0,0 +1,158 @@
+"""
+Circuit Breaker Utility
+Provides per-host circuit breakers and retry budgets, so a marketplace that is
+down or blocking us fails fast instead of holding scrapers for a full timeout
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+CLOSED = "closed"        # requests flow normally
+OPEN = "open"            # requests fail immediately until the recovery timeout passes
+HALF_OPEN = "half_open"  # one probe request decides whether to close or reopen
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. After `recovery_timeout`
+    seconds a single probe is let through: success closes the circuit, failure
+    opens it again. Also holds the host's retry budget: every request earns a
+    fraction of a retry, so retries stay a bounded share of the traffic.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self._lock = threading.Lock()
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.retry_tokens = float(settings.RETRY_BUDGET_MIN)
+        self.stats = {"requests": 0, "failures": 0, "rejected": 0, "retries": 0, "opened": 0}
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent now
+
+        Returns:
+            False while the circuit is open (or a half-open probe is already running)
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+
+            if self.state == CLOSED:
+                allowed = True
+            elif self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                allowed = True
+            else:
+                allowed = False
+
+            if allowed:
+                self.stats["requests"] += 1
+                self.retry_tokens = min(settings.RETRY_BUDGET_MAX,
+                                        self.retry_tokens + settings.RETRY_BUDGET_RATIO)
+            else:
+                self.stats["rejected"] += 1
+            return allowed
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """A request was abandoned before it finished; let another probe through"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def take_retry(self) -> bool:
+        """Spend one retry from the budget, if the circuit is still closed and a retry is left"""
+        with self._lock:
+            if self.state != CLOSED or self.retry_tokens < 1:
+                return False
+            self.retry_tokens -= 1
+            self.stats["retries"] += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state, failure count and when the next probe is allowed"""
+        with self._lock:
+            retry_at = None
+            if self.state == OPEN:
+                remaining = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+                retry_at = datetime.now().timestamp() + remaining
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_at": datetime.fromtimestamp(retry_at) if retry_at else None,
+                "retry_budget": round(self.retry_tokens, 2),
+                **self.stats
+            }
+
+# Breakers keyed by host
+_breakers_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """
+    Get the circuit breaker for a host, creating it closed
+
+    Args:
+        host: Host name (e.g. www.amazon.in)
+
+    Returns:
+        The host's circuit breaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RECOVERY_TIMEOUT)
+            _breakers[host] = breaker
+        return breaker
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry (1 = first retry)"""
+    ceiling = min(settings.RETRY_BACKOFF_MAX, settings.RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+def get_source_state(base_url: str) -> Optional[Dict[str, Any]]:
+    """Get the breaker state for a source's base URL, or None if it was never scraped"""
+    with _breakers_lock:
+        breaker = _breakers.get(urlsplit(base_url).netloc.lower())
+    return breaker.snapshot() if breaker else None
+
+def reset(host: str) -> None:
+    """Close a host's circuit, e.g. after a source was fixed or re-enabled"""
+    with _breakers_lock:
+        _breakers.pop(host, None)
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the state and counters of every circuit breaker
+
+    Returns:
+        Dictionary keyed by host
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {host: breaker.snapshot() for host, breaker in breakers.items()}
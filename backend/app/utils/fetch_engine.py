@@ -0,0 +1,222 @@
+"""
+Fetch Engine Utility
+Runs scraper HTTP requests on a shared asyncio event loop with per-host concurrency limits
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator, Coroutine, Dict, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.config import settings
+from app.utils import circuit_breaker, http_cache, http_sessions, rate_limiter
+from app.utils.http_cache import CachedPage
+
+# The engine owns one event loop running in a daemon thread, so both the
+# synchronous scrapers (BackgroundTasks threads) and async endpoints can use it
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+# Only touched from the engine loop
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the engine event loop, starting its thread on first use
+
+    Returns:
+        The running engine event loop
+    """
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="fetch-engine", daemon=True)
+            _loop_thread.start()
+
+    return _loop
+
+def get_host(url: str) -> str:
+    """Get the host part of a URL, used as the key for per-host limits"""
+    return urlsplit(url).netloc.lower()
+
+def _get_semaphore(host: str) -> asyncio.Semaphore:
+    """Get the concurrency limiter for a host"""
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.SCRAPING_MAX_CONCURRENCY_PER_HOST)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+def configure_sources(sources: Iterable[Any]) -> None:
+    """Apply the per-source rate limits, connection pool sizes and cache windows of Source rows"""
+    for source in sources:
+        rate_limiter.configure_source(source)
+        http_sessions.configure_source(source)
+        http_cache.configure_source(source)
+
+def _is_retryable_status(status: int) -> bool:
+    """Server errors and blocking responses are retried and count against the circuit"""
+    return status >= 500 or status in (403, 429)
+
+async def fetch_page(url: str, headers: Optional[Dict[str, str]] = None,
+                     timeout: int = settings.REQUEST_TIMEOUT) -> Optional[CachedPage]:
+    """
+    Fetch a page on the engine loop through the on-disk page cache.
+    Fresh cache hits skip the network; stale entries are revalidated with a
+    conditional GET. Network requests wait for the host's rate limiter first,
+    are retried with jittered backoff and fail fast while the host's circuit is open.
+    If the page cannot be downloaded, a stale cached copy is returned when available.
+
+    Args:
+        url: URL to fetch
+        headers: Optional request headers
+        timeout: Total request timeout in seconds
+
+    Returns:
+        The page or None if the request failed
+    """
+    loop = asyncio.get_running_loop()
+    
+    entry = await loop.run_in_executor(None, http_cache.lookup, url)
+    cached_body = None
+    if entry:
+        cached_body = await loop.run_in_executor(None, http_cache.read_body, entry)
+        if cached_body is None:
+            entry = None
+        elif entry["fresh"]:
+            return CachedPage(url, cached_body, entry["digest"], from_cache=True)
+    
+    request_headers = dict(headers or {})
+    if entry:
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+    
+    host = get_host(url)
+    breaker = circuit_breaker.get_breaker(host)
+    stale_page = CachedPage(url, cached_body, entry["digest"], from_cache=True) if entry else None
+    attempt = 0
+    
+    while True:
+        if not breaker.allow_request():
+            # The marketplace is failing: answer at once, with the stale copy if there is one
+            print(f"Circuit open for {host}, skipping {url}")
+            return stale_page
+        
+        await rate_limiter.acquire(host)
+        
+        async with _get_semaphore(host):
+            try:
+                session = await http_sessions.get_session(url)
+                async with session.get(url, headers=request_headers,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status == 304 and entry:
+                        breaker.record_success()
+                        await loop.run_in_executor(None, http_cache.revalidated, entry)
+                        return stale_page
+                    
+                    response.raise_for_status()  # Raise exception for 4XX/5XX responses
+                    body = await response.text()
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                breaker.record_success()
+                break
+            except aiohttp.ClientResponseError as e:
+                if not _is_retryable_status(e.status):
+                    # The marketplace answered (e.g. 404); retrying won't help
+                    breaker.record_success()
+                    print(f"Error fetching {url}: {e}")
+                    return None
+                breaker.record_failure()
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                error = e
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+        
+        attempt += 1
+        if attempt > settings.SCRAPING_MAX_RETRIES or not breaker.take_retry():
+            print(f"Error fetching {url}: {str(error) or type(error).__name__}")
+            return stale_page
+        await asyncio.sleep(circuit_breaker.backoff_delay(attempt))
+    
+    digest = await loop.run_in_executor(None, http_cache.store, url, body, etag, last_modified)
+    return CachedPage(url, body, digest)
+
+async def fetch(url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: int = settings.REQUEST_TIMEOUT) -> Optional[str]:
+    """
+    Fetch a page body on the engine loop (see fetch_page)
+
+    Returns:
+        The response body or None if the request failed
+    """
+    page = await fetch_page(url, headers=headers, timeout=timeout)
+    return page.body if page else None
+
+def run(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on the engine loop and block the calling thread for its result.
+    Must not be called from the engine loop itself.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """Start a coroutine on the engine loop and return its future without waiting"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+async def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine on the engine loop and await it from another event loop"""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_loop()))
+
+async def _next_item(agen: AsyncIterator) -> Any:
+    # Advance the generator from inside the engine loop, so it is bound to that loop
+    return await agen.__anext__()
+
+async def iterate_async(agen: AsyncIterator) -> AsyncIterator:
+    """
+    Consume an async generator that runs on the engine loop from another event loop.
+    Work the generator started in the background (e.g. prefetches) keeps running
+    on the engine loop between items.
+    """
+    try:
+        while True:
+            try:
+                yield await run_async(_next_item(agen))
+            except StopAsyncIteration:
+                return
+    finally:
+        await run_async(agen.aclose())
+
+def iterate(agen: AsyncIterator) -> Iterator:
+    """Blocking version of iterate_async() for synchronous callers"""
+    try:
+        while True:
+            try:
+                yield run(_next_item(agen))
+            except StopAsyncIteration:
+                return
+    finally:
+        run(agen.aclose())
+
+def fetch_page_sync(url: str, headers: Optional[Dict[str, str]] = None,
+                    timeout: int = settings.REQUEST_TIMEOUT) -> Optional[CachedPage]:
+    """Blocking wrapper around fetch_page() for synchronous callers"""
+    return run(fetch_page(url, headers=headers, timeout=timeout))
+
+def fetch_sync(url: str, headers: Optional[Dict[str, str]] = None,
+               timeout: int = settings.REQUEST_TIMEOUT) -> Optional[str]:
+    """Blocking wrapper around fetch() for synchronous callers"""
+    return run(fetch(url, headers=headers, timeout=timeout))
+
+async def close() -> None:
+    """Close the pooled client sessions"""
+    await http_sessions.close_all()
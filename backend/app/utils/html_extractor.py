@@ -0,0 +1,316 @@
+"""
+HTML Extractor Utility
+Compiles the CSS selectors of listing scrapers to lxml XPath once and streams
+listing pages, keeping only the subtrees of product containers
+"""
+import copy
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from lxml import etree
+
+from app.utils import selector_registry
+
+# Size of the chunks fed to the incremental parser
+_FEED_CHUNK_SIZE = 64 * 1024
+
+# One compound selector, e.g. div.price[data-id] or [class*="rating"]
+_COMPOUND_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>[*^$]?=)"?(?P<value>[^"\]]*)"?)?\]')
+
+def _literal(value: str) -> str:
+    """Quote a string for use in an XPath expression"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat('" + "', \"'\", '".join(value.split("'")) + "')"
+
+def _parse_compound(compound: str) -> Tuple[str, List[Tuple[str, str, Optional[str], Optional[str]]]]:
+    """Split a compound selector into its tag and a list of (kind, name, op, value) conditions"""
+    match = _COMPOUND_RE.match(compound)
+    if not match:
+        raise ValueError(f"Unsupported selector: {compound}")
+
+    conditions = []
+    for part in _PART_RE.finditer(match.group("rest")):
+        if part.group("cls"):
+            conditions.append(("class", part.group("cls"), None, None))
+        else:
+            conditions.append(("attr", part.group("attr"), part.group("op"), part.group("value")))
+    return match.group("tag") or "*", conditions
+
+def _compound_predicates(conditions: List[Tuple[str, str, Optional[str], Optional[str]]]) -> str:
+    predicates = []
+    for kind, name, op, value in conditions:
+        if kind == "class":
+            predicates.append(f"[contains(concat(' ', normalize-space(@class), ' '), {_literal(' ' + name + ' ')})]")
+        elif op is None:
+            predicates.append(f"[@{name}]")
+        elif op == "=":
+            predicates.append(f"[@{name}={_literal(value)}]")
+        elif op == "*=":
+            predicates.append(f"[contains(@{name}, {_literal(value)})]")
+        elif op == "^=":
+            predicates.append(f"[starts-with(@{name}, {_literal(value)})]")
+        else:  # $=
+            predicates.append(f"[substring(@{name}, string-length(@{name}) - {len(value) - 1})={_literal(value)}]")
+    return "".join(predicates)
+
+def css_to_xpath(selector: str) -> str:
+    """
+    Translate a CSS selector to an XPath selecting its first match below the context node
+
+    Supports tags, classes, [attr], [attr="v"], [attr*="v"], [attr^="v"], [attr$="v"]
+    and the descendant combinator - the subset used by the listing scrapers.
+
+    Args:
+        selector: CSS selector
+
+    Returns:
+        XPath expression equivalent to BeautifulSoup's select_one
+    """
+    steps = []
+    for compound in selector.split():
+        tag, conditions = _parse_compound(compound)
+        steps.append(f"{tag}{_compound_predicates(conditions)}")
+    return f"(.//{'//'.join(steps)})[1]"
+
+def compile_selector(selector: str) -> etree.XPath:
+    """Compile a CSS selector to a reusable lxml XPath (see css_to_xpath)"""
+    return etree.XPath(css_to_xpath(selector))
+
+class ContainerMatcher:
+    """
+    Decides whether an element opened by the parser is a product container.
+    The last compound is checked in Python; ancestors (if any) with XPath.
+    """
+
+    def __init__(self, selector: str):
+        compounds = selector.split()
+        self.selector = selector
+        self.tag, self.conditions = _parse_compound(compounds[-1])
+        self.ancestors = None
+        if len(compounds) > 1:
+            expression = "self::*"
+            for compound in reversed(compounds[:-1]):
+                tag, conditions = _parse_compound(compound)
+                expression += f"[ancestor::{tag}{_compound_predicates(conditions)}"
+            expression += "]" * (len(compounds) - 1)
+            self.ancestors = etree.XPath(f"boolean({expression})")
+
+    def matches(self, element: Any) -> bool:
+        if self.tag != "*" and element.tag != self.tag:
+            return False
+
+        for kind, name, op, value in self.conditions:
+            if kind == "class":
+                if name not in (element.get("class") or "").split():
+                    return False
+                continue
+            attr = element.get(name)
+            if attr is None:
+                return False
+            if op == "=" and attr != value:
+                return False
+            if op == "*=" and value not in attr:
+                return False
+            if op == "^=" and not attr.startswith(value):
+                return False
+            if op == "$=" and not attr.endswith(value):
+                return False
+
+        return self.ancestors is None or self.ancestors(element)
+
+def selector_specificity(selector: str) -> Tuple[int, int]:
+    """CSS specificity of a selector: (classes and attribute conditions, tags)"""
+    conditions = tags = 0
+    for compound in selector.split():
+        tag, parts = _parse_compound(compound)
+        conditions += len(parts)
+        tags += tag != "*"
+    return conditions, tags
+
+def selector_priorities(selectors: List[str]) -> List[int]:
+    """
+    Priority of each declared fallback selector: consecutive selectors of equal
+    specificity share one, so reordering them never puts a broad selector ahead
+    of a more specific one declared before it
+    """
+    priorities = []
+    for position, selector in enumerate(selectors):
+        if position and selector_specificity(selector) == selector_specificity(selectors[position - 1]):
+            priorities.append(priorities[-1])
+        else:
+            priorities.append(position)
+    return priorities
+
+_STRING_VALUE = etree.XPath("string()")
+
+# Per-selector cost, collected only while profiling is on (parser benchmarks)
+_profile: Optional[Dict[Tuple[str, str, str], Dict[str, float]]] = None
+
+def start_profiling() -> None:
+    """Start recording calls, hits and time spent per (extractor, field, selector)"""
+    global _profile
+    _profile = {}
+
+def stop_profiling() -> Dict[Tuple[str, str, str], Dict[str, float]]:
+    """Stop profiling and return the recorded selector stats"""
+    global _profile
+    profile, _profile = _profile or {}, None
+    return profile
+
+def _run_profiled(extractor: str, field: str, selector: str, xpath: etree.XPath, container: Any) -> List[Any]:
+    started = time.perf_counter()
+    result = xpath(container)
+    stats = _profile.setdefault((extractor, field, selector), {"calls": 0, "hits": 0, "seconds": 0.0})
+    stats["calls"] += 1
+    stats["hits"] += 1 if result else 0
+    stats["seconds"] += time.perf_counter() - started
+    return result
+
+def element_text(element: Any) -> str:
+    """All text below an element, like BeautifulSoup's .text"""
+    return str(_STRING_VALUE(element))
+
+class ListingExtractor:
+    """
+    Extracts product containers and their fields from a listing page.
+
+    Container selectors are tried in order: the containers of the first selector
+    that matches anything are returned. Each field has a list of fallback selectors,
+    tried in the order learned by the selector registry (declared order at first);
+    only selectors of equal specificity next to each other trade places.
+    """
+
+    def __init__(self, name: str, containers: List[str], fields: Dict[str, List[str]]):
+        self.name = name
+        self.container_matchers = [ContainerMatcher(selector) for selector in containers]
+        tags = {matcher.tag for matcher in self.container_matchers}
+        # Only ask the parser for events on tags that can be containers
+        self.container_tags = None if "*" in tags else tuple(tags)
+        self.fields = {
+            name: [(selector, compile_selector(selector)) for selector in selectors]
+            for name, selectors in fields.items()
+        }
+        for field, selectors in fields.items():
+            selector_registry.declare(name, field, list(zip(selectors, selector_priorities(selectors))))
+        self._ordered_version = None
+        self._ordered_fields: Dict[str, List[Tuple[str, etree.XPath]]] = self.fields
+
+    def _field_selectors(self, field: str) -> List[Tuple[str, etree.XPath]]:
+        """Selectors of a field, most successful first"""
+        version = selector_registry.get_version()
+        if version != self._ordered_version:
+            ordered = {}
+            for name, selectors in self.fields.items():
+                preferred = selector_registry.get_order(self.name, name) or []
+                rank = {selector: position for position, selector in enumerate(preferred)}
+                # Before the first merge the declared order is used
+                ordered[name] = sorted(selectors, key=lambda item: rank.get(item[0], len(rank)))
+            self._ordered_fields = ordered
+            self._ordered_version = version
+        return self._ordered_fields[field]
+
+    def _iter_events(self, html_content: str) -> Iterator[Tuple[str, Any]]:
+        parser = etree.HTMLPullParser(events=("start", "end"), tag=self.container_tags)
+        for offset in range(0, len(html_content), _FEED_CHUNK_SIZE):
+            parser.feed(html_content[offset:offset + _FEED_CHUNK_SIZE])
+            yield from parser.read_events()
+        parser.close()
+        yield from parser.read_events()
+
+    def iter_containers(self, html_content: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Stream a page and yield each complete product container.
+        Elements outside containers are discarded as soon as they are closed,
+        so only container subtrees stay in memory.
+
+        Args:
+            html_content: Page HTML
+
+        Yields:
+            (index of the matching container selector, container element)
+        """
+        current = None
+        current_index = None
+
+        for event, element in self._iter_events(html_content):
+            if event == "start":
+                # Inside a container, only a higher priority selector can start another one:
+                # a primary container nested in an element matched by a fallback replaces it
+                limit = len(self.container_matchers) if current is None else current_index
+                for index, matcher in enumerate(self.container_matchers[:limit]):
+                    if matcher.matches(element):
+                        current, current_index = element, index
+                        break
+                continue
+
+            if element is current:
+                yield current_index, element
+                current = None
+            elif current is not None:
+                continue  # still inside a container
+
+            # Nothing below a closed element can start a container any more
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    def containers(self, html_content: str) -> Iterator[Any]:
+        """
+        Yield the containers of the first container selector that matches the page.
+        Containers are yielded while the page is streamed when the first selector
+        matches; fallback selectors need the whole page to be scanned first.
+        """
+        fallback: Dict[int, List[Any]] = {}
+        found_primary = False
+
+        for index, element in self.iter_containers(html_content):
+            if index == 0:
+                found_primary = True
+                yield element
+            elif not found_primary:
+                # Keep a detached copy, the streamed element is cleared afterwards
+                fallback.setdefault(index, []).append(copy.deepcopy(element))
+
+        if not found_primary and fallback:
+            yield from fallback[min(fallback)]
+
+    def _select(self, container: Any, field: str, selector: str, xpath: etree.XPath) -> List[Any]:
+        if _profile is not None:
+            return _run_profiled(self.name, field, selector, xpath, container)
+        return xpath(container)
+
+    def first(self, container: Any, field: str) -> Optional[Any]:
+        """Get the element matched by the first selector of a field that matches"""
+        for selector, xpath in self._field_selectors(field):
+            result = self._select(container, field, selector, xpath)
+            selector_registry.record(self.name, field, selector, bool(result))
+            if result:
+                return result[0]
+        return None
+
+    def extract(self, container: Any, field: str, parse: Callable[[Any], Any]) -> Any:
+        """
+        Try a field's selectors in order and return the first successfully parsed value
+
+        Args:
+            container: Product container element
+            field: Field name
+            parse: Turns the first element matched by a selector into a value, or None to try the next selector
+
+        Returns:
+            The parsed value or None if no selector produced one
+        """
+        for selector, xpath in self._field_selectors(field):
+            result = self._select(container, field, selector, xpath)
+            value = parse(result[0]) if result else None
+            selector_registry.record(self.name, field, selector, value is not None)
+            if value is not None:
+                return value
+        return None
@@ -0,0 +1,322 @@
+"""
+HTTP Cache Utility
+Content-addressed on-disk cache for scraped pages with conditional GET support.
+Parsed product records are cached next to the page body they came from, so an
+unchanged page is neither downloaded nor parsed again.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+class CachedPage:
+    """A page body returned by the fetch engine"""
+
+    def __init__(self, url: str, body: str, digest: str, from_cache: bool = False):
+        self.url = url
+        self.body = body
+        self.digest = digest          # sha256 of the body, shared by identical pages
+        self.from_cache = from_cache  # True for fresh hits and 304 revalidations
+
+# Freshness windows keyed by host, set from Source rows
+_ttls: Dict[str, int] = {}
+
+# In-memory index of the cache directory, in least-recently-used order
+_lock = threading.RLock()
+_loaded = False
+_entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # url key -> entry metadata
+_bodies: Dict[str, int] = {}                                   # body digest -> size in bytes
+_parsed: "OrderedDict[Tuple[str, str], int]" = OrderedDict()   # (digest, parse key) -> size in bytes
+_total_bytes = 0
+_stats = {"hits": 0, "stale": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0,
+          "parsed_hits": 0, "parsed_misses": 0}
+
+def _path(*parts: str) -> str:
+    return os.path.join(settings.HTTP_CACHE_DIR, *parts)
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def _parsed_name(digest: str, parse_key: str) -> str:
+    return f"{digest}.{hashlib.sha1(parse_key.encode('utf-8')).hexdigest()[:16]}.json"
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _load() -> None:
+    """Rebuild the in-memory index from the cache directory (once per process)"""
+    global _loaded, _total_bytes
+
+    if _loaded:
+        return
+    _loaded = True
+
+    for folder in ("entries", "bodies", "parsed"):
+        os.makedirs(_path(folder), exist_ok=True)
+
+    for name in os.listdir(_path("bodies")):
+        _bodies[name] = os.path.getsize(_path("bodies", name))
+
+    entries = []
+    for name in os.listdir(_path("entries")):
+        if not name.endswith(".json"):
+            _remove_file(_path("entries", name))
+            continue
+        try:
+            with open(_path("entries", name), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            _remove_file(_path("entries", name))
+            continue
+        if entry.get("digest") in _bodies:
+            entries.append(entry)
+        else:
+            _remove_file(_path("entries", name))
+
+    # Oldest first so the LRU order survives restarts approximately
+    for entry in sorted(entries, key=lambda e: e.get("accessed_at", 0)):
+        _entries[entry["key"]] = entry
+
+    for name in os.listdir(_path("parsed")):
+        digest, parse_hash, _ = name.split(".", 2)
+        _parsed[(digest, parse_hash)] = os.path.getsize(_path("parsed", name))
+
+    _total_bytes = sum(_bodies.values()) + sum(_parsed.values())
+
+def configure_source(source: Any) -> None:
+    """Apply the freshness window column of a Source row to its host"""
+    host = urlsplit(source.base_url).netloc.lower()
+    with _lock:
+        if source.cache_ttl is None:
+            _ttls.pop(host, None)
+        else:
+            _ttls[host] = source.cache_ttl
+
+def get_ttl(url: str) -> int:
+    """Get the freshness window in seconds for a URL's host"""
+    return _ttls.get(urlsplit(url).netloc.lower(), settings.HTTP_CACHE_TTL)
+
+def lookup(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the cache entry for a URL
+
+    Args:
+        url: Page URL
+
+    Returns:
+        Entry metadata with an extra "fresh" flag, or None if the URL is not cached
+    """
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+
+    with _lock:
+        _load()
+        entry = _entries.get(_url_key(url))
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+
+        fresh = time.time() - entry["stored_at"] < get_ttl(url)
+        _stats["hits" if fresh else "stale"] += 1
+        return {**entry, "fresh": fresh}
+
+def read_body(entry: Dict[str, Any]) -> Optional[str]:
+    """Read the body of a cache entry, touching it for LRU purposes"""
+    try:
+        with open(_path("bodies", entry["digest"]), encoding="utf-8") as f:
+            body = f.read()
+    except OSError:
+        return None
+
+    with _lock:
+        stored = _entries.get(entry["key"])
+        if stored is not None:
+            stored["accessed_at"] = time.time()
+            _entries.move_to_end(entry["key"])
+    return body
+
+def revalidated(entry: Dict[str, Any]) -> None:
+    """Record a 304 response: the stored body is fresh again"""
+    with _lock:
+        _stats["revalidated"] += 1
+        stored = _entries.get(entry["key"])
+        if stored is None:
+            return
+        stored["stored_at"] = time.time()
+        _write_entry(stored)
+
+def _write_entry(entry: Dict[str, Any]) -> None:
+    tmp_path = _path("entries", f"{entry['key']}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, _path("entries", f"{entry['key']}.json"))
+
+def store(url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> str:
+    """
+    Store a downloaded page
+
+    Args:
+        url: Page URL
+        body: Response body
+        etag: ETag response header, if any
+        last_modified: Last-Modified response header, if any
+
+    Returns:
+        The body digest
+    """
+    global _total_bytes
+
+    data = body.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if not settings.HTTP_CACHE_ENABLED:
+        return digest
+
+    with _lock:
+        _load()
+        _stats["stores"] += 1
+
+        if digest not in _bodies:
+            with open(_path("bodies", digest), "wb") as f:
+                f.write(data)
+            _bodies[digest] = len(data)
+            _total_bytes += len(data)
+
+        now = time.time()
+        entry = {
+            "key": _url_key(url),
+            "url": url,
+            "digest": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": now,
+            "accessed_at": now
+        }
+        previous = _entries.pop(entry["key"], None)
+        _entries[entry["key"]] = entry
+        _write_entry(entry)
+
+        if previous and previous["digest"] != digest:
+            _release_body(previous["digest"])
+
+        _evict()
+
+    return digest
+
+def get_parsed(digest: str, parse_key: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the product records parsed from a page body
+
+    Args:
+        digest: Body digest
+        parse_key: Identifies the parser and its inputs (source, gender, parser version)
+
+    Returns:
+        Cached product records or None
+    """
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+
+    name = _parsed_name(digest, parse_key)
+    with _lock:
+        _load()
+        key = (digest, name.split(".")[1])
+        if key not in _parsed:
+            _stats["parsed_misses"] += 1
+            return None
+        _parsed.move_to_end(key)
+
+    try:
+        with open(_path("parsed", name), encoding="utf-8") as f:
+            products = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    with _lock:
+        _stats["parsed_hits"] += 1
+    return products
+
+def put_parsed(digest: str, parse_key: str, products: List[Dict[str, Any]]) -> None:
+    """Store the product records parsed from a cached page body"""
+    global _total_bytes
+
+    if not settings.HTTP_CACHE_ENABLED:
+        return
+
+    name = _parsed_name(digest, parse_key)
+    data = json.dumps(products).encode("utf-8")
+
+    with _lock:
+        _load()
+        if digest not in _bodies:
+            return  # body already evicted
+        key = (digest, name.split(".")[1])
+        with open(_path("parsed", name), "wb") as f:
+            f.write(data)
+        _total_bytes += len(data) - _parsed.pop(key, 0)
+        _parsed[key] = len(data)
+        _evict()
+
+def _release_body(digest: str) -> None:
+    """Delete a body and its parsed records once no entry refers to it"""
+    global _total_bytes
+
+    if any(entry["digest"] == digest for entry in _entries.values()):
+        return
+
+    _total_bytes -= _bodies.pop(digest, 0)
+    _remove_file(_path("bodies", digest))
+
+    for key in [key for key in _parsed if key[0] == digest]:
+        _total_bytes -= _parsed.pop(key)
+        _remove_file(_path("parsed", f"{key[0]}.{key[1]}.json"))
+
+def _evict() -> None:
+    """Drop least recently used entries until the cache fits its byte budget"""
+    while _total_bytes > settings.HTTP_CACHE_MAX_BYTES and _entries:
+        key, entry = _entries.popitem(last=False)
+        _remove_file(_path("entries", f"{key}.json"))
+        _release_body(entry["digest"])
+        _stats["evictions"] += 1
+
+def clear() -> None:
+    """Remove every cached page and parsed record"""
+    global _total_bytes
+
+    with _lock:
+        _load()
+        for key in list(_entries):
+            _remove_file(_path("entries", f"{key}.json"))
+        for digest in list(_bodies):
+            _remove_file(_path("bodies", digest))
+        for digest, parse_hash in list(_parsed):
+            _remove_file(_path("parsed", f"{digest}.{parse_hash}.json"))
+        _entries.clear()
+        _bodies.clear()
+        _parsed.clear()
+        _total_bytes = 0
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters and size of the page cache
+
+    Returns:
+        Dictionary with counters, entry count and bytes used
+    """
+    with _lock:
+        return {
+            **_stats,
+            "entries": len(_entries),
+            "bodies": len(_bodies),
+            "parsed": len(_parsed),
+            "size_bytes": _total_bytes,
+            "max_bytes": settings.HTTP_CACHE_MAX_BYTES
+        }
@@ -0,0 +1,119 @@
+"""
+HTTP Session Registry Utility
+Keeps one pooled keep-alive client session per source base URL
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.config import settings
+
+# Pool sizes keyed by origin, set from Source rows (any thread)
+_pool_sizes_lock = threading.Lock()
+_pool_sizes: Dict[str, int] = {}
+
+# Sessions and counters keyed by origin, only touched from the fetch engine loop
+_sessions: Dict[str, aiohttp.ClientSession] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+def get_origin(url: str) -> str:
+    """Get the scheme://host part of a URL, used as the session key"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+def configure_source(source: Any) -> None:
+    """Apply the pool size column of a Source row to its base URL"""
+    origin = get_origin(source.base_url)
+    with _pool_sizes_lock:
+        _pool_sizes[origin] = source.http_pool_size or settings.HTTP_POOL_SIZE
+
+def get_pool_size(origin: str) -> int:
+    """Get the configured connection pool size for an origin"""
+    with _pool_sizes_lock:
+        return _pool_sizes.get(origin, settings.HTTP_POOL_SIZE)
+
+def _build_trace_config(origin: str) -> aiohttp.TraceConfig:
+    """Count new and reused connections so pooling can be observed"""
+    stats = _stats.setdefault(origin, {"requests": 0, "connections_created": 0, "connections_reused": 0})
+
+    async def on_request_start(session, context, params):
+        stats["requests"] += 1
+
+    async def on_connection_create_end(session, context, params):
+        stats["connections_created"] += 1
+
+    async def on_connection_reuseconn(session, context, params):
+        stats["connections_reused"] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+def _create_session(origin: str, pool_size: int) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL
+    )
+    return aiohttp.ClientSession(connector=connector, trace_configs=[_build_trace_config(origin)])
+
+async def _close_later(session: aiohttp.ClientSession) -> None:
+    """Close a replaced session once the requests still using it have timed out"""
+    await asyncio.sleep(settings.REQUEST_TIMEOUT)
+    await session.close()
+
+async def get_session(url: str) -> aiohttp.ClientSession:
+    """
+    Get the pooled session for the origin of a URL. Must run on the fetch engine loop.
+
+    Args:
+        url: URL about to be fetched
+
+    Returns:
+        The origin's client session (created or resized on demand)
+    """
+    origin = get_origin(url)
+    pool_size = get_pool_size(origin)
+    session = _sessions.get(origin)
+
+    if session is not None and not session.closed and session.connector.limit != pool_size:
+        # Pool size changed; let requests in flight on the old session finish
+        asyncio.ensure_future(_close_later(session))
+        session = None
+
+    if session is None or session.closed:
+        session = _create_session(origin, pool_size)
+        _sessions[origin] = session
+
+    return session
+
+async def close_all() -> None:
+    """Close every pooled session. Must run on the fetch engine loop."""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        if not session.closed:
+            await session.close()
+
+def get_session_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get pool sizes and connection reuse counters per origin
+
+    Returns:
+        Dictionary keyed by origin
+    """
+    stats = {}
+    for origin, counters in list(_stats.items()):
+        session: Optional[aiohttp.ClientSession] = _sessions.get(origin)
+        stats[origin] = {
+            "pool_size": get_pool_size(origin),
+            "open": session is not None and not session.closed,
+            **counters
+        }
+    return stats
@@ -0,0 +1,158 @@
+"""
+Parse Pool Utility
+Runs CPU-bound listing page parsers in a pool of worker processes, so parsing
+uses several cores and never holds the GIL of the process serving API requests
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils import selector_registry
+
+# Workers are spawned rather than forked: the API process runs the fetch engine
+# and database threads, which must not be copied into the children
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "failed": 0, "inline": 0, "restarts": 0, "busy_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the worker pool, creating it on first use
+
+    Returns:
+        The process pool, or None when PARSE_WORKERS is 0 (parse in-process)
+    """
+    global _pool
+
+    if settings.PARSE_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    """Replace a pool whose worker died (e.g. killed by the OOM killer)"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+            with _stats_lock:
+                _stats["restarts"] += 1
+    broken.shutdown(wait=False)
+
+def _timed_call(func: Callable, args: tuple, selector_orders: tuple) -> Any:
+    """
+    Runs in the worker: call the parser with the selector orders learned so far,
+    and report how long it took and which selectors hit
+    """
+    selector_registry.apply_orders(*selector_orders)
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started, selector_registry.take_pending()
+
+def _record(pool: Optional[ProcessPoolExecutor], future: Future) -> None:
+    failed = future.cancelled() or future.exception() is not None
+    if not failed:
+        selector_registry.merge(future.result()[2])
+
+    if pool is None:
+        return  # parsed inline
+
+    with _stats_lock:
+        if failed:
+            _stats["failed"] += 1
+        else:
+            _stats["completed"] += 1
+            _stats["busy_seconds"] += future.result()[1]
+
+    if failed and not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _reset_pool(pool)
+
+def submit(func: Callable, *args: Any) -> Future:
+    """
+    Run a parser in a worker process
+
+    Args:
+        func: Module-level function (it is pickled by name), e.g. parse_amazon
+        *args: Picklable arguments, e.g. the page HTML and gender
+
+    Returns:
+        Future resolving to (result, seconds spent in the worker, selector counters)
+    """
+    selector_orders = selector_registry.get_orders()
+    pool = get_pool()
+    if pool is None:
+        with _stats_lock:
+            _stats["inline"] += 1
+        future: Future = Future()
+        future.add_done_callback(functools.partial(_record, None))
+        future.set_result(_timed_call(func, args, selector_orders))
+        return future
+
+    try:
+        future = pool.submit(_timed_call, func, args, selector_orders)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = get_pool()
+        future = pool.submit(_timed_call, func, args, selector_orders)
+
+    with _stats_lock:
+        _stats["submitted"] += 1
+    future.add_done_callback(functools.partial(_record, pool))
+    return future
+
+def run(func: Callable, *args: Any) -> Any:
+    """
+    Run a parser in a worker process and block the calling thread for its result.
+    A worker crash raises BrokenProcessPool; the pool is replaced for the next call.
+
+    Returns:
+        The parser's return value
+    """
+    return submit(func, *args).result()[0]
+
+async def run_async(func: Callable, *args: Any) -> Any:
+    """
+    Run a parser in a worker process without blocking the event loop
+
+    Returns:
+        The parser's return value
+    """
+    result = await asyncio.wrap_future(submit(func, *args))
+    return result[0]
+
+def shutdown() -> None:
+    """Stop the worker processes"""
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get worker count and task counters of the parse pool
+
+    Returns:
+        Dictionary with counters and the time spent parsing in workers
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+    stats["workers"] = settings.PARSE_WORKERS
+    stats["pending"] = stats["submitted"] - stats["completed"] - stats["failed"]
+    return stats
@@ -0,0 +1,141 @@
+"""
+Rate Limiter Utility
+Provides per-host token buckets so each marketplace is throttled independently
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+class TokenBucket:
+    """
+    Token bucket allowing `burst` back-to-back requests, refilled at `rate` tokens per second.
+    Waiting callers reserve their token up front, so they are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reconfigure(self, rate: float, burst: int) -> None:
+        """Change the refill rate and burst size, keeping the tokens already earned"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.burst = burst
+            self.tokens = min(self.tokens, burst)
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if the bucket is empty
+
+        Returns:
+            Seconds the caller must wait before using the token
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for a token without blocking the event loop"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# Buckets keyed by host
+_buckets_lock = threading.Lock()
+_buckets: Dict[str, TokenBucket] = {}
+
+def _default_rate() -> float:
+    """Default refill rate derived from the seconds-between-requests setting"""
+    if settings.SCRAPING_RATE_LIMIT <= 0:
+        return 0.0
+    return 1.0 / settings.SCRAPING_RATE_LIMIT
+
+def get_bucket(host: str) -> TokenBucket:
+    """
+    Get the token bucket for a host, creating it with the default limits
+
+    Args:
+        host: Host name (e.g. www.amazon.in)
+
+    Returns:
+        The host's token bucket
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(_default_rate(), settings.SCRAPING_RATE_BURST)
+            _buckets[host] = bucket
+        return bucket
+
+def configure_host(host: str, rate: Optional[float] = None, burst: Optional[int] = None) -> TokenBucket:
+    """
+    Set the limits for a host. Missing values fall back to the global settings.
+
+    Args:
+        host: Host name
+        rate: Refill rate in requests per second
+        burst: Number of requests allowed back-to-back
+
+    Returns:
+        The host's token bucket
+    """
+    rate = rate if rate is not None else _default_rate()
+    burst = burst if burst else settings.SCRAPING_RATE_BURST
+
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            # New hosts start with a full bucket
+            bucket = TokenBucket(rate, burst)
+            _buckets[host] = bucket
+            return bucket
+
+    bucket.reconfigure(rate, burst)
+    return bucket
+
+def configure_source(source: Any) -> None:
+    """Apply the rate limit columns of a Source row to its host"""
+    host = urlsplit(source.base_url).netloc.lower()
+    if host:
+        configure_host(host, source.rate_limit_per_second, source.rate_limit_burst)
+
+def configure_sources(sources: Iterable[Any]) -> None:
+    """Apply the rate limit columns of several Source rows"""
+    for source in sources:
+        configure_source(source)
+
+async def acquire(host: str) -> None:
+    """Wait until a request to the host is allowed"""
+    await get_bucket(host).acquire()
+
+def get_limiter_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Get the current limits and available tokens per host
+
+    Returns:
+        Dictionary keyed by host
+    """
+    with _buckets_lock:
+        buckets = dict(_buckets)
+
+    stats = {}
+    for host, bucket in buckets.items():
+        with bucket._lock:
+            bucket._refill(time.monotonic())
+            stats[host] = {"rate": bucket.rate, "burst": bucket.burst, "tokens": round(bucket.tokens, 3)}
+    return stats
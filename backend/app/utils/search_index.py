@@ -0,0 +1,288 @@
+"""
+Search Index Utility
+Keeps an in-memory inverted index of listed products (name, brand, type, material,
+features) ranked with BM25, so typeahead searches are answered without a database
+round trip. Each entry also holds the product's listing as returned by the API.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Term weight of each indexed field (brand and type words say more than a feature bullet)
+FIELD_WEIGHTS = {"name": 1.0, "brand": 2.0, "type": 1.5, "material": 0.7, "features": 0.5}
+
+# Terms a query prefix may expand to (typeahead on the last term), most frequent first
+MAX_PREFIX_TERMS = 50
+
+_lock = threading.Lock()
+_postings: Dict[str, Dict[int, float]] = {}  # term -> {product id: weighted term frequency}
+_docs: Dict[int, Dict[str, Any]] = {}        # product id -> frequencies, length, gender, price, listing
+_total_length = 0.0
+_vocabulary: List[str] = []                  # sorted terms, rebuilt lazily for prefix lookups
+_vocabulary_dirty = False
+_ready = False
+_building = False
+_changed_during_build: Dict[int, Optional[Dict[str, Any]]] = {}  # product id -> entry (None when removed)
+_stats = {"searches": 0, "updates": 0, "removals": 0, "built_at": None, "build_seconds": 0.0,
+          "refreshes": 0, "refreshed_at": None, "last_refresh_products": 0}
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens with plural endings stripped ("Boxers" -> "boxer")"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _entry(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Weighted term frequencies and filter attributes of a product"""
+    frequencies: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = document["fields"].get(field)
+        texts = value if isinstance(value, (list, tuple)) else [value]
+        for text in texts:
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+    return {
+        "frequencies": frequencies,
+        "length": sum(frequencies.values()),
+        "gender": document.get("gender"),
+        "price": document.get("price"),
+        "listing": document["listing"]
+    }
+
+def _mark_vocabulary_dirty() -> None:
+    global _vocabulary_dirty
+    _vocabulary_dirty = True
+
+def _remove_locked(product_id: int) -> None:
+    global _total_length
+    doc = _docs.pop(product_id, None)
+    if doc is None:
+        return
+    _total_length -= doc["length"]
+    for term in doc["frequencies"]:
+        postings = _postings.get(term)
+        if postings is not None:
+            postings.pop(product_id, None)
+            if not postings:
+                del _postings[term]
+                _mark_vocabulary_dirty()
+
+def _add_locked(product_id: int, entry: Dict[str, Any]) -> None:
+    global _total_length
+    _remove_locked(product_id)
+    for term, frequency in entry["frequencies"].items():
+        postings = _postings.get(term)
+        if postings is None:
+            postings = _postings[term] = {}
+            _mark_vocabulary_dirty()
+        postings[product_id] = frequency
+    _docs[product_id] = entry
+    _total_length += entry["length"]
+
+def add_documents(documents: Iterable[Dict[str, Any]]) -> int:
+    """
+    Add or replace products in the index
+
+    Args:
+        documents: Dicts with "id", "gender", "price", "fields" (field name -> text or list
+            of texts) and "listing" (the product as returned by search)
+
+    Returns:
+        Number of products indexed
+    """
+    entries = [(document["id"], _entry(document)) for document in documents]
+    with _lock:
+        for product_id, entry in entries:
+            _add_locked(product_id, entry)
+            if _building:
+                _changed_during_build[product_id] = entry
+        _stats["updates"] += len(entries)
+    return len(entries)
+
+def remove(product_id: int) -> None:
+    """Drop a product from the index"""
+    with _lock:
+        _remove_locked(product_id)
+        if _building:
+            _changed_during_build[product_id] = None
+        _stats["removals"] += 1
+
+def replace_all(documents: Iterable[Dict[str, Any]]) -> int:
+    """
+    Rebuild the index from scratch. Searches keep using the current index until the new
+    one is complete; products added or removed meanwhile are carried over.
+
+    Args:
+        documents: All listed products, as for add_documents()
+
+    Returns:
+        Number of products indexed
+    """
+    global _postings, _docs, _total_length, _building, _ready
+
+    started = time.perf_counter()
+    with _lock:
+        _building = True
+        _changed_during_build.clear()
+
+    postings: Dict[str, Dict[int, float]] = {}
+    docs: Dict[int, Dict[str, Any]] = {}
+    total_length = 0.0
+    try:
+        for document in documents:
+            entry = _entry(document)
+            for term, frequency in entry["frequencies"].items():
+                postings.setdefault(term, {})[document["id"]] = frequency
+            docs[document["id"]] = entry
+            total_length += entry["length"]
+    except Exception:
+        with _lock:
+            _building = False
+            _changed_during_build.clear()
+        raise
+
+    with _lock:
+        _postings, _docs, _total_length = postings, docs, total_length
+        _mark_vocabulary_dirty()
+        # The rows read may predate changes made while they were being read
+        for product_id, entry in _changed_during_build.items():
+            if entry is None:
+                _remove_locked(product_id)
+            else:
+                _add_locked(product_id, entry)
+        _changed_during_build.clear()
+        _building = False
+        _ready = True
+        _stats["built_at"] = time.time()
+        _stats["build_seconds"] = round(time.perf_counter() - started, 3)
+        return len(_docs)
+
+def record_refresh(count: int) -> None:
+    """
+    Note a completed pass that brought the index up to date with the database
+
+    Args:
+        count: Number of products (re)indexed by the pass
+    """
+    with _lock:
+        _stats["refreshes"] += 1
+        _stats["refreshed_at"] = time.time()
+        _stats["last_refresh_products"] = count
+
+def is_ready() -> bool:
+    """Whether the index has been built since startup"""
+    return _ready
+
+def _expand_prefix(prefix: str) -> List[str]:
+    """
+    Indexed terms starting with prefix, in the most documents first when there are more
+    than MAX_PREFIX_TERMS (called with the lock held)
+    """
+    global _vocabulary, _vocabulary_dirty
+    if _vocabulary_dirty:
+        _vocabulary = sorted(_postings)
+        _vocabulary_dirty = False
+    # Terms are [a-z0-9], so every completion sorts before prefix + "~"
+    start = bisect.bisect_left(_vocabulary, prefix)
+    end = bisect.bisect_left(_vocabulary, prefix + "~", start)
+    if end - start <= MAX_PREFIX_TERMS:
+        return _vocabulary[start:end]
+    # The first ones alphabetically could all be rare terms, crowding out common ones
+    return heapq.nlargest(MAX_PREFIX_TERMS, _vocabulary[start:end], key=lambda term: len(_postings[term]))
+
+def search(query: str, gender: Optional[str] = None, min_price: Optional[float] = None,
+           max_price: Optional[float] = None, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Find products containing every query term, best BM25 score first.
+    The last term also matches as a prefix, for search-as-you-type.
+
+    Args:
+        query: Search text
+        gender: Optional gender value ("men", "women", "unisex")
+        min_price: Optional minimum lowest price
+        max_price: Optional maximum lowest price
+        skip: Results to skip
+        limit: Maximum results
+
+    Returns:
+        Listings of the matching products
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    with _lock:
+        _stats["searches"] += 1
+        doc_count = len(_docs)
+        if not doc_count:
+            return []
+        average_length = _total_length / doc_count
+
+        # Every term is a group of alternatives: itself, or its completions for the last term
+        groups = [[term] for term in terms[:-1]]
+        last = terms[-1]
+        groups.append(list(dict.fromkeys([last] + _expand_prefix(last))))
+
+        scores: Optional[Dict[int, float]] = None
+        # Rarest group first, so the candidate set shrinks as fast as possible
+        for group in sorted(groups, key=lambda group: sum(len(_postings.get(term, ())) for term in group)):
+            group_scores: Dict[int, float] = {}
+            for term in group:
+                postings = _postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, frequency in postings.items():
+                    if scores is not None and product_id not in scores:
+                        continue
+                    length = _docs[product_id]["length"]
+                    score = idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+                    # A document matching several completions counts its best one
+                    group_scores[product_id] = max(group_scores.get(product_id, 0.0), score)
+
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {product_id: scores[product_id] + score for product_id, score in group_scores.items()}
+            if not scores:
+                return []
+
+        results = []
+        for product_id, score in scores.items():
+            doc = _docs[product_id]
+            if gender and doc["gender"] != gender:
+                continue
+            if min_price is not None and (doc["price"] is None or doc["price"] < min_price):
+                continue
+            if max_price is not None and (doc["price"] is None or doc["price"] > max_price):
+                continue
+            results.append((score, product_id, doc["listing"]))
+
+    results.sort(key=lambda result: (-result[0], result[1]))
+    return [listing for _, _, listing in results[skip:skip + limit]]
+
+def get_index_stats() -> Dict[str, Any]:
+    """
+    Get the size and counters of the search index
+
+    Returns:
+        Dictionary of metrics
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["ready"] = _ready
+        stats["products"] = len(_docs)
+        stats["terms"] = len(_postings)
+        stats["postings"] = sum(len(postings) for postings in _postings.values())
+    return stats
@@ -0,0 +1,150 @@
+"""
+Selector Registry Utility
+Records how often each fallback selector of a listing extractor field produces
+a value and tries the selectors with the best hit rate first, so the common case
+costs one lookup per field even after a marketplace changes its markup.
+Selectors only move within their declared priority: a broad selector is never
+tried before a more specific one declared ahead of it.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+FieldKey = Tuple[str, str]  # (extractor name, field)
+
+_lock = threading.Lock()
+
+# Counters recorded by this process and not yet merged into the totals.
+# Parse workers send them back to the API process with every parse result.
+_pending: Dict[FieldKey, Dict[str, List[int]]] = {}
+
+# Merged counters ([calls, hits] per selector) and the resulting selector order
+_totals: Dict[FieldKey, Dict[str, List[float]]] = {}
+_orders: Dict[FieldKey, List[str]] = {}
+_version = 0
+
+# Declared selectors of every field: selector -> (priority, declared position)
+_declared: Dict[FieldKey, Dict[str, Tuple[int, int]]] = {}
+
+def declare(extractor: str, field: str, selectors: List[Tuple[str, int]]) -> None:
+    """
+    Register the declared selectors of a field (called by the extractors)
+
+    Args:
+        extractor: Extractor name
+        field: Field name
+        selectors: (selector, priority) in declared order; only selectors of
+            equal priority are reordered by hit rate, lower priorities go first
+    """
+    with _lock:
+        _declared[(extractor, field)] = {
+            selector: (priority, position) for position, (selector, priority) in enumerate(selectors)
+        }
+
+def record(extractor: str, field: str, selector: str, hit: bool) -> None:
+    """Count one lookup of a selector (called by the extractors)"""
+    with _lock:
+        counters = _pending.setdefault((extractor, field), {}).setdefault(selector, [0, 0])
+        counters[0] += 1
+        if hit:
+            counters[1] += 1
+
+def take_pending() -> Dict[FieldKey, Dict[str, List[int]]]:
+    """Get and reset the counters recorded since the last call"""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    return pending
+
+def merge(counters: Dict[FieldKey, Dict[str, List[int]]]) -> None:
+    """
+    Add counters recorded by a parse to the totals and reorder the affected fields
+
+    Args:
+        counters: Result of take_pending(), possibly from a worker process
+    """
+    global _version
+
+    with _lock:
+        for key, selectors in counters.items():
+            totals = _totals.setdefault(key, {})
+            for selector, (calls, hits) in selectors.items():
+                total = totals.setdefault(selector, [0, 0])
+                total[0] += calls
+                total[1] += hits
+
+            # Halve old counts regularly, so a markup change is picked up quickly
+            if sum(calls for calls, _ in totals.values()) > settings.SELECTOR_STATS_WINDOW:
+                for total in totals.values():
+                    total[0] /= 2
+                    total[1] /= 2
+
+            declared = _declared.get(key, {})
+            current = _orders.get(key, [])
+            known = list(dict.fromkeys(current + list(declared) + list(totals)))
+
+            def rank(selector: str) -> Tuple[int, float]:
+                # Priority first, then hit rate; sorted() is stable so ties keep the current order.
+                # Raw hits would favour whichever selector is tried first, it gets every call
+                priority = declared[selector][0] if selector in declared else len(declared)
+                calls, hits = totals.get(selector, [0, 0])
+                return priority, -(hits / calls if calls else 0.0)
+
+            order = sorted(known, key=rank)
+            if order != current:
+                _orders[key] = order
+                _version += 1
+
+def get_version() -> int:
+    """Get a number that changes whenever a selector order changes"""
+    return _version
+
+def get_orders() -> Tuple[int, Dict[FieldKey, List[str]]]:
+    """Get the version and a copy of the selector order of every field"""
+    with _lock:
+        return _version, {key: list(order) for key, order in _orders.items()}
+
+def apply_orders(version: int, orders: Dict[FieldKey, List[str]]) -> None:
+    """Adopt the selector orders learned by the API process (called in parse workers)"""
+    global _version
+    with _lock:
+        if version != _version:
+            _orders.clear()
+            _orders.update(orders)
+            _version = version
+
+def get_order(extractor: str, field: str) -> Optional[List[str]]:
+    """Get the preferred selector order of a field, or None to use the declared order"""
+    return _orders.get((extractor, field))
+
+def reset() -> None:
+    """Forget all counters and go back to the declared selector order"""
+    global _version
+    with _lock:
+        _pending.clear()
+        _totals.clear()
+        _orders.clear()
+        _version += 1
+
+def get_selector_stats() -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Get the hit counters of every selector, in the order they are tried
+
+    Returns:
+        Dictionary keyed by extractor name, then field
+    """
+    with _lock:
+        stats: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for (extractor, field), totals in _totals.items():
+            order = _orders.get((extractor, field)) or list(totals)
+            stats.setdefault(extractor, {})[field] = [
+                {
+                    "selector": selector,
+                    "calls": round(totals[selector][0]),
+                    "hits": round(totals[selector][1]),
+                    "hit_rate": round(totals[selector][1] / totals[selector][0], 3) if totals[selector][0] else None
+                }
+                for selector in order if selector in totals
+            ]
+        return stats
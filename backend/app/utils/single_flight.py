@@ -0,0 +1,109 @@
+"""
+Single Flight Utility
+Coalesces identical concurrent work: the first caller for a key runs it, callers
+arriving while it runs wait for that result instead of repeating the work.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_lock = threading.Lock()
+_flights: Dict[Hashable, concurrent.futures.Future] = {}  # key -> future of the running work
+_stats = {"leaders": 0, "followers": 0, "errors": 0}
+
+def normalize_query(query: str) -> str:
+    """Search text as used in flight and cache keys: lower case, single spaces"""
+    return " ".join(query.lower().split())
+
+def claim(key: Hashable) -> Tuple[concurrent.futures.Future, bool]:
+    """
+    Join the flight of a key, starting it when none is running
+
+    Args:
+        key: Identity of the work
+
+    Returns:
+        The flight's future and True when the caller leads it; the leader must
+        settle it with finish() or chain()
+    """
+    with _lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            _stats["followers"] += 1
+            return flight, False
+        flight = _flights[key] = concurrent.futures.Future()
+        _stats["leaders"] += 1
+        return flight, True
+
+def finish(key: Hashable, flight: concurrent.futures.Future, result: Any = None,
+           error: Optional[BaseException] = None) -> None:
+    """Settle a flight and let the next caller start a new one"""
+    with _lock:
+        if _flights.get(key) is flight:
+            del _flights[key]
+        if error is not None:
+            _stats["errors"] += 1
+    if flight.done():
+        return
+    if error is not None:
+        flight.set_exception(error)
+    else:
+        flight.set_result(result)
+
+def chain(key: Hashable, flight: concurrent.futures.Future, source: Any) -> None:
+    """Settle a flight with the outcome of another future (concurrent or asyncio) once it is done"""
+    def settle(done: concurrent.futures.Future):
+        if done.cancelled():
+            finish(key, flight, error=concurrent.futures.CancelledError())
+        elif done.exception() is not None:
+            finish(key, flight, error=done.exception())
+        else:
+            finish(key, flight, result=done.result())
+    source.add_done_callback(settle)
+
+def do(key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run fn(*args) once for all concurrent callers with the same key
+
+    Args:
+        key: Identity of the work
+        fn: The work
+
+    Returns:
+        Result of the work (errors are raised to every caller)
+    """
+    flight, leader = claim(key)
+    if not leader:
+        return flight.result()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        finish(key, flight, error=e)
+        raise
+    finish(key, flight, result=result)
+    return result
+
+async def do_async(key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    do() for the event loop: the leader runs the blocking fn on a worker thread and
+    followers wait without holding the loop
+    """
+    flight, leader = claim(key)
+    if leader:
+        chain(key, flight, asyncio.get_running_loop().run_in_executor(None, fn, *args))
+    # Shielded: a caller that goes away must not cancel the flight of the others
+    return await asyncio.shield(asyncio.wrap_future(flight))
+
+def get_flight_stats() -> Dict[str, Any]:
+    """
+    Get single flight counters
+
+    Returns:
+        Flights in progress, flights started (leaders), callers that joined one
+        (followers) and failed flights
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["in_flight"] = len(_flights)
+    return stats
@@ -0,0 +1,227 @@
+"""
+Catalog query plans
+Runs each hot catalog query against the configured database and prints its
+EXPLAIN (ANALYZE, BUFFERS) plan and timings, to check the lookup indexes of
+database/migrations are used. Statements are captured from the real service
+code, so the plans follow the code as it changes.
+
+Seeded rows use brands starting with "Seed " and can be removed with --cleanup.
+
+Usage (from the backend directory):
+    python migrate.py
+    python -m benchmarks.explain_queries --seed 20000
+    python -m benchmarks.explain_queries --only filter_gender_brand --repeat 50
+    python -m benchmarks.explain_queries --cleanup
+"""
+import argparse
+import contextlib
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import and_, delete, event, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.models.product import Product, GenderEnum, product_source
+from app.models.review import Review
+from app.models.source import Source
+from app.schemas.product import ProductFilter, GenderEnum as SchemaGenderEnum
+from app.services.ingest_service import upsert_scraped_products
+from app.services.product_service import filter_products, search_products
+
+SEED_PREFIX = "Seed "
+TYPES = {
+    GenderEnum.men: ["Boxer", "Brief", "Trunk", "Vest", "Undershirt", "Men's Innerwear"],
+    GenderEnum.women: ["Bra", "Panty", "Thong", "Bikini", "Hipster", "Camisole", "Women's Innerwear"]
+}
+
+def seed(db: Session, product_count: int, brand_count: int = 200, reviews_per_product: int = 2) -> None:
+    """
+    Insert synthetic listings through the bulk upsert path, plus reviews
+
+    Args:
+        db: Database session
+        product_count: Products per source and gender
+        brand_count: Distinct brands
+        reviews_per_product: Average reviews per product
+    """
+    rng = random.Random(7)
+    sources = db.query(Source).all()
+    brands = [f"{SEED_PREFIX}{i:03d}" for i in range(brand_count)]
+
+    started = time.perf_counter()
+    for gender in (GenderEnum.men, GenderEnum.women):
+        for source in sources:
+            products = []
+            for i in range(product_count):
+                # Catalogs overlap, so most products are listed on several sources
+                number = rng.randrange(int(product_count * 1.5))
+                kind = TYPES[gender][number % len(TYPES[gender])]
+                price = rng.randint(199, 2999)
+                products.append({
+                    "id": f"{source.name[:2].upper()}{gender.value[0]}{number:07d}",
+                    "name": f"{kind} Pack {number}",
+                    "brand": brands[number % brand_count],
+                    "type": kind,
+                    "price": float(price),
+                    "original_price": float(price + rng.choice([0, 200, 400])),
+                    "source_url": f"{source.base_url}/p/{number}",
+                    "image": None
+                })
+            upsert_scraped_products(db, source.name, products, gender)
+    print(f"Seeded listings in {time.perf_counter() - started:.1f}s")
+
+    product_ids = [row[0] for row in db.execute(select(Product.id).where(Product.brand.like(f"{SEED_PREFIX}%")))]
+    source_ids = [source.id for source in sources]
+    reviews = [
+        {"product_id": rng.choice(product_ids), "source_id": rng.choice(source_ids), "rating": rng.randint(10, 50) / 10}
+        for _ in range(len(product_ids) * reviews_per_product)
+    ]
+    for offset in range(0, len(reviews), 5000):
+        db.execute(insert(Review), reviews[offset:offset + 5000])
+    db.commit()
+
+    with engine.connect() as connection:
+        for table in ("products", "product_source", "reviews"):
+            connection.exec_driver_sql(f"ANALYZE {table}")
+        connection.commit()
+    print(f"Seeded {len(product_ids)} products and {len(reviews)} reviews")
+
+def cleanup(db: Session) -> None:
+    """Remove the seeded products with their listings and reviews"""
+    seeded = select(Product.id).where(Product.brand.like(f"{SEED_PREFIX}%"))
+    db.execute(delete(Review).where(Review.product_id.in_(seeded)))
+    db.execute(delete(product_source).where(product_source.c.product_id.in_(seeded)))
+    count = db.execute(delete(Product).where(Product.brand.like(f"{SEED_PREFIX}%"))).rowcount
+    db.commit()
+    print(f"Removed {count} seeded products")
+
+@contextlib.contextmanager
+def capture_statements():
+    """Record the SQL and parameters sent to the database inside the block"""
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def hot_queries(db: Session) -> Dict[str, Callable[[], Any]]:
+    """The catalog's hot read paths, each a callable running the query the way the app does"""
+    flipkart = db.query(Source).filter(Source.name == "Flipkart").first()
+    sample = db.execute(
+        select(Product.name, Product.brand, product_source.c.source_product_id)
+        .join(product_source, product_source.c.product_id == Product.id)
+        .where(Product.gender == GenderEnum.men, product_source.c.source_id == flipkart.id)
+        .limit(100)
+    ).all()
+    if not sample:
+        raise SystemExit("No Flipkart listings to query; seed the database first (--seed)")
+
+    keys = [(name, brand) for name, brand, _ in sample]
+    brands = sorted({brand for _, brand in keys})[:3]
+    source_product_id = sample[0][2]
+
+    return {
+        # Every scrape resolves its source by name
+        "source_by_name": lambda: db.query(Source).filter(Source.name == "Flipkart").first(),
+        # Bulk upsert: ids of a batch by natural key
+        "upsert_resolve_ids": lambda: db.execute(
+            select(Product.id, Product.name, Product.brand)
+            .where(Product.gender == GenderEnum.men, tuple_(Product.name, Product.brand).in_(keys))
+        ).all(),
+        # Product refresh by marketplace id
+        "refresh_by_source_product_id": lambda: db.execute(
+            select(product_source.c.product_id)
+            .where(and_(product_source.c.source_id == flipkart.id,
+                        product_source.c.source_product_id == source_product_id))
+        ).all(),
+        # Catalog filters
+        "filter_gender_brand": lambda: filter_products(
+            db, ProductFilter(gender=SchemaGenderEnum.men, brand=brands), limit=20),
+        "filter_gender_type": lambda: filter_products(
+            db, ProductFilter(gender=SchemaGenderEnum.women, type=["Bra", "Hipster"]), limit=20),
+        "filter_brand": lambda: filter_products(db, ProductFilter(brand=brands[:1]), limit=20),
+        # Catalog search: full-text prefix match and fuzzy brand match
+        "search_text": lambda: search_products(db, "trunk pack", limit=20),
+        "search_fuzzy_brand": lambda: search_products(db, brands[0].replace(" ", "")[:-1], limit=20)
+    }
+
+def explain(db: Session, name: str, func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Print the plan of the first statement a hot query sends and time the whole call
+
+    Args:
+        db: Database session
+        name: Query name
+        func: Callable running the query
+        repeat: Timed runs
+
+    Returns:
+        Statement count and timings in milliseconds
+    """
+    with capture_statements() as statements:
+        func()
+    statement, parameters = statements[0]
+
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).all()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    print(f"\n=== {name} ({len(statements)} statements per call)")
+    print(statement.strip())
+    for (line,) in plan:
+        print(f"  {line}")
+    result = {
+        "statements": len(statements),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)
+    }
+    print(f"  median {result['median_ms']} ms, p95 {result['p95_ms']} ms over {repeat} runs")
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Print EXPLAIN plans and timings of the hot catalog queries")
+    parser.add_argument("--seed", type=int, default=0, metavar="N", help="First seed N products per source and gender")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the seeded rows and exit")
+    parser.add_argument("--only", nargs="+", help="Query names to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cleanup:
+            cleanup(db)
+            return 0
+        if args.seed:
+            seed(db, args.seed)
+
+        results = {}
+        for name, func in hot_queries(db).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = explain(db, name, func, args.repeat)
+            db.rollback()
+
+        print("\nSummary")
+        for name, result in results.items():
+            print(f"  {name:<30} {result['statements']:>4} stmts  median {result['median_ms']:>8} ms  "
+                  f"p95 {result['p95_ms']:>8} ms")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Product listing benchmark
+Times filter_products (the GET /api/v1/products path) for growing page sizes and
+search_products (the database part of both search endpoints) for terms matching
+more and more products, counting the statements each call sends. The same terms
+are then run through the in-memory quick search index. Per-product
+queries show up as a statement count that grows with the result size.
+
+Usage (from the backend directory):
+    python -m benchmarks.listing_bench --seed 20000
+    python -m benchmarks.listing_bench --page-sizes 10 50 100 500 --sort rating_desc
+    python -m benchmarks.listing_bench --search-terms "Pack 12" Trunk Pack
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.schemas.product import ProductFilter, GenderEnum
+from app.services.product_service import filter_products, index_products, quick_search_products, search_products
+from benchmarks.explain_queries import capture_statements, seed
+
+SORTS = ["price_asc", "price_desc", "rating_desc", "newest"]
+
+def bench_page(db: Session, filters: ProductFilter, page_size: int, sort_by: str, repeat: int) -> Dict[str, Any]:
+    """
+    Time one page size
+
+    Args:
+        db: Database session
+        filters: Listing filters
+        page_size: Products per page (limit)
+        sort_by: Sort option of filter_products
+        repeat: Timed calls
+
+    Returns:
+        Rows returned, statements per call and latency in milliseconds
+    """
+    # Warm-up call, also used to count statements
+    with capture_statements() as statements:
+        rows = filter_products(db, filters, limit=page_size, sort_by=sort_by)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        filter_products(db, filters, limit=page_size, sort_by=sort_by)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    median = statistics.median(timings)
+    return {
+        "page_size": page_size,
+        "rows": len(rows),
+        "statements": len(statements),
+        "median_ms": round(median, 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "us_per_row": round(median * 1000 / len(rows), 1) if rows else None
+    }
+
+def bench_search(db: Session, term: str, repeat: int) -> Dict[str, Any]:
+    """Time a search that returns every matching product"""
+    with capture_statements() as statements:
+        rows = search_products(db, term)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        search_products(db, term)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    return {
+        "term": term,
+        "rows": len(rows),
+        "statements": len(statements),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)
+    }
+
+def bench_quick_search(term: str, repeat: int) -> Dict[str, Any]:
+    """Time a search over the in-memory index (built by the caller)"""
+    rows = quick_search_products(term, limit=100)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        quick_search_products(term, limit=100)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    return {
+        "term": term,
+        "rows": len(rows),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3)
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark product listing latency by page size")
+    parser.add_argument("--seed", type=int, default=0, metavar="N", help="First seed N products per source and gender")
+    parser.add_argument("--page-sizes", nargs="+", type=int, default=[10, 25, 50, 100, 200])
+    parser.add_argument("--sort", default="price_asc", choices=SORTS)
+    parser.add_argument("--gender", choices=[gender.value for gender in GenderEnum], help="Optional gender filter")
+    parser.add_argument("--search-terms", nargs="*", default=["Pack 12", "Trunk", "Pack"],
+                        help="Search terms, from narrow to broad (none to skip the search benchmark)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per page size or term")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.seed:
+            seed(db, args.seed)
+
+        filters = ProductFilter(gender=GenderEnum(args.gender) if args.gender else None)
+        results: List[Dict[str, Any]] = []
+        for page_size in args.page_sizes:
+            results.append(bench_page(db, filters, page_size, args.sort, args.repeat))
+            db.rollback()
+
+        searches: List[Dict[str, Any]] = []
+        for term in args.search_terms:
+            searches.append(bench_search(db, term, args.repeat))
+            db.rollback()
+
+        quick_searches: List[Dict[str, Any]] = []
+        if args.search_terms:
+            started = time.perf_counter()
+            indexed = index_products(db)
+            print(f"Indexed {indexed} products in {time.perf_counter() - started:.2f}s")
+            for term in args.search_terms:
+                quick_searches.append(bench_quick_search(term, args.repeat))
+    finally:
+        db.close()
+
+    print(f"\nfilter_products, sort {args.sort}, {args.repeat} calls per page size")
+    print(f"  {'page':>6} {'rows':>6} {'stmts':>6} {'median ms':>10} {'p95 ms':>10} {'us/row':>8}")
+    for result in results:
+        print(f"  {result['page_size']:>6} {result['rows']:>6} {result['statements']:>6} {result['median_ms']:>10} "
+              f"{result['p95_ms']:>10} {result['us_per_row'] if result['us_per_row'] is not None else '-':>8}")
+
+    if searches:
+        print(f"\nsearch_products, {args.repeat} calls per term")
+        print(f"  {'term':<12} {'rows':>6} {'stmts':>6} {'median ms':>10} {'p95 ms':>10}")
+        for result in searches:
+            print(f"  {result['term']:<12} {result['rows']:>6} {result['statements']:>6} "
+                  f"{result['median_ms']:>10} {result['p95_ms']:>10}")
+
+    if quick_searches:
+        print(f"\nquick_search_products (in-memory index, first 100), {args.repeat} calls per term")
+        print(f"  {'term':<12} {'rows':>6} {'median ms':>10} {'p95 ms':>10}")
+        for result in quick_searches:
+            print(f"  {result['term']:<12} {result['rows']:>6} {result['median_ms']:>10} {result['p95_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"listing": results, "search": searches, "quick_search": quick_searches}, f, indent=2)
+
+    # Both paths must send one statement however many products they return
+    failed = False
+    for name, runs in (("Listing", results), ("Search", searches)):
+        counts = {result["statements"] for result in runs if result["rows"]}
+        if counts and counts != {1}:
+            print(f"\n{name} sent {sorted(counts)} statements per call; expected 1 regardless of result size")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Listing parser benchmark
+Replays stored listing pages through the real extraction code of each source and
+reports pages/sec, products/sec, per-selector cost and peak memory. Results can be
+saved as a baseline and later runs compared against it.
+
+Corpus layout: <corpus>/<source>/*.html, e.g. pages captured with
+SCRAPE_CAPTURE_DIR or written by benchmarks.sample_corpus.
+
+Usage (from the backend directory):
+    python -m benchmarks.parser_bench --save-baseline benchmarks/baseline.json
+    python -m benchmarks.parser_bench --baseline benchmarks/baseline.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from app.services.scraping_service import LISTING_SCRAPERS
+from app.utils import html_extractor, selector_registry
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus")
+
+def load_corpus(corpus_dir: str, source_name: str) -> List[str]:
+    """Read every stored page of a source, in file name order"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, source_name, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def bench_source(source_name: str, pages: List[str], repeat: int) -> Dict[str, Any]:
+    """
+    Parse a source's pages `repeat` times
+
+    Args:
+        source_name: Key of LISTING_SCRAPERS
+        pages: Page HTML
+        repeat: Number of passes over the pages
+
+    Returns:
+        Throughput, peak memory and per-selector stats of the source
+    """
+    parse = LISTING_SCRAPERS[source_name]["parse"]
+    products = 0
+
+    # The parsers log every product; keep that out of the timings and the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm-up pass, also used to measure peak memory of a single pass
+        tracemalloc.start()
+        for html in pages:
+            parse(html)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Learn the selector order from the warm-up pass, as the parse pool does
+        selector_registry.merge(selector_registry.take_pending())
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                products += len(parse(html))
+        seconds = time.perf_counter() - started
+
+        # Separate profiled pass, so the timing hooks don't skew throughput
+        html_extractor.start_profiling()
+        for html in pages:
+            parse(html)
+        profile = html_extractor.stop_profiling()
+
+    selectors = [
+        {
+            "field": field,
+            "selector": selector,
+            "calls": stats["calls"],
+            "hits": stats["hits"],
+            "us_per_call": round(stats["seconds"] / stats["calls"] * 1e6, 2) if stats["calls"] else 0.0
+        }
+        for (_, field, selector), stats in sorted(profile.items(), key=lambda item: -item[1]["seconds"])
+    ]
+
+    page_count = len(pages) * repeat
+    return {
+        "pages": page_count,
+        "products": products,
+        "seconds": round(seconds, 4),
+        "pages_per_sec": round(page_count / seconds, 1) if seconds else 0.0,
+        "products_per_sec": round(products / seconds, 1) if seconds else 0.0,
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+        "selectors": selectors
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare a run against a baseline
+
+    Args:
+        results: Results of this run keyed by source
+        baseline: Saved results keyed by source
+        threshold: Allowed relative slowdown / memory growth (0.1 = 10%)
+
+    Returns:
+        Human readable regressions (empty if none)
+    """
+    regressions = []
+    for source_name, current in results.items():
+        previous = baseline.get(source_name)
+        if not previous:
+            continue
+
+        if previous["pages_per_sec"] and current["pages_per_sec"] < previous["pages_per_sec"] * (1 - threshold):
+            regressions.append(f"{source_name}: pages/sec {previous['pages_per_sec']} -> {current['pages_per_sec']}")
+        if previous["peak_memory_kb"] and current["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + threshold):
+            regressions.append(f"{source_name}: peak memory {previous['peak_memory_kb']} KB -> {current['peak_memory_kb']} KB")
+        if current["pages"] and previous["pages"] and \
+                current["products"] / current["pages"] < previous["products"] / previous["pages"]:
+            regressions.append(f"{source_name}: fewer products per page than the baseline")
+    return regressions
+
+def print_report(results: Dict[str, Any], baseline: Dict[str, Any], top: int) -> None:
+    for source_name, result in results.items():
+        previous = baseline.get(source_name, {})
+        change = ""
+        if previous.get("pages_per_sec"):
+            change = f" ({(result['pages_per_sec'] / previous['pages_per_sec'] - 1) * 100:+.1f}% vs baseline)"
+
+        print(f"\n{source_name}: {result['pages']} pages, {result['products']} products in {result['seconds']}s")
+        print(f"  {result['pages_per_sec']} pages/sec{change}, {result['products_per_sec']} products/sec, "
+              f"peak memory {result['peak_memory_kb']} KB")
+        for stats in result["selectors"][:top]:
+            print(f"  {stats['us_per_call']:>9.2f} us/call  {stats['hits']:>5}/{stats['calls']:<5} hits  "
+                  f"{stats['field']}: {stats['selector']}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the listing page parsers on a stored corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Corpus directory (one folder per source)")
+    parser.add_argument("--sources", nargs="+", default=list(LISTING_SCRAPERS), choices=list(LISTING_SCRAPERS))
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus per source")
+    parser.add_argument("--top", type=int, default=5, help="Most expensive selectors to show per source")
+    parser.add_argument("--output", help="Write this run's results as JSON")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Save this run as the baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression before failing (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    results = {}
+    for source_name in args.sources:
+        pages = load_corpus(args.corpus, source_name)
+        if not pages:
+            print(f"No pages for {source_name} in {args.corpus} (run python -m benchmarks.sample_corpus)")
+            continue
+        results[source_name] = bench_source(source_name, pages, args.repeat)
+
+    if not results:
+        return 1
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline, args.top)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
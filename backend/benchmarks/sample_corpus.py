@@ -0,0 +1,161 @@
+"""
+Sample benchmark corpus
+Writes deterministic listing pages that follow each marketplace's markup, for
+running the parser benchmarks before real pages have been captured
+(see SCRAPE_CAPTURE_DIR).
+
+Usage (from the backend directory):
+    python -m benchmarks.sample_corpus [--out benchmarks/corpus] [--products 24 48]
+"""
+import argparse
+import os
+import random
+from typing import Callable, Dict, List
+
+BRANDS = ["Jockey", "Van Heusen", "Calvin Klein", "Tommy Hilfiger", "Rupa", "Dollar", "Hanes", "Puma"]
+TYPES = ["Brief", "Boxer", "Trunk", "Vest", "Bra", "Hipster"]
+
+def _navigation(count: int) -> str:
+    """Menus and footers that surround the results on real pages"""
+    blocks = []
+    for i in range(count):
+        links = "".join(f'<li class="sub"><a href="/c/{i}/{j}">Sub {j}</a></li>' for j in range(6))
+        blocks.append(f'<div class="nav-item n{i}"><span class="lbl">Menu item {i}</span>'
+                      f'<a href="/c/{i}">Category {i}</a><ul>{links}</ul></div>')
+    return "".join(blocks)
+
+def _amazon_item(i: int, brand: str, kind: str, price: int) -> str:
+    asin = f"B0{i:08d}"
+    return (
+        f'<div data-asin="{asin}" data-component-type="s-search-result" class="s-result-item s-asin sg-col-4-of-24">'
+        f'<div class="sg-col-inner"><div class="s-widget-container"><div class="puis-card-container">'
+        f'<div class="s-product-image-container"><a class="a-link-normal s-no-outline" href="/dp/{asin}">'
+        f'<img class="s-image" src="https://m.media-amazon.com/images/I/{i}.jpg" alt=""></a></div>'
+        f'<div class="a-section a-spacing-small"><div class="a-row a-size-base a-color-secondary">'
+        f'<span class="a-size-base-plus a-color-base">{brand}</span></div>'
+        f'<h2 class="a-size-mini s-line-clamp-2"><a class="a-link-normal s-link-style a-text-normal" '
+        f'href="/{brand}-{kind}/dp/{asin}/ref=sr_1_{i}"><span class="a-size-base-plus a-color-base a-text-normal">'
+        f"{brand} Men's Cotton {kind} (Pack of 3) {i}</span></a></h2>"
+        f'<div class="a-row a-size-small"><span aria-label="4.{i % 10} out of 5 stars">'
+        f'<i class="a-icon a-icon-star-small a-star-small-4"><span class="a-icon-alt">4.{i % 10} out of 5 stars</span></i></span>'
+        f'<a class="a-link-normal s-underline-text" href="/dp/{asin}#customerReviews">'
+        f'<span class="a-size-base s-underline-text">{i * 37 + 11:,}</span></a></div>'
+        f'<div class="a-row a-size-base a-color-base"><a class="a-link-normal s-no-hover" href="/dp/{asin}">'
+        f'<span class="a-price" data-a-size="xl"><span class="a-offscreen">&#8377;{price:,}</span>'
+        f'<span aria-hidden="true"><span class="a-price-symbol">&#8377;</span><span class="a-price-whole">{price:,}</span></span></span>'
+        f'<span class="a-size-base a-color-secondary">M.R.P: </span><span class="a-price a-text-price" data-a-size="b">'
+        f'<span class="a-offscreen">&#8377;{price + 400:,}</span></span></a></div>'
+        f'</div></div></div></div></div>'
+    )
+
+def _flipkart_item(i: int, brand: str, kind: str, price: int) -> str:
+    href = f"/{brand.lower().replace(' ', '-')}-{kind.lower()}/p/itm{i:012x}?pid=INW{i:06d}"
+    return (
+        f'<div class="_1AtVbE col-12-12"><div class="_13oc-S"><div data-id="INW{i:06d}" style="width:25%">'
+        f'<div class="_1xHGtK _373qXS"><a class="_2UzuFa" href="{href}">'
+        f'<img class="_2r_T1I" alt="" src="https://rukminim2.flixcart.com/image/{i}.jpeg"></a>'
+        f'<div class="_2WkVRV">{brand}</div><a class="IRpwTa" href="{href}">{brand} Men {kind} (Pack of 2) {i}</a>'
+        f'<a class="_3bPFwb" href="{href}"><div class="_25b18c"><div class="_30jeq3">&#8377;{price:,}</div>'
+        f'<div class="_3I9_wc">&#8377;<!-- -->{price + 300:,}</div><div class="_3Ay6Sb"><span>30% off</span></div></div></a>'
+        f'<div class="_3LWZlK">4.{i % 10}<img src="data:image/svg+xml;base64,AAA" class="_1wB99o"></div>'
+        f'<span class="_2_R_DZ"><span>{i * 13 + 5:,} ratings</span></span></div></div></div></div>'
+    )
+
+def _myntra_item(i: int, brand: str, kind: str, price: int) -> str:
+    slug = f"{brand.lower().replace(' ', '-')}-{kind.lower()}"
+    return (
+        f'<li class="product-base" id="{i}"><div class="product-ratingsContainer"><span>4.{i % 10}</span></div>'
+        f'<a target="_blank" class="product-link" href="/{kind.lower()}/{slug}/{i + 1000000}">'
+        f'<picture class="img-responsive"><img class="product-image" src="https://assets.myntassets.com/h_720/{i}.jpg"></picture>'
+        f'<div class="product-productMetaInfo"><h3 class="product-brand">{brand}</h3>'
+        f'<h4 class="product-product">Men Pack of 3 {kind} {i}</h4><div class="product-price"><span>'
+        f'<span class="product-discountedPrice">Rs. {price}</span><span class="product-strike">Rs. {price + 500}</span></span>'
+        f'<span class="product-discountPercentage">(40% OFF)</span></div></div></a></li>'
+    )
+
+def _ajio_item(i: int, brand: str, kind: str, price: int) -> str:
+    slug = f"{brand.lower().replace(' ', '-')}-{kind.lower()}"
+    return (
+        f'<div class="item rilrtl-products-list__item item"><div class="preview">'
+        f'<a class="rilrtl-products-list__link desktop" href="/{slug}/p/46{i:07d}_multi">'
+        f'<div class="imgHolder"><img class="rilrtl-lazy-img rilrtl-lazy-img-loaded" src="https://assets.ajio.com/medias/{i}.jpg"></div>'
+        f'<div class="contentHolder"><div class="brand"><strong>{brand}</strong></div>'
+        f'<div class="nameCls">Pack of 3 {kind} {i}</div><div class="priceBox">'
+        f'<span class="price"><strong>Rs. {price:,}</strong></span><span class="orginal-price">Rs. {price + 450:,}</span>'
+        f'<span class="discount">(35% off)</span></div></div></a></div></div>'
+    )
+
+def _flipkart_rows(items: List[str]) -> str:
+    """Rows of four results in wrappers that only match the div[data-id] fallback container"""
+    return "".join(f'<div data-id="row{n // 4}" class="_2kHMtA">{"".join(items[n:n + 4])}</div>'
+                   for n in range(0, len(items), 4))
+
+def _amazon_page(items: str) -> str:
+    return (f'<!doctype html><html><head><title>Amazon.in</title><script>var config = {{a: 1}};</script></head><body>'
+            f'<div id="nav">{_navigation(120)}</div><div class="s-main-slot s-result-list">{items}</div>'
+            f'<div id="footer">{_navigation(60)}</div></body></html>')
+
+def _flipkart_page(items: str) -> str:
+    return (f'<!doctype html><html><head><title>Flipkart</title></head><body><div id="container">'
+            f'{_navigation(150)}<div class="_1YokD2 _3Mn1Gg">{items}</div>{_navigation(40)}</div></body></html>')
+
+def _myntra_page(items: str) -> str:
+    return (f'<!doctype html><html><head><title>Myntra</title></head><body><div class="desktop-base">{_navigation(100)}</div>'
+            f'<div class="search-searchProductsContainer"><ul class="results-base">{items}</ul></div>'
+            f'{_navigation(50)}</body></html>')
+
+def _ajio_page(items: str) -> str:
+    return (f'<!doctype html><html><head><title>AJIO</title></head><body><div id="appContainer">{_navigation(100)}'
+            f'<div class="products">{items}</div>{_navigation(40)}</div></body></html>')
+
+SAMPLE_SOURCES: Dict[str, Dict[str, Callable]] = {
+    "amazon": {"item": _amazon_item, "page": _amazon_page},
+    "flipkart": {"item": _flipkart_item, "page": _flipkart_page, "variants": {"rows": _flipkart_rows}},
+    "myntra": {"item": _myntra_item, "page": _myntra_page},
+    "ajio": {"item": _ajio_item, "page": _ajio_page}
+}
+
+def write_sample_corpus(out_dir: str, product_counts: List[int]) -> List[str]:
+    """
+    Write one sample page per source and product count
+
+    Args:
+        out_dir: Corpus directory (one sub-directory per source)
+        product_counts: Number of products on each page
+
+    Returns:
+        Paths of the written pages
+    """
+    rng = random.Random(7)  # deterministic, so baselines stay comparable
+    paths = []
+
+    for source_name, builders in SAMPLE_SOURCES.items():
+        folder = os.path.join(out_dir, source_name)
+        os.makedirs(folder, exist_ok=True)
+
+        for count in product_counts:
+            items = [
+                builders["item"](i, rng.choice(BRANDS), rng.choice(TYPES), rng.randint(199, 1999))
+                for i in range(count)
+            ]
+            pages = {f"sample_{count}.html": "".join(items)}
+            # Alternative layouts of the same results (e.g. nested containers)
+            for variant, arrange in builders.get("variants", {}).items():
+                pages[f"sample_{count}_{variant}.html"] = arrange(items)
+
+            for filename, body in pages.items():
+                path = os.path.join(folder, filename)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(builders["page"](body))
+                paths.append(path)
+
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write sample listing pages for the parser benchmarks")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--products", type=int, nargs="+", default=[24, 48])
+    args = parser.parse_args()
+
+    for path in write_sample_corpus(args.out, args.products):
+        print(path)
@@ -2,10 +2,17 @@ from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 from datetime import datetime
+import threading
+import time
 
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.routers import products, scraping, sources, tasks
 from app.config import settings
+from app.models.source import Source
+from app.models import review  # noqa: F401 - registers Review (Product.reviews, create_all)
+from app.services import write_queue
+from app.services.product_service import refresh_search_index
+from app.utils import fetch_engine, parse_pool
 
 # Create tables in the database
 Base.metadata.create_all(bind=engine)
@@ -23,6 +30,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination and live search state travel in response headers
+    expose_headers=["X-Next-Cursor", "X-Cache", "X-Task-Id", "X-Completed-Sources", "X-Pending-Sources"],
 )
 
 # Include routers
@@ -31,6 +40,47 @@ app.include_router(scraping.router)
 app.include_router(sources.router)
 app.include_router(tasks.router)
 
+@app.on_event("startup")
+def configure_fetch_engine():
+    # Load per-source rate limits and pool sizes before the first scrape
+    db = SessionLocal()
+    try:
+        fetch_engine.configure_sources(db.query(Source).all())
+    finally:
+        db.close()
+
+def _refresh_search_index():
+    # Every worker keeps its own index; catch up with the products changed by any of them
+    since = None
+    rebuilt = 0.0
+    while True:
+        if time.monotonic() - rebuilt >= settings.SEARCH_INDEX_REBUILD_INTERVAL:
+            since = None
+        db = SessionLocal()
+        try:
+            if since is None:
+                rebuilt = time.monotonic()
+            since = refresh_search_index(db, since)
+        except Exception as e:
+            db.rollback()
+            print(f"Error refreshing search index: {e}")
+        finally:
+            db.close()
+        time.sleep(settings.SEARCH_INDEX_REFRESH_INTERVAL)
+
+@app.on_event("startup")
+def load_search_index():
+    # Quick search is served from memory; load the catalog without delaying startup
+    threading.Thread(target=_refresh_search_index, name="search-index-refresh", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_fetch_engine():
+    # Release pooled scraper connections and stop the parse workers
+    await fetch_engine.run_async(fetch_engine.close())
+    parse_pool.shutdown()
+    # Commit the scraped products still queued
+    write_queue.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,100 @@
+"""
+Database migrations
+Applies the numbered SQL files in database/migrations in order, each in its own
+transaction, and records them in the schema_migrations table so every file runs once.
+
+Usage (from the backend directory):
+    python migrate.py           # apply pending migrations
+    python migrate.py --status  # list applied and pending migrations
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import List, Set
+
+from app.database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database", "migrations")
+
+def list_migrations(migrations_dir: str = MIGRATIONS_DIR) -> List[str]:
+    """Get the migration file names, in the order they are applied"""
+    return sorted(os.path.basename(path) for path in glob.glob(os.path.join(migrations_dir, "*.sql")))
+
+def applied_migrations(cursor) -> Set[str]:
+    """Create the bookkeeping table if needed and get the migrations already applied"""
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(255) PRIMARY KEY,"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(migrations_dir: str = MIGRATIONS_DIR) -> List[str]:
+    """
+    Apply every pending migration
+
+    Args:
+        migrations_dir: Directory of the numbered .sql files
+
+    Returns:
+        Names of the migrations applied by this run
+    """
+    # Raw DB-API connection: the files hold several statements and DO blocks
+    connection = engine.raw_connection()
+    applied = []
+    try:
+        cursor = connection.cursor()
+        done = applied_migrations(cursor)
+        connection.commit()
+
+        for name in list_migrations(migrations_dir):
+            if name in done:
+                continue
+            with open(os.path.join(migrations_dir, name), encoding="utf-8") as f:
+                sql = f.read()
+
+            started = time.perf_counter()
+            try:
+                cursor.execute(sql)
+                cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (name,))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                print(f"Migration {name} failed, rolled back")
+                raise
+            print(f"Applied {name} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+            applied.append(name)
+    finally:
+        connection.close()
+    return applied
+
+def print_status(migrations_dir: str = MIGRATIONS_DIR) -> None:
+    connection = engine.raw_connection()
+    try:
+        done = applied_migrations(connection.cursor())
+        connection.commit()
+    finally:
+        connection.close()
+    for name in list_migrations(migrations_dir):
+        print(f"{'applied' if name in done else 'pending'}  {name}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="List migrations instead of applying them")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="Migrations directory")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.dir)
+        return 0
+
+    applied = migrate(args.dir)
+    if not applied:
+        print("Database is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+# Register every model before the mappers are configured
+import app.models.product  # noqa: F401
+import app.models.product_summary  # noqa: F401
+import app.models.review  # noqa: F401
+import app.models.source  # noqa: F401
+from app.database import engine
+
+@pytest.fixture
+def db():
+    """
+    Session on the configured database (DB_* settings) whose changes are rolled back
+    afterwards, commits included. The schema must be in place (init.sql or migrate.py);
+    tests using it are skipped when the database can't be reached.
+    """
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"database not available: {e.orig}")
+    transaction = connection.begin()
+    try:
+        connection.execute(text("SELECT 1 FROM product_summary LIMIT 1"))
+    except ProgrammingError:
+        transaction.rollback()
+        connection.close()
+        pytest.skip("database schema missing, run migrate.py")
+
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs"""
+    sent = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield sent
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,72 @@
+import fnmatch
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+Name = Union[str, bytes]
+
+def _key(name: Name) -> str:
+    return name.decode() if isinstance(name, bytes) else name
+
+class FakeRedis:
+    """
+    In-process stand-in for the redis-py client methods RedisBackend uses.
+    Expiry follows the clock given, so tests can move time forward.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}  # key -> (value, expires at)
+
+    def _live(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, name: Name) -> Optional[bytes]:
+        entry = self._live(_key(name))
+        return entry[0] if entry else None
+
+    def set(self, name: Name, value: bytes, px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        key = _key(name)
+        if nx and self._live(key) is not None:
+            return None
+        self._data[key] = (value, self.clock() + px / 1000 if px else None)
+        return True
+
+    def pttl(self, name: Name) -> int:
+        entry = self._live(_key(name))
+        if entry is None:
+            return -2
+        if entry[1] is None:
+            return -1
+        return int((entry[1] - self.clock()) * 1000)
+
+    def delete(self, *names: Name) -> int:
+        return sum(self._data.pop(_key(name), None) is not None for name in names)
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Iterator[bytes]:
+        for key in list(self._data):
+            if self._live(key) is not None and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key.encode()
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+class FakePipeline:
+    """Queues commands and runs them on execute(), like a redis-py pipeline"""
+
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, command: str) -> Callable[..., "FakePipeline"]:
+        def queue(*args: Any, **kwargs: Any) -> "FakePipeline":
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [getattr(self._client, command)(*args, **kwargs) for command, args, kwargs in commands]
@@ -0,0 +1,180 @@
+import pickle
+import time
+import types
+
+import pytest
+
+from app.utils import cache_backends
+from app.utils.cache_backends import MemoryBackend, NearCache, RedisBackend
+from tests.fake_redis import FakeRedis
+
+PREFIX = "test:cache:"
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def memory(monkeypatch, clock):
+    """MemoryBackend on the fake clock; its sweeper still sleeps in real time"""
+    monkeypatch.setattr(cache_backends, "time", types.SimpleNamespace(time=clock, sleep=time.sleep))
+    return MemoryBackend(max_entries=3, max_bytes=10000, sweep_interval=0.01)
+
+@pytest.fixture
+def client(clock):
+    return FakeRedis(clock)
+
+@pytest.fixture
+def backend(client):
+    return RedisBackend("redis://unused", prefix=PREFIX, client=client)
+
+def test_round_trip(backend, client):
+    small = {"fresh_until": 1700000000.5, "data": [{"id": 1, "sources": ["Flipkart"], "rating": None}]}
+    large = [{"id": number, "name": f"Cotton Trunk {number}", "in_stock": True} for number in range(200)]
+
+    assert backend.set("small", small) and backend.set("large", large)
+
+    assert backend.get("small") == small
+    assert backend.get("large") == large
+    # Large values are compressed
+    assert len(client.get(PREFIX + "large")) < len(str(large))
+    assert backend.stats()["hits"] == 2
+
+def test_values_that_are_not_json_are_not_stored(backend):
+    assert backend.set("key", {"when": object()}) is False
+    assert backend.get("key") is None
+    assert backend.stats()["errors"] == 1
+
+def test_pickled_values_are_never_loaded(backend, client):
+    class Exploit:
+        def __reduce__(self):
+            return (pytest.fail, ("pickle payload was loaded",))
+
+    for header in (b"p", b"z", b""):
+        client.set(PREFIX + "key", header + pickle.dumps(Exploit()))
+        assert backend.get("key") is None
+
+def test_add_claims_a_key_once(backend, clock):
+    assert backend.add("claim", True, ttl=5) is True
+    assert backend.add("claim", True, ttl=5) is False
+
+    clock.now += 6
+    assert backend.add("claim", True, ttl=5) is True
+
+def test_entries_expire_after_their_ttl(backend, clock):
+    backend.set("key", "value", ttl=2)
+
+    clock.now += 1.5
+    assert backend.get("key") == "value"
+    clock.now += 1
+    assert backend.get("key") is None
+
+def test_clear_only_drops_keys_under_the_prefix(backend, client):
+    for number in range(1200):
+        backend.set(f"search_{number}", number)
+    client.set("other:app:key", b"kept")
+
+    backend.clear()
+
+    assert backend.get("search_0") is None
+    assert list(client.scan_iter(match=PREFIX + "*")) == []
+    assert client.get("other:app:key") == b"kept"
+
+def test_ttl_of_shared_entries(backend, clock):
+    backend.set("expiring", "value", ttl=2)
+    backend.set("forever", "value")
+
+    clock.now += 0.5
+    assert backend.get_with_ttl("expiring") == ("value", 1.5)
+    assert backend.get_with_ttl("forever") == ("value", None)
+    assert backend.get_with_ttl("missing") == (None, None)
+
+def test_near_copy_expires_with_the_shared_entry():
+    shared = RedisBackend("redis://unused", prefix=PREFIX, client=FakeRedis())
+    cache = NearCache(shared, MemoryBackend(max_entries=10, max_bytes=10000, sweep_interval=60), near_ttl=30)
+    # Written by another worker, so there is no near copy yet
+    shared.set("expiring", "value", ttl=0.2)
+    shared.set("forever", "value")
+
+    assert cache.get("expiring") == "value" and cache.get("forever") == "value"
+    _, near_remaining = cache.near.get_with_ttl("expiring")
+    assert 0 < near_remaining <= 0.2
+    assert cache.near.get_with_ttl("forever")[1] > 29
+
+    time.sleep(0.25)
+    assert cache.get("expiring") is None
+
+def test_memory_evicts_least_recently_used_first(memory):
+    for key in ("a", "b", "c"):
+        memory.set(key, key)
+    memory.get("a")  # "b" is now the least recently used
+
+    memory.set("d", "d")
+    memory.set("e", "e")
+
+    assert [key for key in "abcde" if memory.get(key) is not None] == ["a", "d", "e"]
+    assert memory.stats()["evictions"] == 2
+
+def test_memory_evicts_to_stay_within_the_byte_budget(monkeypatch, clock):
+    monkeypatch.setattr(cache_backends, "_size_of", len)
+    memory = MemoryBackend(max_entries=10, max_bytes=10, sweep_interval=60)
+    memory.set("a", "x" * 4)
+    memory.set("b", "x" * 4)
+
+    memory.set("c", "x" * 4)
+
+    assert memory.get("a") is None and memory.get("b") and memory.get("c")
+    assert memory.set("huge", "x" * 11) is False
+
+def test_memory_entry_expires_on_read(memory, clock):
+    memory.set("key", "value", ttl=2)
+
+    clock.now += 1.5
+    assert memory.get_with_ttl("key") == ("value", 0.5)
+    clock.now += 0.5
+    assert memory.get("key") is None
+
+    stats = memory.stats()
+    assert stats["entries"] == 0 and stats["expirations"] == 1
+
+def test_memory_sweep_drops_only_expired_entries(memory, clock):
+    memory.set("short", "value", ttl=1)
+    memory.set("long", "value", ttl=10)
+    memory.set("forever", "value")
+    memory.set("short", "stored again", ttl=5)  # leaves a stale heap item behind
+
+    clock.now += 2
+    assert memory.sweep() == 0
+    clock.now += 4
+    assert memory.sweep() == 1
+
+    assert memory.get("short") is None and memory.get("long") and memory.get("forever")
+
+def test_memory_sweeper_drops_entries_that_are_never_read(memory, clock):
+    memory.set("key", "value", ttl=1)
+
+    clock.now += 2
+    deadline = time.monotonic() + 2
+    while memory.stats()["entries"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert memory.stats()["entries"] == 0
+
+def test_memory_add_does_not_overwrite_a_live_key(memory, clock):
+    assert memory.add("claim", "first", ttl=5) is True
+    assert memory.add("claim", "second", ttl=5) is False
+    assert memory.get("claim") == "first"
+
+    clock.now += 6
+    assert memory.add("claim", "third", ttl=5) is True
+    assert memory.get("claim") == "third"
+
+    memory.set("forever", "first")
+    assert memory.add("forever", "second") is False
@@ -0,0 +1,118 @@
+import types
+
+import pytest
+
+from app.utils import cache_backends, cache_manager
+from app.utils.cache_backends import MemoryBackend
+from app.utils.cache_manager import FRESH, MISS, REFRESHING, STALE, get_revalidating
+
+SOFT_TTL = 10
+HARD_TTL = 60
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class ManualExecutor:
+    """Holds submitted refreshes until the test runs them"""
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, fn, *args):
+        self.pending.append((fn, args))
+
+    def run(self):
+        pending, self.pending = self.pending, []
+        for fn, args in pending:
+            fn(*args)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    fake_time = types.SimpleNamespace(time=clock, sleep=lambda seconds: None)
+    monkeypatch.setattr(cache_backends, "time", fake_time)
+    monkeypatch.setattr(cache_manager, "time", fake_time)
+    return clock
+
+@pytest.fixture
+def refresher(monkeypatch, clock):
+    refresher = ManualExecutor()
+    monkeypatch.setattr(cache_manager, "_cache", MemoryBackend(max_entries=100, max_bytes=100000, sweep_interval=60))
+    monkeypatch.setattr(cache_manager, "_refresher", refresher)
+    monkeypatch.setattr(cache_manager, "_refreshing", set())
+    monkeypatch.setattr(cache_manager, "CACHE_FAMILIES", {"search": (SOFT_TTL, HARD_TTL)})
+    return refresher
+
+class Refresh:
+    """Counts its calls and returns the next version of the data"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"v{self.calls + 1}"
+
+def test_entry_goes_from_miss_to_fresh_to_stale_and_back(refresher, clock):
+    refresh = Refresh()
+    assert get_revalidating("search_boxers", "search", refresh) == (None, MISS)
+
+    cache_manager.cache_revalidating("search_boxers", "v1", "search")
+    assert get_revalidating("search_boxers", "search", refresh) == ("v1", FRESH)
+
+    clock.now += SOFT_TTL
+    assert get_revalidating("search_boxers", "search", refresh) == ("v1", REFRESHING)
+    assert get_revalidating("search_boxers", "search", refresh) == ("v1", STALE)
+
+    refresher.run()
+    assert get_revalidating("search_boxers", "search", refresh) == ("v2", FRESH)
+    assert refresh.calls == 1
+
+def test_one_refresh_per_stale_key(refresher, clock):
+    refresh = Refresh()
+    cache_manager.cache_revalidating("search_boxers", "v1", "search")
+    cache_manager.cache_revalidating("search_trunks", "v1", "search")
+    clock.now += SOFT_TTL
+
+    outcomes = [get_revalidating(key, "search", refresh)[1]
+                for _ in range(5) for key in ("search_boxers", "search_trunks")]
+
+    assert outcomes.count(REFRESHING) == 2 and outcomes.count(STALE) == 8
+    refresher.run()
+    assert refresh.calls == 2
+    # The claims are released once the refreshes are done
+    assert cache_manager._cache.get("search_boxers:refreshing") is None
+    assert cache_manager._refreshing == set()
+
+def test_refresh_claimed_by_another_worker_is_not_repeated(refresher, clock):
+    cache_manager.cache_revalidating("search_boxers", "v1", "search")
+    cache_manager._cache.add("search_boxers:refreshing", True, ttl=30)
+    clock.now += SOFT_TTL
+
+    assert get_revalidating("search_boxers", "search", Refresh()) == ("v1", STALE)
+    assert refresher.pending == []
+
+    # A worker that died holding the claim blocks refreshes until the claim expires
+    clock.now += 30
+    assert get_revalidating("search_boxers", "search", Refresh()) == ("v1", REFRESHING)
+
+def test_failed_refresh_is_retried_on_the_next_stale_read(refresher, clock):
+    def failing_refresh():
+        raise RuntimeError("database unavailable")
+
+    cache_manager.cache_revalidating("search_boxers", "v1", "search")
+    clock.now += SOFT_TTL
+    assert get_revalidating("search_boxers", "search", failing_refresh) == ("v1", REFRESHING)
+    refresher.run()
+
+    assert get_revalidating("search_boxers", "search", Refresh()) == ("v1", REFRESHING)
+
+def test_entry_past_its_hard_ttl_is_a_miss(refresher, clock):
+    refresh = Refresh()
+    cache_manager.cache_revalidating("search_boxers", "v1", "search")
+
+    clock.now += HARD_TTL
+    assert get_revalidating("search_boxers", "search", refresh) == (None, MISS)
+    assert refresher.pending == [] and refresh.calls == 0
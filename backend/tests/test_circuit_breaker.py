@@ -0,0 +1,116 @@
+import types
+
+import pytest
+
+from app.config import settings
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+
+def test_opens_on_failure_threshold(breaker):
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats["opened"] == 1 and breaker.stats["rejected"] == 1
+
+def test_success_resets_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+def test_half_open_lets_one_probe_through(breaker, clock):
+    trip(breaker)
+
+    clock.now += 59
+    assert not breaker.allow_request()
+
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # the probe is still running
+
+def test_successful_probe_closes(breaker, clock):
+    trip(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+def test_failed_probe_reopens_for_another_timeout(breaker, clock):
+    trip(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    clock.now += 59
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+
+def test_cancelled_probe_lets_another_through(breaker, clock):
+    trip(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.record_cancelled()
+
+    assert breaker.allow_request()
+
+def test_retries_refused_once_budget_is_spent(breaker):
+    for _ in range(settings.RETRY_BUDGET_MIN):
+        assert breaker.take_retry()
+    assert not breaker.take_retry()
+
+    # Every request earns a fraction of a retry
+    for _ in range(round(1 / settings.RETRY_BUDGET_RATIO)):
+        breaker.allow_request()
+    assert breaker.take_retry()
+    assert not breaker.take_retry()
+
+def test_no_retries_while_open(breaker):
+    trip(breaker)
+
+    assert not breaker.take_retry()
+
+def test_backoff_is_jittered_below_an_exponential_ceiling(monkeypatch):
+    monkeypatch.setattr(circuit_breaker.random, "uniform", lambda low, high: high)
+
+    ceilings = [circuit_breaker.backoff_delay(attempt) for attempt in range(1, 8)]
+
+    assert ceilings[:3] == [settings.RETRY_BACKOFF_BASE * 2 ** n for n in range(3)]
+    assert max(ceilings) == settings.RETRY_BACKOFF_MAX
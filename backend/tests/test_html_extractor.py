@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks.sample_corpus import SAMPLE_SOURCES
+from app.services.scraping_service import FLIPKART_EXTRACTOR, parse_flipkart
+
+def _flipkart_page(count, variant=None):
+    builders = SAMPLE_SOURCES["flipkart"]
+    items = [builders["item"](i, "Jockey", "Brief", 300 + i) for i in range(count)]
+    body = builders["variants"][variant](items) if variant else "".join(items)
+    return builders["page"](body)
+
+@pytest.mark.parametrize("variant", [None, "rows"])
+def test_primary_containers_found_inside_fallback_matches(variant):
+    # In the "rows" layout every group of results sits in a div[data-id] wrapper,
+    # which only matches a fallback container selector
+    containers = list(FLIPKART_EXTRACTOR.iter_containers(_flipkart_page(24, variant)))
+
+    assert [index for index, _ in containers] == [0] * 24
+
+@pytest.mark.parametrize("variant", [None, "rows"])
+def test_nested_layout_parses_every_product(variant):
+    products = parse_flipkart(_flipkart_page(24, variant))
+
+    assert sorted(product["price"] for product in products) == [300.0 + i for i in range(24)]
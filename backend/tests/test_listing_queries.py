@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.product import GenderEnum, Product
+from app.models.review import Review
+from app.schemas.product import ProductFilter
+from app.services.ingest_service import upsert_scraped_products
+from app.services.product_service import (
+    decode_cursor, encode_cursor, filter_products, filter_products_page, quick_search_products,
+    refresh_search_index, search_products
+)
+from app.utils import search_index
+
+MANY = 25
+
+@pytest.fixture
+def listings(db):
+    """One product of brand Qasingle and MANY of brand Qamulti, listed on Flipkart"""
+    products = [
+        {
+            "id": f"QA{brand}{number}",
+            "name": f"Cotton Trunk {brand} {number}",
+            "brand": brand,
+            "type": "Trunk",
+            "price": 300.0 + number,
+            "original_price": 500.0,
+            "source_url": f"https://www.flipkart.com/p/qa-{brand}-{number}",
+            "image": None
+        }
+        for brand, count in (("Qasingle", 1), ("Qamulti", MANY))
+        for number in range(count)
+    ]
+    counts = upsert_scraped_products(db, "Flipkart", products, GenderEnum.men)
+    if counts["inserted"] != len(products):
+        pytest.skip("Flipkart source missing, load database/init.sql")
+    return db
+
+def count_statements(statements, run):
+    """Run a call and get its result and the number of statements it sent"""
+    before = len(statements)
+    result = run()
+    return result, len(statements) - before
+
+@pytest.mark.parametrize("sort_by", ["price_asc", "rating_desc", "newest"])
+def test_filter_products_statements_do_not_grow_with_results(listings, statements, sort_by):
+    one, one_statements = count_statements(statements, lambda: filter_products(
+        listings, ProductFilter(brand=["Qasingle"]), sort_by=sort_by
+    ))
+    many, many_statements = count_statements(statements, lambda: filter_products(
+        listings, ProductFilter(brand=["Qamulti"]), sort_by=sort_by
+    ))
+
+    assert (len(one), len(many)) == (1, MANY)
+    assert one_statements == many_statements == 1
+
+def test_search_products_statements_do_not_grow_with_results(listings, statements):
+    one, one_statements = count_statements(statements, lambda: search_products(listings, "qasingle"))
+    many, many_statements = count_statements(statements, lambda: search_products(listings, "qamulti"))
+
+    assert (len(one), len(many)) == (1, MANY)
+    assert one[0]["sources"] == ["Flipkart"]
+    assert one_statements == many_statements == 1
+
+@pytest.mark.parametrize("sort_by, key", [
+    ("price_asc", 349.0), ("rating_desc", 4), ("newest", datetime(2024, 5, 1, 12, 30)), ("newest", None)
+])
+def test_cursor_round_trip(sort_by, key):
+    assert decode_cursor(encode_cursor(sort_by, key, 7), sort_by) == (key, 7)
+
+@pytest.mark.parametrize("sort_by, key", [
+    ("price_asc", "349"), ("price_desc", None), ("rating_desc", True), ("newest", 1714566600), ("newest", "May 1")
+])
+def test_cursor_key_of_wrong_type_is_rejected(sort_by, key):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(sort_by, key, 7), sort_by)
+
+def test_newest_pages_through_products_without_creation_date(listings):
+    listings.query(Product).filter(Product.brand == "Qamulti", Product.name.like("% 1_")).update(
+        {Product.created_at: None}, synchronize_session=False
+    )
+    filters = ProductFilter(brand=["Qamulti"])
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = filter_products_page(listings, filters, limit=4, sort_by="newest", cursor=cursor)
+        seen.extend(product["id"] for product in page)
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == MANY
+
+def test_search_index_refresh_picks_up_new_ratings(listings):
+    since = refresh_search_index(listings)
+    product = listings.query(Product).filter(Product.brand == "Qasingle").one()
+    assert quick_search_products("qasingle")[0]["rating_average"] is None
+
+    listings.add(Review(product_id=product.id, source_id=product.sources[0].id, rating=4.0))
+    listings.flush()
+    refresh_search_index(listings, since)
+
+    try:
+        assert quick_search_products("qasingle")[0]["rating_average"] == 4.0
+    finally:
+        search_index.replace_all([])
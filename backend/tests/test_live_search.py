@@ -0,0 +1,44 @@
+import concurrent.futures
+
+import pytest
+
+from app.services import scraping_service
+from app.services.scraping_service import LiveSearch, finish_live_search
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+@pytest.fixture
+def stored(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scraping_service, "_storer", InlineExecutor())
+    monkeypatch.setattr(scraping_service, "update_task_status", lambda *args, **kwargs: None)
+    monkeypatch.setattr(scraping_service, "_queue_scraped",
+                        lambda scraped, gender=None, task_id=None: calls.append((scraped, task_id)))
+    return calls
+
+def live_search(*names, owned=()):
+    search = LiveSearch()
+    for name in names:
+        search[name] = concurrent.futures.Future()
+    search.owned.update(owned)
+    return search
+
+def test_returns_before_sources_finish_and_stores_after_the_last(stored):
+    search = live_search("amazon", "flipkart", "myntra", owned=("amazon", "flipkart"))
+
+    finish_live_search(search, "boxers", task_id="task")
+    search["amazon"].set_result([{"id": "A1"}])
+    search["myntra"].set_result([{"id": "M1"}])
+    assert stored == []
+
+    search["flipkart"].set_exception(RuntimeError("blocked"))
+
+    # Joined sources (myntra) are stored by the search that fetches them; failed ones are empty
+    assert stored == [({"amazon": [{"id": "A1"}], "flipkart": []}, "task")]
+
+def test_search_without_sources_completes_at_once(stored):
+    finish_live_search(live_search(), "boxers", task_id="task")
+
+    assert stored == [({}, "task")]
@@ -0,0 +1,22 @@
+import pytest
+from starlette.routing import Match
+
+from app.routers import products
+
+def route_for(method, path):
+    """Name of the endpoint FastAPI dispatches a request to (the first full match)"""
+    scope = {"type": "http", "method": method, "path": path}
+    for route in products.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.name
+    return None
+
+@pytest.mark.parametrize("path, endpoint", [
+    ("/api/v1/products/search/price-history", "search_products_endpoint"),
+    ("/api/v1/products/quick-search/price-history", "quick_search_products_endpoint"),
+    ("/api/v1/products/42/price-history", "get_price_history_endpoint"),
+    ("/api/v1/products/42", "get_product_endpoint")
+])
+def test_search_routes_win_over_product_id_routes(path, endpoint):
+    assert route_for("GET", path) == endpoint
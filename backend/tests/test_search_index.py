@@ -0,0 +1,35 @@
+import pytest
+
+from app.utils import search_index
+
+def document(product_id, name):
+    return {"id": product_id, "gender": "men", "price": 499.0, "fields": {"name": name}, "listing": {"id": product_id}}
+
+@pytest.fixture(autouse=True)
+def index(monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_PREFIX_TERMS", 3)
+    yield
+    search_index.replace_all([])
+
+def test_prefix_expands_to_most_frequent_terms():
+    # "boxa".."boxe" sort before "boxer" but each is in a single product
+    rare = [document(number, f"box{letter} pack") for number, letter in enumerate("abcde")]
+    common = [document(10 + number, "boxer brief") for number in range(4)]
+    search_index.replace_all(rare + common)
+
+    found = {listing["id"] for listing in search_index.search("box")}
+    assert {10, 11, 12, 13} <= found
+
+def test_prefix_with_few_completions_keeps_all():
+    search_index.replace_all([document(1, "boxer"), document(2, "boxy"), document(3, "trunk")])
+
+    assert sorted(listing["id"] for listing in search_index.search("box")) == [1, 2]
+
+def test_refresh_is_reported_in_stats():
+    before = search_index.get_index_stats()
+
+    search_index.record_refresh(7)
+
+    stats = search_index.get_index_stats()
+    assert stats["refreshes"] == before["refreshes"] + 1
+    assert stats["refreshed_at"] is not None and stats["last_refresh_products"] == 7
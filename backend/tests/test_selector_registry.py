@@ -0,0 +1,24 @@
+import pytest
+
+from app.utils import selector_registry
+from app.utils.html_extractor import selector_priorities
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    selector_registry.reset()
+    yield
+    selector_registry.reset()
+
+def test_priorities_group_equal_specificity():
+    assert selector_priorities(["div.a span.b", "div.c span.d", "span.e", "span"]) == [0, 0, 2, 3]
+
+def test_merge_ranks_by_hit_rate_within_priority():
+    selector_registry.declare("test", "price", [("div.a", 0), ("div.b", 0), ("div", 2)])
+    # div.a is tried first, so it gets more hits while missing most of the time
+    selector_registry.merge({("test", "price"): {"div.a": [100, 30], "div.b": [70, 63], "div": [7, 7]}})
+    assert selector_registry.get_order("test", "price") == ["div.b", "div.a", "div"]
+
+def test_merge_never_promotes_broad_selector():
+    selector_registry.declare("test", "price", [("div.a", 0), ("div", 1)])
+    selector_registry.merge({("test", "price"): {"div.a": [100, 10], "div": [90, 90]}})
+    assert selector_registry.get_order("test", "price") == ["div.a", "div"]
@@ -0,0 +1,138 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from app.utils import single_flight
+
+CALLERS = 8
+
+class Loader:
+    """Counts its executions and blocks until released, so every caller overlaps the first"""
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.released = threading.Event()
+
+    def __call__(self, value):
+        self.calls += 1
+        assert self.released.wait(5)
+        if self.error is not None:
+            raise self.error
+        return value * 2
+
+def wait_for_followers(before, count):
+    deadline = time.monotonic() + 5
+    while single_flight.get_flight_stats()["followers"] - before["followers"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def run_in_threads(count, fn):
+    """Start fn in count threads at once; returns the threads and their outcomes"""
+    barrier = threading.Barrier(count)
+    outcomes = []
+
+    def call():
+        barrier.wait()
+        try:
+            outcomes.append(fn())
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_callers_share_one_execution():
+    before = single_flight.get_flight_stats()
+    loader = Loader()
+
+    threads, outcomes = run_in_threads(CALLERS, lambda: single_flight.do("boxers", loader, 21))
+    wait_for_followers(before, CALLERS - 1)
+    loader.released.set()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+    assert outcomes == [42] * CALLERS
+    stats = single_flight.get_flight_stats()
+    assert stats["leaders"] - before["leaders"] == 1 and stats["in_flight"] == 0
+
+def test_error_reaches_every_caller_and_releases_the_key():
+    before = single_flight.get_flight_stats()
+    error = RuntimeError("source blocked")
+    loader = Loader(error)
+
+    threads, outcomes = run_in_threads(CALLERS, lambda: single_flight.do("boxers", loader, 21))
+    wait_for_followers(before, CALLERS - 1)
+    loader.released.set()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+    assert outcomes == [error] * CALLERS
+    stats = single_flight.get_flight_stats()
+    assert stats["errors"] - before["errors"] == 1 and stats["in_flight"] == 0
+
+    # The next caller starts a new flight
+    retry = Loader()
+    retry.released.set()
+    assert single_flight.do("boxers", retry, 1) == 2 and retry.calls == 1
+
+def run_async_callers(count, loader):
+    """Await do_async from count tasks, releasing the loader once all of them joined"""
+    before = single_flight.get_flight_stats()
+
+    async def main():
+        callers = [asyncio.ensure_future(single_flight.do_async("boxers", loader, 21)) for _ in range(count)]
+        while single_flight.get_flight_stats()["followers"] - before["followers"] < count - 1:
+            await asyncio.sleep(0.001)
+        loader.released.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    return asyncio.run(main())
+
+def test_async_callers_share_one_execution():
+    loader = Loader()
+
+    assert run_async_callers(CALLERS, loader) == [42] * CALLERS
+    assert loader.calls == 1
+    assert single_flight.get_flight_stats()["in_flight"] == 0
+
+def test_async_error_reaches_every_caller_and_releases_the_key():
+    error = RuntimeError("source blocked")
+    loader = Loader(error)
+
+    assert run_async_callers(CALLERS, loader) == [error] * CALLERS
+    assert loader.calls == 1
+    assert single_flight.get_flight_stats()["in_flight"] == 0
+
+def test_followers_of_a_claimed_flight_get_the_chained_result():
+    flight, leader = single_flight.claim("boxers")
+    follower_flight, follower_leads = single_flight.claim("boxers")
+    assert leader and not follower_leads and follower_flight is flight
+
+    source = concurrent.futures.Future()
+    single_flight.chain("boxers", flight, source)
+    assert single_flight.get_flight_stats()["in_flight"] == 1
+    source.set_result(["A1"])
+
+    assert follower_flight.result(timeout=1) == ["A1"]
+    assert single_flight.get_flight_stats()["in_flight"] == 0
+    next_flight, leads_again = single_flight.claim("boxers")
+    assert leads_again
+    single_flight.finish("boxers", next_flight)
+
+def test_cancelled_source_fails_the_flight():
+    flight, _ = single_flight.claim("boxers")
+    source = concurrent.futures.Future()
+    single_flight.chain("boxers", flight, source)
+
+    source.cancel()
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        flight.result(timeout=1)
+    assert single_flight.get_flight_stats()["in_flight"] == 0
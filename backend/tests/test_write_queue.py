@@ -0,0 +1,59 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.models.product import GenderEnum
+from app.services import write_queue
+
+class FakeSession:
+    def __init__(self):
+        self.rollbacks = 0
+        self.closed = False
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(write_queue, "SessionLocal", lambda: session)
+    return session
+
+@pytest.fixture
+def committed(monkeypatch):
+    """Upserts that went through, by source; Myntra pages fail"""
+    committed = []
+
+    def upsert(db, source_name, products, gender=None):
+        if source_name == "Myntra":
+            raise RuntimeError("value too long for type character varying(255)")
+        committed.append((source_name, gender, len(products)))
+        return {"inserted": len(products), "updated": 0, "unchanged": 0}
+
+    monkeypatch.setattr(write_queue, "upsert_scraped_products", upsert)
+    return committed
+
+def page(source_name, count, gender=GenderEnum.men):
+    return (source_name, gender, [{"id": f"{source_name}{number}"} for number in range(count)], Future())
+
+def test_failing_group_does_not_fail_the_others(session, committed):
+    before = write_queue.get_queue_stats()
+    batch = [page("Amazon", 2), page("Myntra", 3), page("Flipkart", 4), page("Amazon", 1)]
+
+    write_queue._write_batch(batch)
+
+    assert committed == [("Amazon", GenderEnum.men, 3), ("Flipkart", GenderEnum.men, 4)]
+    amazon, myntra, flipkart, amazon_again = (future for _, _, _, future in batch)
+    assert amazon.result() == amazon_again.result() == {"inserted": 3, "updated": 0, "unchanged": 0}
+    assert flipkart.result() == {"inserted": 4, "updated": 0, "unchanged": 0}
+    with pytest.raises(RuntimeError):
+        myntra.result()
+    assert session.rollbacks == 1 and session.closed
+
+    stats = write_queue.get_queue_stats()
+    assert stats["errors"] - before["errors"] == 1
+    assert stats["written"] - before["written"] == 7
+    assert stats["inserted"] - before["inserted"] == 7
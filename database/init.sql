@@ -26,7 +26,8 @@ CREATE TABLE IF NOT EXISTS products (
     available_colors VARCHAR(50)[],
     images VARCHAR(500)[],
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_products_name_brand_gender UNIQUE (name, brand, gender)
 );
 
 -- Sources table
@@ -38,6 +39,10 @@ CREATE TABLE IF NOT EXISTS sources (
     search_endpoint VARCHAR(255),
     product_endpoint VARCHAR(255),
     is_active BOOLEAN DEFAULT TRUE,
+    rate_limit_burst INTEGER,
+    rate_limit_per_second FLOAT,
+    http_pool_size INTEGER,
+    cache_ttl INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -72,6 +77,44 @@ CREATE TABLE IF NOT EXISTS reviews (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Price history (see database/migrations/004_price_history.sql)
+CREATE TABLE IF NOT EXISTS price_history (
+    id BIGSERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    price FLOAT,
+    original_price FLOAT,
+    in_stock BOOLEAN NOT NULL DEFAULT TRUE,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS price_history_daily (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    min_price FLOAT,
+    max_price FLOAT,
+    last_price FLOAT,
+    last_in_stock BOOLEAN NOT NULL DEFAULT TRUE,
+    changes INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (product_id, day, source_id)
+);
+
+-- Lookup indexes (see database/migrations/003_lookup_indexes.sql)
+CREATE INDEX IF NOT EXISTS ix_products_gender_brand ON products (gender, brand);
+CREATE INDEX IF NOT EXISTS ix_products_gender_type ON products (gender, type);
+CREATE INDEX IF NOT EXISTS ix_products_brand ON products (brand);
+CREATE INDEX IF NOT EXISTS ix_product_source_source_product ON product_source (source_id, source_product_id);
+CREATE INDEX IF NOT EXISTS ix_reviews_product_id ON reviews (product_id);
+CREATE INDEX IF NOT EXISTS ix_price_history_product_recorded ON price_history (product_id, recorded_at);
+
+-- Product summary (table and triggers) and search columns, before any data is loaded
+\ir migrations/005_product_summary.sql
+\ir migrations/006_listing_keyset_indexes.sql
+\ir migrations/007_product_search.sql
+\ir migrations/008_product_summary_updated_index.sql
+
 -- Insert initial sources
 INSERT INTO sources (name, base_url, logo_url, search_endpoint, product_endpoint)
 VALUES
@@ -120,3 +163,22 @@ VALUES
     (3, 4, 'Emily R.', 4.5, 'Great quality', 'Love the material and fit. No visible lines under clothes.', 1),
     
     (4, 3, 'Jessica M.', 4.8, 'Very comfortable', 'Best wirefree bra I have ever used. Perfect for everyday wear.', 2);
+
+-- The schema above already includes every migration below; record them so
+-- migrate.py does not apply them again (keep in sync with database/migrations)
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(255) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version)
+VALUES
+    ('001_source_scraping_settings.sql'),
+    ('002_products_natural_key.sql'),
+    ('003_lookup_indexes.sql'),
+    ('004_price_history.sql'),
+    ('005_product_summary.sql'),
+    ('006_listing_keyset_indexes.sql'),
+    ('007_product_search.sql'),
+    ('008_product_summary_updated_index.sql')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,6 @@
+-- Per-source scraping settings (rate limits, connection pool, page cache TTL).
+-- Empty columns fall back to the global settings in app/config.py.
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS rate_limit_burst INTEGER;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS rate_limit_per_second FLOAT;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS http_pool_size INTEGER;
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS cache_ttl INTEGER;
@@ -0,0 +1,54 @@
+-- Natural key of a product: (name, brand, gender).
+-- The bulk upserts rely on it (ON CONFLICT ON CONSTRAINT uq_products_name_brand_gender),
+-- so duplicates left by the old row-by-row inserts are merged into the oldest row first.
+
+-- Of the listings a group of duplicates has on one source, keep the most recently checked
+WITH dupes AS (
+    SELECT id, MIN(id) OVER (PARTITION BY name, brand, gender) AS keep_id
+    FROM products
+),
+ranked AS (
+    SELECT ps.product_id, ps.source_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY dupes.keep_id, ps.source_id
+               ORDER BY ps.last_checked DESC NULLS LAST, ps.product_id
+           ) AS rank
+    FROM product_source ps
+    JOIN dupes ON dupes.id = ps.product_id
+)
+DELETE FROM product_source ps
+USING ranked
+WHERE ps.product_id = ranked.product_id AND ps.source_id = ranked.source_id AND ranked.rank > 1;
+
+-- Move the remaining listings and the reviews to the oldest product
+WITH dupes AS (
+    SELECT id, MIN(id) OVER (PARTITION BY name, brand, gender) AS keep_id
+    FROM products
+)
+UPDATE product_source ps
+SET product_id = dupes.keep_id
+FROM dupes
+WHERE ps.product_id = dupes.id AND dupes.id <> dupes.keep_id;
+
+WITH dupes AS (
+    SELECT id, MIN(id) OVER (PARTITION BY name, brand, gender) AS keep_id
+    FROM products
+)
+UPDATE reviews r
+SET product_id = dupes.keep_id
+FROM dupes
+WHERE r.product_id = dupes.id AND dupes.id <> dupes.keep_id;
+
+DELETE FROM products p
+USING products keep
+WHERE keep.name = p.name AND keep.brand = p.brand AND keep.gender = p.gender
+  AND keep.id < p.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_products_name_brand_gender') THEN
+        ALTER TABLE products
+            ADD CONSTRAINT uq_products_name_brand_gender UNIQUE (name, brand, gender);
+    END IF;
+END
+$$;
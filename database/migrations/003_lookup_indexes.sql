@@ -0,0 +1,18 @@
+-- Indexes for the hot read paths. sources.name needs none: its UNIQUE constraint
+-- already creates one, and the upserts use uq_products_name_brand_gender.
+
+-- filter_products: gender plus a brand or type list, and brand-only filters
+CREATE INDEX IF NOT EXISTS ix_products_gender_brand ON products (gender, brand);
+CREATE INDEX IF NOT EXISTS ix_products_gender_type ON products (gender, type);
+CREATE INDEX IF NOT EXISTS ix_products_brand ON products (brand);
+
+-- Product refresh by marketplace id, and every listing of a source.
+-- The primary key (product_id, source_id) only serves lookups by product.
+CREATE INDEX IF NOT EXISTS ix_product_source_source_product ON product_source (source_id, source_product_id);
+
+-- Rating aggregates joined by product
+CREATE INDEX IF NOT EXISTS ix_reviews_product_id ON reviews (product_id);
+
+ANALYZE products;
+ANALYZE product_source;
+ANALYZE reviews;
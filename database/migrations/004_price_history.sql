@@ -0,0 +1,41 @@
+-- Append-only price history: one point per listing whenever its price or stock changes,
+-- plus daily min/max/last buckets that outlive the raw points (PRICE_HISTORY_RAW_DAYS).
+CREATE TABLE IF NOT EXISTS price_history (
+    id BIGSERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    price FLOAT,
+    original_price FLOAT,
+    in_stock BOOLEAN NOT NULL DEFAULT TRUE,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_price_history_product_recorded ON price_history (product_id, recorded_at);
+
+CREATE TABLE IF NOT EXISTS price_history_daily (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    min_price FLOAT,
+    max_price FLOAT,
+    last_price FLOAT,
+    last_in_stock BOOLEAN NOT NULL DEFAULT TRUE,
+    changes INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (product_id, day, source_id)
+);
+
+-- Start every existing listing's history at its current price
+INSERT INTO price_history (product_id, source_id, price, original_price, in_stock, recorded_at)
+SELECT ps.product_id, ps.source_id, ps.price, ps.original_price, COALESCE(ps.in_stock, TRUE),
+       COALESCE(ps.last_checked, CURRENT_TIMESTAMP)
+FROM product_source ps
+WHERE NOT EXISTS (
+    SELECT 1 FROM price_history ph
+    WHERE ph.product_id = ps.product_id AND ph.source_id = ps.source_id
+);
+
+INSERT INTO price_history_daily (product_id, day, source_id, min_price, max_price, last_price, last_in_stock)
+SELECT ps.product_id, CAST(COALESCE(ps.last_checked, CURRENT_TIMESTAMP) AS DATE), ps.source_id,
+       ps.price, ps.price, ps.price, COALESCE(ps.in_stock, TRUE)
+FROM product_source ps
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,202 @@
+-- Denormalized listing data, one row per product: lowest/highest price, source names and
+-- rating average/count. Statement-level triggers on products, product_source, reviews and
+-- sources refresh only the products a statement touched, so a bulk upsert of 500 listings
+-- costs one set-based refresh instead of 500.
+
+-- gender takes the type of products.gender: gender_enum from init.sql, or the
+-- genderenum type SQLAlchemy creates when the tables came from create_all()
+DO $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS product_summary (
+            product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            gender %s NOT NULL,
+            brand VARCHAR(100) NOT NULL,
+            type VARCHAR(100) NOT NULL,
+            created_at TIMESTAMP,
+            lowest_price FLOAT,
+            highest_price FLOAT,
+            source_names VARCHAR(50)[] NOT NULL DEFAULT ''{}'',
+            rating_average FLOAT,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )',
+        (SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+         WHERE attrelid = 'products'::regclass AND attname = 'gender')
+    );
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_product_summary_gender_price ON product_summary (gender, lowest_price);
+CREATE INDEX IF NOT EXISTS ix_product_summary_gender_brand ON product_summary (gender, brand);
+CREATE INDEX IF NOT EXISTS ix_product_summary_gender_type ON product_summary (gender, type);
+CREATE INDEX IF NOT EXISTS ix_product_summary_price ON product_summary (lowest_price);
+CREATE INDEX IF NOT EXISTS ix_product_summary_rating ON product_summary (rating_average DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS ix_product_summary_created ON product_summary (created_at);
+CREATE INDEX IF NOT EXISTS ix_product_summary_sources ON product_summary USING gin (source_names);
+
+-- Recompute the summary rows of the given products. Prices and ratings are aggregated
+-- separately, so a product's listings and reviews don't multiply each other.
+CREATE OR REPLACE FUNCTION refresh_product_summary(ids INTEGER[]) RETURNS VOID AS $$
+BEGIN
+    IF ids IS NULL OR cardinality(ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO product_summary (product_id, gender, brand, type, created_at, lowest_price, highest_price,
+                                 source_names, rating_average, rating_count, updated_at)
+    SELECT p.id, p.gender, p.brand, p.type, p.created_at, listings.lowest_price, listings.highest_price,
+           COALESCE(listings.source_names, '{}'), ratings.rating_average, ratings.rating_count, CURRENT_TIMESTAMP
+    FROM products p
+    LEFT JOIN LATERAL (
+        SELECT MIN(ps.price) AS lowest_price,
+               MAX(ps.price) AS highest_price,
+               array_agg(s.name ORDER BY s.name) AS source_names
+        FROM product_source ps
+        JOIN sources s ON s.id = ps.source_id
+        WHERE ps.product_id = p.id
+    ) listings ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT AVG(r.rating) AS rating_average, COUNT(*) AS rating_count
+        FROM reviews r
+        WHERE r.product_id = p.id
+    ) ratings ON TRUE
+    WHERE p.id = ANY(ids)
+    ON CONFLICT (product_id) DO UPDATE SET
+        gender = EXCLUDED.gender,
+        brand = EXCLUDED.brand,
+        type = EXCLUDED.type,
+        created_at = EXCLUDED.created_at,
+        lowest_price = EXCLUDED.lowest_price,
+        highest_price = EXCLUDED.highest_price,
+        source_names = EXCLUDED.source_names,
+        rating_average = EXCLUDED.rating_average,
+        rating_count = EXCLUDED.rating_count,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- product_source: inserts, deletes, and updates that move a price or a listing.
+-- (Postgres allows transition tables only on single-event triggers, hence one trigger per event.)
+CREATE OR REPLACE FUNCTION product_summary_listings_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_product_summary(ARRAY(SELECT DISTINCT product_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_product_summary(ARRAY(SELECT DISTINCT product_id FROM old_rows));
+    ELSE
+        -- Scrapes rewrite every listing; only price changes affect the summary
+        PERFORM refresh_product_summary(ARRAY(
+            SELECT n.product_id
+            FROM new_rows n
+            LEFT JOIN old_rows o ON o.product_id = n.product_id AND o.source_id = n.source_id
+            WHERE o.product_id IS NULL OR o.price IS DISTINCT FROM n.price
+            UNION
+            SELECT o.product_id
+            FROM old_rows o
+            LEFT JOIN new_rows n ON n.product_id = o.product_id AND n.source_id = o.source_id
+            WHERE n.product_id IS NULL
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- reviews: any change to a review may move its product's rating
+CREATE OR REPLACE FUNCTION product_summary_reviews_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_product_summary(ARRAY(SELECT DISTINCT product_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_product_summary(ARRAY(SELECT DISTINCT product_id FROM old_rows));
+    ELSE
+        PERFORM refresh_product_summary(ARRAY(
+            SELECT n.product_id
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            WHERE o.rating IS DISTINCT FROM n.rating OR o.product_id <> n.product_id
+            UNION
+            SELECT o.product_id
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            WHERE o.product_id <> n.product_id
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- products: new products get a row (deletes cascade); copied columns follow updates
+CREATE OR REPLACE FUNCTION product_summary_products_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_product_summary(ARRAY(SELECT id FROM new_rows));
+    ELSE
+        PERFORM refresh_product_summary(ARRAY(
+            SELECT n.id
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            WHERE (o.gender, o.brand, o.type, o.created_at) IS DISTINCT FROM (n.gender, n.brand, n.type, n.created_at)
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- sources: a renamed source changes the source names of its products
+CREATE OR REPLACE FUNCTION product_summary_sources_changed() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_product_summary(ARRAY(
+        SELECT DISTINCT ps.product_id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN product_source ps ON ps.source_id = n.id
+        WHERE o.name IS DISTINCT FROM n.name
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_source_summary_insert ON product_source;
+DROP TRIGGER IF EXISTS product_source_summary_update ON product_source;
+DROP TRIGGER IF EXISTS product_source_summary_delete ON product_source;
+CREATE TRIGGER product_source_summary_insert AFTER INSERT ON product_source
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_listings_changed();
+CREATE TRIGGER product_source_summary_update AFTER UPDATE ON product_source
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_listings_changed();
+CREATE TRIGGER product_source_summary_delete AFTER DELETE ON product_source
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_listings_changed();
+
+DROP TRIGGER IF EXISTS reviews_summary_insert ON reviews;
+DROP TRIGGER IF EXISTS reviews_summary_update ON reviews;
+DROP TRIGGER IF EXISTS reviews_summary_delete ON reviews;
+CREATE TRIGGER reviews_summary_insert AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_reviews_changed();
+CREATE TRIGGER reviews_summary_update AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_reviews_changed();
+CREATE TRIGGER reviews_summary_delete AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_reviews_changed();
+
+DROP TRIGGER IF EXISTS products_summary_insert ON products;
+DROP TRIGGER IF EXISTS products_summary_update ON products;
+CREATE TRIGGER products_summary_insert AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_products_changed();
+CREATE TRIGGER products_summary_update AFTER UPDATE ON products
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_products_changed();
+
+DROP TRIGGER IF EXISTS sources_summary_update ON sources;
+CREATE TRIGGER sources_summary_update AFTER UPDATE ON sources
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_summary_sources_changed();
+
+-- Backfill
+SELECT refresh_product_summary(ARRAY(SELECT id FROM products));
+ANALYZE product_summary;
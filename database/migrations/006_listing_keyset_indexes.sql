@@ -0,0 +1,12 @@
+-- Keyset pagination: every listing sort is (sort key, product_id), scanned forwards for
+-- ascending sorts and backwards for descending ones, so each index ends in product_id.
+-- rating_desc sorts unrated products as 0, below every real rating (1-5).
+DROP INDEX IF EXISTS ix_product_summary_price;
+DROP INDEX IF EXISTS ix_product_summary_gender_price;
+DROP INDEX IF EXISTS ix_product_summary_rating;
+DROP INDEX IF EXISTS ix_product_summary_created;
+
+CREATE INDEX ix_product_summary_price ON product_summary (lowest_price, product_id);
+CREATE INDEX ix_product_summary_gender_price ON product_summary (gender, lowest_price, product_id);
+CREATE INDEX ix_product_summary_rating ON product_summary ((COALESCE(rating_average, 0)), product_id);
+CREATE INDEX ix_product_summary_created ON product_summary (created_at, product_id);
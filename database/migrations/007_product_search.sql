@@ -0,0 +1,18 @@
+-- Catalog search: a weighted tsvector generated from name, brand, type and description
+-- (GIN index for full-text matches), plus pg_trgm indexes on name and brand for fuzzy and
+-- partial matches ("calvn" -> Calvin Klein, "jock" -> Jockey). Adding the generated
+-- column rewrites products once.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(brand, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(type, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_products_brand_trgm ON products USING gin (brand gin_trgm_ops);
+
+ANALYZE products;
@@ -0,0 +1,3 @@
+-- The quick search index of every API worker re-reads the summaries changed since its
+-- last pass (product_service.index_changed_products)
+CREATE INDEX IF NOT EXISTS ix_product_summary_updated ON product_summary (updated_at);